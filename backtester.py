@@ -0,0 +1,326 @@
+"""
+조건식 편입 → 손절/익절 전략 백테스트
+
+실매매와 같은 규칙
+    진입 : 편입 신호 다음 분봉 시가로 시장가 매수, 수량 = 종목당 예산 // 가격 (1주 미만이면 제외)
+           장 운영시간 밖, 보유 중, 당일 이미 매수한 종목, 최대 보유 종목 수 도달 시 제외 (condition_pipeline 필터)
+    청산 : 매입가 대비 수익률이 손절 기준 이하 / 익절 기준 이상이면 시장가 매도 (KiwoomAPI.check_exit_threshold)
+           분봉 안에서는 저가로 손절, 고가로 익절을 판단하고 둘 다 닿으면 손절로 본다.
+           체결가는 기준 가격 (시가가 이미 기준을 넘어 있으면 시가).
+           horizon_days 안에 기준에 닿지 않으면 마지막 분봉 종가로 청산 (기간만료)
+    비용 : 매매 수수료 / 매도 거래세 (trading_costs, kiwoom_simulator 와 같은 요율)
+
+계산 방식
+    1단계 (종목별, 프로세스 병렬)
+        신호마다 진입 이후 저가 누적 최솟값 / 고가 누적 최댓값을 구하고 searchsorted 로 모든 손절·익절 기준의
+        첫 도달 분봉을 한 번에 찾는다 → (신호 × 손절 기준 × 익절 기준) 청산 시각 / 손익
+    2단계 (기준 조합별, 프로세스 병렬)
+        신호 시각 순서로 보유 / 당일 매수 / 최대 보유 수 필터를 적용하고 손익을 집계한다.
+
+    python sample/backtest_sweep.py --bars bars/ --signals signals.csv --loss -2 -4 -6 --gain 4 6 8
+"""
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+
+from trading_costs import FEE_RATE, SELL_TAX_RATE
+
+MARKET_OPEN = dtime(9, 0)     # 정규장 시작 (condition_pipeline 과 같음)
+MARKET_CLOSE = dtime(15, 20)  # 정규장 접속매매 종료
+
+EXIT_LOSS = 0
+EXIT_GAIN = 1
+EXIT_EXPIRED = 2
+EXIT_REASONS = {EXIT_LOSS: "손절", EXIT_GAIN: "익절", EXIT_EXPIRED: "기간만료"}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def load_signals(path):
+    """
+    신호 CSV 읽기 (code, time[, condition] 컬럼)
+    Returns:
+        DataFrame: code(str), time(datetime64[m])
+    """
+    frame = pd.read_csv(path, dtype={"code": str})
+    frame["time"] = pd.to_datetime(frame["time"])
+    return frame
+
+
+def signals_from_tape(path):
+    """
+    이벤트 테이프(event_tape)의 조건식 편입(OnReceiveRealCondition, "I") 이벤트를 신호로 변환
+    Returns:
+        DataFrame: code, time, condition
+    """
+    from datetime import timedelta
+    from event_tape import read_tape, KIND_META, KIND_EVENT
+
+    rows = []
+    market_start = None
+    for kind, ts, payload in read_tape(path):
+        if kind == KIND_META:
+            market_start = pd.Timestamp(payload["market_start"])
+        elif kind == KIND_EVENT and payload[0] == "OnReceiveRealCondition":
+            code, type_, cond_name, _ = payload[1]
+            if type_ == "I" and market_start is not None:
+                rows.append((code, market_start + timedelta(seconds=ts), cond_name))
+    return pd.DataFrame(rows, columns=["code", "time", "condition"])
+
+
+def _trading_fee(amount):
+    """수수료 (10원 미만 절사)"""
+    return np.floor(amount * FEE_RATE / 10) * 10
+
+
+def simulate_code(source, code, signal_times, loss_cutoffs, gain_cutoffs, budget, horizon_days=None):
+    """
+    1단계: 한 종목의 신호별 진입과 모든 손절/익절 기준 조합의 청산 계산
+    Args:
+        source: 봉 데이터 소스 (bar_data 참고)
+        signal_times (ndarray): 신호 시각 datetime64[m] (오름차순)
+        loss_cutoffs / gain_cutoffs (ndarray): 손절(음수)/익절 기준 수익률(%)
+        budget (int): 종목당 예산
+        horizon_days (int): 최대 보유 일수 (None 이면 데이터 끝까지)
+    Returns:
+        dict: signal_time, entry_time, entry_price, quantity (신호별),
+              exit_time, pnl, reason (신호 × 손절 × 익절)
+    """
+    bars = source.load(code)
+    n_loss, n_gain = len(loss_cutoffs), len(gain_cutoffs)
+    times = bars.times
+    signal_times = np.asarray(signal_times, dtype="datetime64[m]")
+    entry_idx = np.searchsorted(times, signal_times, side="right")  # 신호 다음 분봉
+
+    keep = []
+    exits = []
+    pnls = []
+    reasons = []
+    for s, e in enumerate(entry_idx):
+        if e >= len(times):
+            continue
+        day = signal_times[s].astype("datetime64[D]")
+        if times[e].astype("datetime64[D]") != day:
+            continue  # 장 마감 직전 신호: 당일 다음 분봉 없음
+        cost = bars.open[e]
+        quantity = budget // cost if cost > 0 else 0
+        if quantity < 1:
+            continue
+
+        end = len(times)
+        if horizon_days:
+            end = int(np.searchsorted(times, (day + np.timedelta64(horizon_days, "D")).astype("datetime64[m]")))
+        lows = np.minimum.accumulate(bars.low[e:end])
+        highs = np.maximum.accumulate(bars.high[e:end])
+        span = len(lows)
+
+        loss_prices = cost * (1 + loss_cutoffs / 100)
+        gain_prices = cost * (1 + gain_cutoffs / 100)
+        loss_at = np.searchsorted(-lows, -loss_prices, side="left")  # 첫 저가 <= 손절가
+        gain_at = np.searchsorted(highs, gain_prices, side="left")   # 첫 고가 >= 익절가
+
+        exit_at = np.minimum(loss_at[:, None], gain_at[None, :])
+        is_loss = loss_at[:, None] <= gain_at[None, :]
+        expired = exit_at >= span
+        bar = e + np.minimum(exit_at, span - 1)
+        opens = bars.open[bar]
+        price = np.where(is_loss, np.minimum(opens, loss_prices[:, None]), np.maximum(opens, gain_prices[None, :]))
+        price = np.where(expired, bars.close[end - 1], price)
+
+        buy_amount = quantity * cost
+        sell_amount = quantity * price
+        pnl = (sell_amount - buy_amount - _trading_fee(buy_amount) - _trading_fee(sell_amount)
+               - np.floor(sell_amount * SELL_TAX_RATE))
+
+        keep.append((s, e, cost, quantity))
+        exits.append(times[bar].astype(np.int64))
+        pnls.append(pnl)
+        reasons.append(np.where(expired, EXIT_EXPIRED, np.where(is_loss, EXIT_LOSS, EXIT_GAIN)).astype(np.int8))
+
+    if not keep:
+        return _empty_result(n_loss, n_gain)
+    signal_idx, entries, costs, quantities = (np.array(column) for column in zip(*keep))
+    return {
+        "signal_time": signal_times[signal_idx].astype(np.int64),
+        "entry_time": times[entries].astype(np.int64),
+        "entry_price": costs,
+        "quantity": quantities.astype(np.int64),
+        "exit_time": np.stack(exits),
+        "pnl": np.stack(pnls),
+        "reason": np.stack(reasons),
+    }
+
+
+def _empty_result(n_loss, n_gain):
+    return {
+        "signal_time": np.empty(0, dtype=np.int64), "entry_time": np.empty(0, dtype=np.int64),
+        "entry_price": np.empty(0), "quantity": np.empty(0, dtype=np.int64),
+        "exit_time": np.empty((0, n_loss, n_gain), dtype=np.int64),
+        "pnl": np.empty((0, n_loss, n_gain)), "reason": np.empty((0, n_loss, n_gain), dtype=np.int8),
+    }
+
+
+def _simulate_code(args):
+    return args[1], simulate_code(*args)
+
+
+def select_trades(signal_time, code_id, exit_time, max_positions=None):
+    """
+    2단계: 신호 시각 순서로 실매매 필터 적용 (보유 중 / 당일 매수 / 최대 보유 종목 수)
+    Args:
+        signal_time / code_id / exit_time (ndarray): 신호 시각 순으로 정렬된 후보 (분 단위 정수)
+    Returns:
+        ndarray(bool): 진입 여부
+    """
+    accepted = np.zeros(len(signal_time), dtype=bool)
+    holding = []          # (청산 시각, 종목) 보유 중인 종목
+    held = set()
+    traded_today = set()  # (일자, 종목)
+    for i in range(len(signal_time)):
+        t = signal_time[i]
+        while holding and holding[0][0] <= t:
+            held.discard(heapq.heappop(holding)[1])
+        code = code_id[i]
+        key = (t // MINUTES_PER_DAY, code)
+        if code in held or key in traded_today:
+            continue
+        if max_positions is not None and len(holding) >= max_positions:
+            continue
+        accepted[i] = True
+        heapq.heappush(holding, (exit_time[i], code))
+        held.add(code)
+        traded_today.add(key)
+    return accepted
+
+
+def summarize(pnl, cost, reason, exit_time):
+    """기준 조합 하나의 성과 요약"""
+    count = len(pnl)
+    if not count:
+        return {"trades": 0, "win_rate": 0.0, "total_pnl": 0, "avg_return": 0.0, "max_drawdown": 0,
+                "손절": 0, "익절": 0, "기간만료": 0}
+    equity = np.cumsum(pnl[np.argsort(exit_time, kind="stable")])
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    result = {
+        "trades": count,
+        "win_rate": float((pnl > 0).mean() * 100),
+        "total_pnl": int(pnl.sum()),
+        "avg_return": float((pnl / cost).mean() * 100),
+        "max_drawdown": int(drawdown.max()),
+    }
+    for code, name in EXIT_REASONS.items():
+        result[name] = int((reason == code).sum())
+    return result
+
+
+def _evaluate(args):
+    signal_time, code_id, exit_time, pnl, cost, reason, max_positions = args
+    accepted = select_trades(signal_time, code_id, exit_time, max_positions)
+    return summarize(pnl[accepted], cost[accepted], reason[accepted], exit_time[accepted])
+
+
+class Backtester:
+    def __init__(self, source, budget_per_stock, max_positions=None, horizon_days=None,
+                 trading_hours=(MARKET_OPEN, MARKET_CLOSE), processes=None):
+        """
+        Args:
+            source: 봉 데이터 소스 (load(code) -> bar_data.Bars, 프로세스로 전달되므로 pickle 가능해야 함)
+            budget_per_stock (int): 종목당 예산
+            max_positions (int): 동시 보유 최대 종목 수 (None 이면 제한 없음)
+            horizon_days (int): 최대 보유 일수 (None 이면 데이터 끝까지)
+            trading_hours (tuple): 신호를 받는 시간 (시작, 종료). None 이면 확인 안 함
+            processes (int): 작업 프로세스 수 (None 이면 CPU 수, 1 이면 현재 프로세스에서 실행)
+        """
+        self.source = source
+        self.budget_per_stock = budget_per_stock
+        self.max_positions = max_positions
+        self.horizon_days = horizon_days
+        self.trading_hours = trading_hours
+        self.processes = processes
+
+    def _map(self, func, items):
+        if self.processes == 1:
+            return [func(item) for item in items]
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            return list(executor.map(func, items, chunksize=max(1, len(items) // 64)))
+
+    def _filter_signals(self, signals):
+        frame = pd.DataFrame({"code": signals["code"].astype(str), "time": pd.to_datetime(signals["time"])})
+        frame["time"] = frame["time"].dt.floor("min")
+        if self.trading_hours is not None:
+            clock = frame["time"].dt.time
+            frame = frame[(clock >= self.trading_hours[0]) & (clock < self.trading_hours[1])]
+        return frame.drop_duplicates().sort_values(["time", "code"])
+
+    def simulate(self, signals, loss_cutoffs, gain_cutoffs):
+        """
+        1단계 결과를 신호 시각 순서로 합침
+        Returns:
+            dict: code_id, codes, signal_time, entry_time, entry_price, quantity, exit_time, pnl, reason
+        """
+        loss_cutoffs = -np.abs(np.asarray(loss_cutoffs, dtype=np.float64))
+        gain_cutoffs = np.asarray(gain_cutoffs, dtype=np.float64)
+        frame = self._filter_signals(signals)
+        jobs = [
+            (self.source, code, group["time"].to_numpy(dtype="datetime64[m]"), loss_cutoffs, gain_cutoffs,
+             self.budget_per_stock, self.horizon_days)
+            for code, group in frame.groupby("code", sort=True)
+        ]
+        results = [(code, result) for code, result in self._map(_simulate_code, jobs) if len(result["signal_time"])]
+
+        codes = [code for code, _ in results]
+        parts = [result for _, result in results] or [_empty_result(len(loss_cutoffs), len(gain_cutoffs))]
+        merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        merged["code_id"] = np.concatenate(
+            [np.full(len(part["signal_time"]), i, dtype=np.int64) for i, part in enumerate(parts)])
+        order = np.lexsort((merged["code_id"], merged["signal_time"]))
+        merged = {key: value[order] for key, value in merged.items()}
+        merged["codes"] = codes
+        merged["loss_cutoffs"] = loss_cutoffs
+        merged["gain_cutoffs"] = gain_cutoffs
+        return merged
+
+    def sweep(self, signals, loss_cutoffs, gain_cutoffs):
+        """
+        손절/익절 기준 조합 전체 평가
+        Returns:
+            DataFrame: 조합별 loss_cutoff, gain_cutoff, trades, win_rate, total_pnl, avg_return, max_drawdown, 청산 사유별 건수
+                       (total_pnl 내림차순)
+        """
+        sim = self.simulate(signals, loss_cutoffs, gain_cutoffs)
+        grid = [(i, j) for i in range(len(sim["loss_cutoffs"])) for j in range(len(sim["gain_cutoffs"]))]
+        cost = sim["entry_price"] * sim["quantity"]
+        jobs = [
+            (sim["signal_time"], sim["code_id"], sim["exit_time"][:, i, j], sim["pnl"][:, i, j], cost,
+             sim["reason"][:, i, j], self.max_positions)
+            for i, j in grid
+        ]
+        rows = []
+        for (i, j), summary in zip(grid, self._map(_evaluate, jobs)):
+            rows.append(dict(loss_cutoff=sim["loss_cutoffs"][i], gain_cutoff=sim["gain_cutoffs"][j], **summary))
+        return pd.DataFrame(rows).sort_values("total_pnl", ascending=False, ignore_index=True)
+
+    def run(self, signals, loss_cutoff, gain_cutoff):
+        """
+        기준 하나로 실행한 매매 목록
+        Returns:
+            DataFrame: code, signal_time, entry_time, entry_price, quantity, exit_time, reason, pnl
+        """
+        sim = self.simulate(signals, [loss_cutoff], [gain_cutoff])
+        exit_time = sim["exit_time"][:, 0, 0]
+        accepted = select_trades(sim["signal_time"], sim["code_id"], exit_time, self.max_positions)
+        to_time = lambda minutes: minutes.astype("datetime64[m]")
+        return pd.DataFrame({
+            "code": np.array(sim["codes"], dtype=object)[sim["code_id"][accepted]] if sim["codes"] else [],
+            "signal_time": to_time(sim["signal_time"][accepted]),
+            "entry_time": to_time(sim["entry_time"][accepted]),
+            "entry_price": sim["entry_price"][accepted],
+            "quantity": sim["quantity"][accepted],
+            "exit_time": to_time(exit_time[accepted]),
+            "reason": [EXIT_REASONS[r] for r in sim["reason"][accepted, 0, 0]],
+            "pnl": sim["pnl"][accepted, 0, 0],
+        })
+
@@ -0,0 +1,196 @@
+"""
+분봉/일봉 데이터 (백테스트/분석용)
+
+Bars: 종목 하나의 봉 배열 (시간 오름차순)
+    times  : datetime64[m] (일봉은 해당 일 00:00)
+    open / high / low / close : float64 (원)
+    volume : int64
+
+봉 데이터 소스는 load(code) -> Bars, codes() -> 종목코드 목록 을 제공한다.
+    CsvBarSource : 디렉터리의 <종목코드>.csv (time, open, high, low, close, volume)
+    NpyBarStore  : 종목/일자 파티션 .npy 컬럼 저장소 (chart_downloader 가 키움 차트 TR 로 수집)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+
+class Bars:
+    __slots__ = ("code", "times", "open", "high", "low", "close", "volume")
+
+    def __init__(self, code, times, open_, high, low, close, volume=None):
+        self.code = code
+        self.times = np.asarray(times, dtype="datetime64[m]")
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.zeros(len(self.times), dtype=np.int64) if volume is None else np.asarray(volume, dtype=np.int64)
+
+    @classmethod
+    def empty(cls, code):
+        return cls(code, [], [], [], [], [])
+
+    @classmethod
+    def from_frame(cls, code, frame):
+        """time/open/high/low/close[/volume] 컬럼의 DataFrame 으로 생성 (시간순 정렬)"""
+        frame = frame.sort_values("time")
+        return cls(
+            code,
+            pd.to_datetime(frame["time"]).to_numpy(dtype="datetime64[m]"),
+            frame["open"].to_numpy(), frame["high"].to_numpy(),
+            frame["low"].to_numpy(), frame["close"].to_numpy(),
+            frame["volume"].to_numpy() if "volume" in frame else None,
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        if not len(self):
+            return f"Bars({self.code}, 0)"
+        return f"Bars({self.code}, {len(self)}, {self.times[0]} ~ {self.times[-1]})"
+
+
+class CsvBarSource:
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): <종목코드>.csv 파일이 있는 디렉터리
+        """
+        self.directory = directory
+
+    def codes(self):
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".csv"))
+
+    def load(self, code):
+        path = os.path.join(self.directory, f"{code}.csv")
+        if not os.path.exists(path):
+            return Bars.empty(code)
+        return Bars.from_frame(code, pd.read_csv(path))
+
+
+INTERVAL_MINUTE = "minute"
+INTERVAL_DAILY = "daily"
+
+
+class NpyBarStore:
+    """
+    봉 데이터 컬럼 저장소
+        <root>/<interval>/<종목코드>/<파티션>.npy
+        파티션: 분봉은 일자(YYYYMMDD), 일봉은 연도(YYYY)
+        파일 하나는 (6, n) int64 배열로 행 순서는 BAR_COLUMNS (time 은 1970-01-01 기준 분), 시간 오름차순
+    컬럼이 행 단위로 연속 저장되므로 읽을 때는 mmap 으로 열어 필요한 구간만 복사한다.
+    """
+    def __init__(self, root, interval=INTERVAL_MINUTE):
+        """
+        Args:
+            root (str): 저장소 디렉터리
+            interval (str): INTERVAL_MINUTE / INTERVAL_DAILY
+        """
+        self.root = root
+        self.interval = interval
+        self.directory = os.path.join(root, interval)
+
+    def codes(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.listdir(self.directory))
+
+    def partitions(self, code):
+        """종목의 파티션 이름 목록 (오름차순)"""
+        directory = os.path.join(self.directory, code)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".npy"))
+
+    def _partition_keys(self, times):
+        days = np.datetime_as_string(np.asarray(times, dtype="datetime64[D]"))
+        if self.interval == INTERVAL_DAILY:
+            return np.char.ljust(days, 4).astype("U4")
+        return np.char.replace(days, "-", "")
+
+    def _path(self, code, partition):
+        return os.path.join(self.directory, code, f"{partition}.npy")
+
+    def load(self, code, start=None, end=None):
+        """
+        Args:
+            start / end: 시작(포함) / 끝(제외) 시각 (datetime64 로 변환 가능한 값, None 이면 제한 없음)
+        Returns:
+            Bars
+        """
+        start = None if start is None else np.datetime64(start, "m")
+        end = None if end is None else np.datetime64(end, "m")
+        partitions = self.partitions(code)
+        if start is not None:
+            first = self._partition_keys([start])[0]
+            partitions = [name for name in partitions if name >= first]
+        if end is not None:
+            last = self._partition_keys([end])[0]
+            partitions = [name for name in partitions if name <= last]
+
+        blocks = []
+        for name in partitions:
+            data = np.load(self._path(code, name), mmap_mode="r")
+            lo = 0 if start is None else np.searchsorted(data[0], start.astype(np.int64))
+            hi = data.shape[1] if end is None else np.searchsorted(data[0], end.astype(np.int64))
+            if hi > lo:
+                blocks.append(data[:, lo:hi])
+        if not blocks:
+            return Bars.empty(code)
+        data = np.concatenate(blocks, axis=1)
+        return Bars(code, data[0].view("datetime64[m]"), data[1], data[2], data[3], data[4], data[5])
+
+    def last_time(self, code):
+        """저장된 마지막 봉 시각 (datetime64[m], 없으면 None)"""
+        partitions = self.partitions(code)
+        if not partitions:
+            return None
+        data = np.load(self._path(code, partitions[-1]), mmap_mode="r")
+        return np.datetime64(int(data[0, -1]), "m") if data.shape[1] else None
+
+    def write(self, bars):
+        """
+        봉 저장 (같은 시각의 기존 봉은 새 봉으로 교체)
+        Returns:
+            int: 새로 추가된 봉 수
+        """
+        if not len(bars):
+            return 0
+        order = np.argsort(bars.times, kind="stable")
+        data = np.stack([
+            bars.times[order].astype(np.int64),
+            np.rint(bars.open[order]).astype(np.int64), np.rint(bars.high[order]).astype(np.int64),
+            np.rint(bars.low[order]).astype(np.int64), np.rint(bars.close[order]).astype(np.int64),
+            bars.volume[order],
+        ])
+        keys = self._partition_keys(bars.times[order])
+        directory = os.path.join(self.directory, bars.code)
+        os.makedirs(directory, exist_ok=True)
+
+        added = 0
+        names, starts = np.unique(keys, return_index=True)
+        bounds = list(starts[1:]) + [len(keys)]
+        for name, lo, hi in zip(names, starts, bounds):
+            block = data[:, lo:hi]
+            path = self._path(bars.code, name)
+            existing = 0
+            if os.path.exists(path):
+                old = np.load(path)
+                existing = old.shape[1]
+                block = np.concatenate([old, block], axis=1)
+            # 시간순 정렬 후 같은 시각은 마지막(새) 봉만 남김
+            block = block[:, np.argsort(block[0], kind="stable")]
+            keep = np.append(block[0, 1:] != block[0, :-1], True)
+            block = np.ascontiguousarray(block[:, keep])
+            added += block.shape[1] - existing
+
+            temp = path + ".tmp"
+            with open(temp, "wb") as f:
+                np.save(f, block)
+            os.replace(temp, path)
+        return added
@@ -0,0 +1,134 @@
+"""
+과거 분봉/일봉 일괄 수집
+
+    downloader = ChartDownloader(kiwoom, "bars", tr_code=CHART_MINUTE, days=30)
+    downloader.start(codes)
+
+- 종목마다 저장소의 마지막 봉 이후만 요청한다 (증분 업데이트). 저장된 봉이 없으면 최근 days 일.
+- 요청은 KiwoomAPI.request_chart → TrScheduler 로 전송되므로 초당/시간당 조회 제한 이하로 진행되고,
+  PRIORITY_HISTORY 로 보내서 매매 중에도 주문 판단/잔고 조회가 먼저 전송된다.
+  (1분봉 한 페이지 900봉 ≒ 2.4 영업일, 시간당 900회 조회면 약 2,100 종목·영업일)
+- 받은 봉은 bar_data.NpyBarStore 에 종목/일자 파티션으로 저장한다.
+"""
+import numpy as np
+
+from bar_data import NpyBarStore, INTERVAL_MINUTE, INTERVAL_DAILY
+from kiwoom_api import CHART_MINUTE, CHART_DAILY, PRIORITY_HISTORY
+
+CHART_INTERVALS = {CHART_MINUTE: INTERVAL_MINUTE, CHART_DAILY: INTERVAL_DAILY}
+
+
+class ChartDownloader:
+    def __init__(self, kiwoom, root, tr_code=CHART_MINUTE, days=30, max_pages=None, concurrency=1,
+                 priority=PRIORITY_HISTORY, on_progress=None, on_finished=None, logger=None):
+        """
+        Args:
+            kiwoom (KiwoomAPI): 로그인된 KiwoomAPI
+            root (str): 저장소 디렉터리 (bar_data.NpyBarStore)
+            tr_code (str): CHART_MINUTE(분봉) / CHART_DAILY(일봉)
+            days (int): 저장된 봉이 없는 종목을 받을 기간(일)
+            max_pages (int): 종목당 최대 페이지 수 (None 이면 제한 없음)
+            concurrency (int): 동시에 진행할 종목 수
+            on_progress: on_progress(code, added, done, total) 종목 하나 완료 시 호출
+            on_finished: on_finished(stats) 전체 완료 시 호출
+        """
+        self.kiwoom = kiwoom
+        self.store = NpyBarStore(root, CHART_INTERVALS[tr_code])
+        self.tr_code = tr_code
+        self.days = days
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.priority = priority
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.logger = logger
+
+        self.queue = []
+        self.running = set()  # 요청 중인 종목코드
+        self.total = 0
+        self.done = 0
+        self.failed = []
+        self.added = 0
+        self.started_at = None
+        self.finished_at = None
+        self.sent_at_start = 0
+
+    def start(self, codes):
+        """codes 수집 시작 (이미 진행 중이면 대기열에 추가)"""
+        codes = [code for code in codes if code not in self.running and code not in self.queue]
+        if not self.is_running():
+            self.total = self.done = self.added = 0
+            self.failed = []
+            self.started_at = self.kiwoom.clock()
+            self.finished_at = None
+            self.sent_at_start = self.kiwoom.tr_scheduler.sent_count
+        self.queue.extend(reversed(codes))
+        self.total += len(codes)
+        self._log(f"[차트 수집] {len(codes):,}종목 시작 ({self.store.interval})")
+        self._next()
+
+    def stop(self):
+        """대기 중인 종목 취소 (요청 중인 종목은 완료까지 진행)"""
+        self.total -= len(self.queue)
+        self.queue.clear()
+
+    def is_running(self):
+        return bool(self.queue or self.running)
+
+    def stats(self):
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at if self.finished_at is not None else self.kiwoom.clock()) - self.started_at
+        return {
+            "codes": self.total,
+            "done": self.done,
+            "failed": len(self.failed),
+            "bars": self.added,
+            "requests": self.kiwoom.tr_scheduler.sent_count - self.sent_at_start,
+            "elapsed": elapsed,
+        }
+
+    def _since(self, code):
+        last = self.store.last_time(code)
+        if last is not None:
+            return last  # 마지막 봉은 진행 중에 받은 봉일 수 있으므로 다시 받아서 교체
+        start = np.datetime64(self.kiwoom.market_now().date(), "D") - np.timedelta64(self.days, "D")
+        return start.astype("datetime64[m]")
+
+    def _next(self):
+        while self.queue and len(self.running) < self.concurrency:
+            code = self.queue.pop()
+            self.running.add(code)
+            future = self.kiwoom.request_chart(self.tr_code, code, since=self._since(code),
+                                               max_pages=self.max_pages, priority=self.priority)
+            future.add_done_callback(lambda result, code=code: self._on_done(code, result))
+
+    def _on_done(self, code, future):
+        self.running.discard(code)
+        self.done += 1
+        added = 0
+        try:
+            added = self.store.write(future.result())
+            self.added += added
+        except Exception as e:
+            self.failed.append(code)
+            self._log(f"[차트 수집 실패] {code}: {e}")
+
+        if self.on_progress:
+            self.on_progress(code, added, self.done, self.total)
+        if self.is_running():
+            # 응답 처리 중(TrScheduler.complete)에 호출되므로 다음 요청은 이벤트 루프로 넘겨서 전송
+            self.kiwoom.call_later(0, self._next)
+            return
+
+        self.finished_at = self.kiwoom.clock()
+        stats = self.stats()
+        self._log(f"[차트 수집 완료] {stats['done']:,}종목, {stats['bars']:,}봉, "
+                  f"조회 {stats['requests']:,}회, 실패 {stats['failed']:,}, {stats['elapsed']:.1f}s")
+        if self.on_finished:
+            self.on_finished(stats)
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.info(message)
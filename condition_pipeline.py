@@ -0,0 +1,298 @@
+"""
+조건식 편입 → 매수 주문 처리 파이프라인
+
+편입 이벤트(실시간/초기 검색 결과)는 대기열에 넣기만 하고, 하나의 예약(tick_interval 간격)에서
+대기 중인 종목을 모아 한 번에 걸러낸 뒤 우선순위 순서로 주문 전송기(OrderDispatcher)에 넘긴다.
+
+필터 (종목마다 조회하지 않고 배치 단위로 한 번씩 계산)
+    1. 장 운영시간  : 배치 전체에 한 번
+    2. 신호 경과    : 편입 후 max_signal_age 초가 지나도록 주문하지 못한 종목은 제외 (오래된 신호로 시장가 매수 방지)
+    3. 중복         : 보유/미완료 주문/당일 매수 종목 집합과 비교
+    4. 예산         : 조건식별로 한 번 계산
+    5. 최대 보유 수 : 조건식별 보유 종목 수를 한 번 계산, 배치 안에서 차감
+    6. 수량         : 현재가(메모리 캐시)로 예산 내 수량 계산
+
+단계별 지연(편입 → 필터 통과 → 주문 전달)과 대기열 길이를 stats() 로 제공한다.
+"""
+from datetime import time as dtime
+
+from order_book import SIDE_BUY
+from kiwoom_api import ORDER_PRIORITY_ENTRY
+from latency import STAGE_SIGNAL, STAGE_FILTERED
+
+MARKET_OPEN = dtime(9, 0)     # 정규장 시작
+MARKET_CLOSE = dtime(15, 20)  # 정규장 접속매매 종료 (이후 종가 단일가)
+MAX_SIGNAL_AGE = 3.0          # 편입 후 이 시간(초) 안에 주문하지 못한 종목은 매수하지 않음
+
+# 필터 이름 (제외 사유)
+SKIP_MARKET_CLOSED = "장 운영시간 아님"
+SKIP_STALE = "신호 경과"
+SKIP_DUPLICATE = "이미 보유/주문 중"
+SKIP_NO_ACCOUNT = "계좌 미선택"
+SKIP_NO_BUDGET = "주문 예산 없음"
+SKIP_MAX_POSITIONS = "최대 보유 종목 수 도달"
+SKIP_NO_PRICE = "현재가 없음"
+SKIP_LOW_BUDGET = "예산 부족"
+SKIP_REJECTED = "주문 거부"
+SKIP_ERROR = "처리 오류"
+
+# 단계 이름
+STAGE_QUEUE = "queue"        # 편입 수신 ~ 주문하는 처리에서 필터 통과 (주문 제한으로 대기한 시간 포함)
+STAGE_DISPATCH = "dispatch"  # 필터 통과 ~ 주문 전송기 전달
+
+
+class EntrySignal:
+    __slots__ = ("code", "strategy", "source", "received_at", "filtered_at", "seq")
+
+    def __init__(self, code, strategy, source, received_at, seq):
+        self.code = code
+        self.strategy = strategy
+        self.source = source            # "실시간" / "초기검색"
+        self.received_at = received_at  # 편입 수신 시각 (clock 기준)
+        self.filtered_at = None         # 마지막 필터 통과 시각
+        self.seq = seq                  # 수신 순서
+
+    def sort_key(self):
+        return (self.strategy.priority, self.seq)
+
+
+class ConditionPipeline:
+    def __init__(self, kiwoom, get_account, get_budget, on_result=None, tick_interval=0.1,
+                 trading_hours=(MARKET_OPEN, MARKET_CLOSE), max_signal_age=MAX_SIGNAL_AGE, logger=None):
+        """
+        Args:
+            kiwoom (KiwoomAPI): 주문/보유 정보 (dispatcher, orders, order_map, is_position_active, clock, call_later, market_now)
+            get_account: get_account() -> 주문 계좌번호
+            get_budget: get_budget(strategy) -> 종목당 예산 (없으면 None)
+            on_result: on_result(signal, order, reason) 주문(order) 또는 제외(reason) 시 호출
+            tick_interval (float): 대기열 처리 간격(초)
+            trading_hours (tuple): (시작, 종료) datetime.time. None 이면 시간 확인 안 함
+            max_signal_age (float): 편입 후 주문까지 허용하는 시간(초). None 이면 확인 안 함
+        """
+        self.kiwoom = kiwoom
+        self.get_account = get_account
+        self.get_budget = get_budget
+        self.on_result = on_result
+        self.tick_interval = tick_interval
+        self.trading_hours = trading_hours
+        self.max_signal_age = max_signal_age
+        self.logger = logger
+
+        self.pending = {}  # 종목코드 -> EntrySignal (수신 순서 유지)
+        self._seq = 0
+        self._tick_scheduled = False
+
+        # 지표
+        self.received_count = 0
+        self.coalesced_count = 0  # 대기 중인 종목의 재편입 (received 에 포함되지 않음)
+        self.ordered_count = 0
+        self.skipped = {}        # 제외 사유 -> 건수 (received 중 제외된 건)
+        self.max_depth = 0
+        self.tick_count = 0
+        self.stage_latency = {STAGE_QUEUE: [0, 0.0, 0.0], STAGE_DISPATCH: [0, 0.0, 0.0]}  # 단계 -> [건수, 합계, 최대]
+
+    # ------------------------------------------------------------------
+    # 입력
+    # ------------------------------------------------------------------
+    def push(self, code, strategy, source="실시간"):
+        """편입 종목 등록 (같은 종목이 대기 중이면 하나로 합침). Returns: 등록 여부"""
+        if code in self.pending:
+            self.coalesced_count += 1
+            return False
+        self._seq += 1
+        self.pending[code] = EntrySignal(code, strategy, source, self.kiwoom.clock(), self._seq)
+        self.received_count += 1
+        self.max_depth = max(self.max_depth, len(self.pending))
+        self._schedule(self.tick_interval)
+        return True
+
+    def push_many(self, codes, strategy, source="초기검색"):
+        """여러 종목 한 번에 등록. Returns: 등록 건수"""
+        return sum(self.push(code, strategy, source) for code in codes)
+
+    def cancel(self, strategy=None):
+        """대기 중인 종목 제거 (strategy 가 None 이면 전체)"""
+        for code in [code for code, signal in self.pending.items() if strategy is None or signal.strategy is strategy]:
+            del self.pending[code]
+
+    def __contains__(self, code):
+        return code in self.pending
+
+    def depth(self):
+        return len(self.pending)
+
+    # ------------------------------------------------------------------
+    # 처리
+    # ------------------------------------------------------------------
+    def _schedule(self, delay):
+        if self._tick_scheduled:
+            return
+        self._tick_scheduled = True
+        self.kiwoom.call_later(delay, self.tick)
+
+    def tick(self):
+        """대기열 한 번 처리: 배치 필터 → 우선순위 순서로 주문 전송기에 전달"""
+        self._tick_scheduled = False
+        if not self.pending:
+            return
+        self.tick_count += 1
+
+        ready = self._filter(list(self.pending.values()))
+        dispatcher = self.kiwoom.dispatcher
+        for signal in ready:
+            # 매수는 주문 전송기에 하나씩만 넘겨, 매도가 매수 뒤에 밀리지 않고 대기 중에도 필터가 최신 상태로 적용되게 함
+            if dispatcher.depth(ORDER_PRIORITY_ENTRY) > 0 or dispatcher.wait_time() > 0:
+                break
+            del self.pending[signal.code]
+            self._record(STAGE_QUEUE, signal.filtered_at - signal.received_at)
+            self._place(signal)
+
+        if self.pending:
+            self._schedule(max(dispatcher.wait_time(), self.tick_interval))
+
+    def _filter(self, batch):
+        """
+        배치 필터. 통과하지 못한 종목은 대기열에서 제거하고, 통과한 종목을 우선순위 순서로 반환
+        최대 보유 수는 이번 배치에서 주문할 수 있는 수만큼만 통과시키고 나머지는 다음 처리로 넘긴다.
+        """
+        kiwoom = self.kiwoom
+        if self.trading_hours is not None:
+            now = kiwoom.market_now().time()
+            if not self.trading_hours[0] <= now < self.trading_hours[1]:
+                for signal in batch:
+                    self._drop(signal, SKIP_MARKET_CLOSED)
+                return []
+
+        now = kiwoom.clock()
+        if self.max_signal_age is not None:
+            fresh = []
+            for signal in batch:
+                if now - signal.received_at > self.max_signal_age:
+                    self._drop(signal, SKIP_STALE)
+                else:
+                    fresh.append(signal)
+            batch = fresh
+
+        account = self.get_account()
+        if not account:
+            for signal in batch:
+                self._drop(signal, SKIP_NO_ACCOUNT)
+            return []
+
+        # 중복: 보유 종목 / 미완료 주문 / 당일 매수 종목
+        orders = kiwoom.orders
+        held = kiwoom.order_map.keys()
+        survivors = []
+        for signal in batch:
+            code = signal.code
+            if code in held or orders.has_open(code) or orders.has_traded(code, SIDE_BUY):
+                self._drop(signal, SKIP_DUPLICATE)
+            else:
+                survivors.append(signal)
+
+        # 조건식별 예산 / 남은 보유 가능 종목 수 (조건식마다 한 번 계산)
+        budgets = {}
+        capacity = {}
+        is_active = kiwoom.is_position_active
+        for strategy in {signal.strategy for signal in survivors}:
+            budgets[strategy] = self.get_budget(strategy)
+            if strategy.max_positions is None:
+                capacity[strategy] = len(survivors)
+            else:
+                capacity[strategy] = strategy.max_positions - strategy.open_positions(is_active)
+
+        ready = []
+        for signal in sorted(survivors, key=EntrySignal.sort_key):
+            strategy = signal.strategy
+            if budgets[strategy] is None:
+                self._drop(signal, SKIP_NO_BUDGET)
+            elif capacity[strategy] <= 0:
+                if strategy.max_positions is not None and strategy.open_positions(is_active) >= strategy.max_positions:
+                    self._drop(signal, SKIP_MAX_POSITIONS)
+                # 배치 안에서 자리가 찼으면 앞선 주문 결과를 보고 다음 처리에서 다시 판단
+            else:
+                capacity[strategy] -= 1
+                signal.filtered_at = now  # 주문 전송기가 밀려 이번에 주문하지 못하면 다음 처리에서 다시 기록
+                ready.append(signal)
+        return ready
+
+    def _place(self, signal):
+        """필터를 통과한 종목 시장가 매수"""
+        kiwoom = self.kiwoom
+        strategy = signal.strategy
+        code = signal.code
+        try:
+            price = kiwoom.get_current_price(code)
+            if price <= 0:
+                self._skip(signal, SKIP_NO_PRICE)
+                return None
+
+            budget = self.get_budget(strategy)
+            quantity = budget // price
+            if quantity < 1:
+                self._skip(signal, SKIP_LOW_BUDGET, f"현재가: {price:,}원, 예산: {budget:,}원")
+                return None
+
+            order = kiwoom.send_buy_order(
+                account=self.get_account(),
+                code=code,
+                quantity=quantity,
+                price=0,  # 시장가
+                order_type="03",  # 시장가
+                condition=strategy.name,
+                stamps={STAGE_SIGNAL: signal.received_at, STAGE_FILTERED: signal.filtered_at},
+            )
+            self._record(STAGE_DISPATCH, kiwoom.clock() - signal.filtered_at)
+            if order is None or not order.is_open:
+                self._skip(signal, SKIP_REJECTED)
+                return None
+
+            strategy.codes.add(code)
+            if strategy.loss_cutoff is not None or strategy.gain_cutoff is not None:
+                kiwoom.set_exit_thresholds(strategy.loss_cutoff, strategy.gain_cutoff, code=code)
+            self.ordered_count += 1
+            if self.on_result:
+                self.on_result(signal, order, "")
+            return order
+
+        except Exception as e:
+            # 주문 실패는 order 상태(거부)로 전달되므로 여기서 잡히는 것은 처리 코드의 오류
+            if self.logger is None:
+                raise
+            self.logger.exception(f"[매수 처리 오류] {code}")
+            self._skip(signal, SKIP_ERROR, str(e))
+            return None
+
+    def _drop(self, signal, reason):
+        self.pending.pop(signal.code, None)
+        self._skip(signal, reason)
+
+    def _skip(self, signal, reason, detail=""):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+        if signal is not None and self.on_result:
+            self.on_result(signal, None, f"{reason} ({detail})" if detail else reason)
+
+    def _record(self, stage, elapsed):
+        entry = self.stage_latency[stage]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+    # ------------------------------------------------------------------
+    # 지표
+    # ------------------------------------------------------------------
+    def stats(self):
+        result = {
+            "depth": len(self.pending),
+            "max_depth": self.max_depth,
+            "received": self.received_count,
+            "coalesced": self.coalesced_count,
+            "ordered": self.ordered_count,
+            "ticks": self.tick_count,
+        }
+        for stage, (count, total, maximum) in self.stage_latency.items():
+            result[f"{stage}_avg_ms"] = total / count * 1000 if count else 0.0
+            result[f"{stage}_max_ms"] = maximum * 1000
+        for reason, count in self.skipped.items():
+            result[f"skip:{reason}"] = count
+        return result
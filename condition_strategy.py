@@ -0,0 +1,100 @@
+"""
+조건식별 매매 설정
+
+config.json 예시
+    "conditions": [
+        {"name": "급등주", "budget_per_stock": 500000, "max_positions": 5,
+         "LOSS_CUTOFF": -4.0, "GAIN_CUTOFF": 8.0, "priority": 0},
+        {"name": "눌림목", "budget_per_stock": 300000, "max_positions": 10}
+    ]
+
+값을 생략한 항목은 전역 설정(BUDGET_PER_STOCK, LOSS_CUTOFF, GAIN_CUTOFF)을 따른다.
+priority 는 여러 조건식의 편입 종목이 동시에 대기 중일 때 주문 순서 (작을수록 먼저, 기본값 0)
+"""
+
+
+class ConditionStrategy:
+    def __init__(self, name, budget_per_stock=None, max_positions=None, loss_cutoff=None, gain_cutoff=None,
+                 priority=0):
+        """
+        Args:
+            name (str): 조건식 이름
+            budget_per_stock (int): 종목당 투자금액 (None 이면 전역 설정)
+            max_positions (int): 동시 보유 최대 종목 수 (None 이면 제한 없음)
+            loss_cutoff (float): 손절 기준 수익률(%) (None 이면 전역 설정)
+            gain_cutoff (float): 익절 기준 수익률(%) (None 이면 전역 설정)
+            priority (int): 매수 주문 순서 (작을수록 먼저)
+        """
+        self.name = name
+        self.index = None  # 조건식 인덱스 (조건식 리스트 수신 후 설정)
+        self.budget_per_stock = budget_per_stock
+        self.max_positions = max_positions
+        self.loss_cutoff = loss_cutoff
+        self.gain_cutoff = gain_cutoff
+        self.priority = priority
+        self.codes = set()  # 이 조건식으로 매수한 종목
+
+    @classmethod
+    def from_config(cls, item):
+        """config.json 의 conditions 항목으로 생성 (잘못된 값은 ValueError)"""
+        def optional(key, cast):
+            value = item.get(key)
+            return None if value is None else cast(value)
+
+        return cls(
+            name=item["name"],
+            budget_per_stock=optional("budget_per_stock", int),
+            max_positions=optional("max_positions", int),
+            loss_cutoff=optional("LOSS_CUTOFF", float),
+            gain_cutoff=optional("GAIN_CUTOFF", float),
+            priority=optional("priority", int) or 0,
+        )
+
+    def to_config(self):
+        item = {"name": self.name}
+        if self.budget_per_stock is not None:
+            item["budget_per_stock"] = self.budget_per_stock
+        if self.max_positions is not None:
+            item["max_positions"] = self.max_positions
+        if self.loss_cutoff is not None:
+            item["LOSS_CUTOFF"] = self.loss_cutoff
+        if self.gain_cutoff is not None:
+            item["GAIN_CUTOFF"] = self.gain_cutoff
+        if self.priority:
+            item["priority"] = self.priority
+        return item
+
+    def open_positions(self, is_active):
+        """
+        보유 중이거나 매수 주문 중인 종목 수
+        Args:
+            is_active (callable): 종목코드 -> 보유/주문 중 여부
+        """
+        for code in [code for code in self.codes if not is_active(code)]:
+            self.codes.discard(code)
+        return len(self.codes)
+
+    def has_capacity(self, is_active):
+        return self.max_positions is None or self.open_positions(is_active) < self.max_positions
+
+    def __repr__(self):
+        return f"ConditionStrategy({self.name}, index={self.index})"
+
+
+def load_strategies(config):
+    """
+    config 의 conditions 항목으로 조건식별 설정 생성
+    conditions 가 없으면 기존 condition(단일 조건식) 항목을 사용한다.
+    Returns:
+        dict: 조건식 이름 -> ConditionStrategy
+    """
+    items = config.get('conditions')
+    if items is None:
+        saved_condition = config.get('condition', '')
+        items = [{"name": saved_condition}] if saved_condition else []
+
+    strategies = {}
+    for item in items:
+        strategy = ConditionStrategy.from_config(item)
+        strategies[strategy.name] = strategy
+    return strategies
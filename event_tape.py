@@ -0,0 +1,347 @@
+"""
+OpenAPI 이벤트 테이프 (녹화/재생)
+
+녹화: RecordingBackend 가 실제 백엔드(OCX/시뮬레이터)를 감싸서 모든 OpenAPI 이벤트(On...)와
+      dynamicCall 호출/결과를 테이프 파일에 순서대로 기록한다.
+재생: ReplayBackend 가 같은 인터페이스로 테이프의 이벤트를 다시 발생시키고, 핸들러가 호출하는
+      dynamicCall(GetChejanData, GetCommData 등)에는 녹화 당시 결과를 돌려준다.
+      KiwoomAPI 는 백엔드만 바꾸면 되므로 같은 핸들러로 장중 상황을 재현할 수 있다.
+
+파일 형식 (추가 기록 전용)
+    MAGIC
+    레코드: [길이 u32][종류 u8][시각 f64] + marshal(payload)
+        META  : {"version", "market_start"}     테이프 시작 정보
+        EVENT : (이벤트 이름, 인자)
+        CALL  : (signature, 인자, 결과)
+    시각은 녹화 시작 후 경과 초 (실계좌는 time.monotonic, 시뮬레이터는 가상 시계)
+
+    python main.py --record tapes/today.tape
+    python main.py --backend replay --tape tapes/today.tape --speed 1
+    python sample/replay_tape.py tapes/today.tape
+"""
+import heapq
+import marshal
+import os
+import struct
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from functools import partial
+
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer
+
+TAPE_MAGIC = b"KWTAPE\x01\n"
+TAPE_VERSION = 1
+RECORD_HEADER = struct.Struct("<IBd")  # 길이, 종류, 시각
+MARSHAL_VERSION = 4
+
+KIND_META = 0
+KIND_EVENT = 1
+KIND_CALL = 2
+
+# 녹화하는 이벤트 (kiwoom_backend 인터페이스)
+TAPE_EVENTS = (
+    "OnEventConnect",
+    "OnReceiveTrData",
+    "OnReceiveConditionVer",
+    "OnReceiveTrCondition",
+    "OnReceiveRealCondition",
+    "OnReceiveChejanData",
+    "OnReceiveRealData",
+    "OnReceiveMsg",
+)
+
+# 재생 중 녹화된 결과가 없는 요청/주문 호출의 기본 결과 (성공)
+REPLAY_DEFAULTS = {
+    "CommConnect": 0,
+    "CommRqData": 0,
+    "SendOrder": 0,
+    "SendCondition": 1,
+    "GetConditionLoad": 1,
+    "SetRealReg": 0,
+}
+
+TAPE_FLUSH_INTERVAL = 1.0  # 버퍼를 파일에 내보내는 간격(초)
+
+
+def _call_args(args):
+    """dynamicCall(signature, [a, b]) 과 dynamicCall(signature, a, b) 를 같은 인자로 취급"""
+    if len(args) == 1 and isinstance(args[0], (list, tuple)):
+        return tuple(args[0])
+    return args
+
+
+class TapeWriter:
+    def __init__(self, path, market_start=None):
+        """
+        Args:
+            path (str): 테이프 파일 경로 (이미 있으면 FileExistsError)
+            market_start (datetime): 녹화 시작 시각 (재생 시 장 운영시간 판단용)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        try:
+            self.file = open(path, "xb", buffering=1 << 16)
+        except FileExistsError:
+            # 이어서 기록하면 META 이후 시각이 다시 0 부터 시작해 재생 순서가 뒤섞임
+            raise FileExistsError(f"이미 있는 테이프에는 이어서 녹화할 수 없습니다: {path}") from None
+        self.file.write(TAPE_MAGIC)
+        self.count = 0
+        self._last_flush = 0.0
+        self.write(KIND_META, 0.0, {
+            "version": TAPE_VERSION,
+            "market_start": (market_start or datetime.now()).isoformat(),
+        })
+
+    def write(self, kind, ts, payload):
+        data = marshal.dumps(payload, MARSHAL_VERSION)
+        self.file.write(RECORD_HEADER.pack(len(data), kind, ts))
+        self.file.write(data)
+        self.count += 1
+        if ts - self._last_flush >= TAPE_FLUSH_INTERVAL:
+            self._last_flush = ts
+            self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def read_tape(path):
+    """
+    테이프 레코드 읽기 (마지막 레코드가 잘려 있으면 거기서 멈춤)
+    Yields:
+        (종류, 시각, payload)
+    """
+    with open(path, "rb") as file:
+        if file.read(len(TAPE_MAGIC)) != TAPE_MAGIC:
+            raise ValueError(f"이벤트 테이프 파일이 아닙니다: {path}")
+        header_size = RECORD_HEADER.size
+        while True:
+            header = file.read(header_size)
+            if len(header) < header_size:
+                return
+            length, kind, ts = RECORD_HEADER.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield kind, ts, marshal.loads(data)
+
+
+class RecordingBackend(QObject):
+    """백엔드를 감싸서 이벤트/dynamicCall 을 테이프에 기록 (나머지 속성은 원래 백엔드로 전달)"""
+    OnEventConnect = pyqtSignal(int)
+    OnReceiveTrData = pyqtSignal(str, str, str, str, str, int, str, str, str)
+    OnReceiveConditionVer = pyqtSignal(int, str)
+    OnReceiveTrCondition = pyqtSignal(str, str, str, int, int)
+    OnReceiveRealCondition = pyqtSignal(str, str, str, str)
+    OnReceiveChejanData = pyqtSignal(str, int, str)
+    OnReceiveRealData = pyqtSignal(str, str, str)
+    OnReceiveMsg = pyqtSignal(str, str, str, str)
+
+    def __init__(self, backend, path):
+        super().__init__()
+        self._backend = backend
+        self._clock = getattr(backend, "now", time.monotonic)
+        self._start = self._clock()
+        market_now = getattr(backend, "market_now", datetime.now)
+        self.writer = TapeWriter(path, market_start=market_now())
+
+        for name in TAPE_EVENTS:
+            signal = getattr(backend, name, None)
+            if signal is not None:
+                signal.connect(partial(self._on_event, name))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._backend, name)
+
+    def _on_event(self, name, *args):
+        self.writer.write(KIND_EVENT, self._clock() - self._start, (name, args))
+        getattr(self, name).emit(*args)
+
+    def dynamicCall(self, signature, *args):
+        result = self._backend.dynamicCall(signature, *args)
+        try:
+            self.writer.write(KIND_CALL, self._clock() - self._start, (signature, _call_args(args), result))
+        except ValueError:
+            # marshal 로 기록할 수 없는 결과는 문자열로 기록
+            self.writer.write(KIND_CALL, self._clock() - self._start, (signature, _call_args(args), str(result)))
+        return result
+
+    def close(self):
+        """테이프 저장 (종료 시 호출)"""
+        self.writer.close()
+
+
+class ReplayBackend(QObject):
+    """
+    테이프 재생 백엔드
+    - speed=None : run()/run_until() 호출 시 최대 속도로 재생 (회귀 테스트/벤치마크용)
+    - speed>0    : QTimer 로 녹화 시각 / speed 에 맞춰 재생
+
+    이벤트 k 를 발생시키면 녹화 당시 이벤트 k 와 k+1 사이에 있었던 dynamicCall 결과를 같은 호출에 돌려준다.
+    그 구간에 없는 호출은 마지막으로 돌려준 같은 호출의 결과, 그것도 없으면 REPLAY_DEFAULTS/"" 를 돌려주고
+    stats() 의 fallback/missed 로 집계한다.
+    """
+    OnEventConnect = pyqtSignal(int)
+    OnReceiveTrData = pyqtSignal(str, str, str, str, str, int, str, str, str)
+    OnReceiveConditionVer = pyqtSignal(int, str)
+    OnReceiveTrCondition = pyqtSignal(str, str, str, int, int)
+    OnReceiveRealCondition = pyqtSignal(str, str, str, str)
+    OnReceiveChejanData = pyqtSignal(str, int, str)
+    OnReceiveRealData = pyqtSignal(str, str, str)
+    OnReceiveMsg = pyqtSignal(str, str, str, str)
+    replay_finished = pyqtSignal()
+
+    def __init__(self, path, speed=None):
+        """
+        Args:
+            path (str): 테이프 파일 경로
+            speed (float): 재생 배속 (None 이면 최대 속도, run() 으로 재생)
+        """
+        super().__init__()
+        self.path = path
+        self._records = read_tape(path)
+        self._now = 0.0
+        self._queue = []  # (시각, 순번, func, args) 예약 작업
+        self._seq = 0
+        self.market_start = datetime.now()
+
+        self._last = {}  # (signature, 인자) -> 마지막으로 돌려준 결과
+        self.call_counts = Counter()
+        self.event_count = 0
+        self.matched = 0
+        self.fallback = 0
+        self.missed = 0
+        self.unused = 0
+
+        # 첫 이벤트 전까지의 호출(로그인 요청 등)
+        self._peek = None
+        _, self._frame = self._read_event()
+        self._event, self._event_frame = self._read_event()
+        self._finished = False
+
+        self.speed = speed
+        if speed:
+            self._wall_start = time.monotonic()
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self._pump)
+            self._timer.start(1)
+
+    # ------------------------------------------------------------------
+    # 테이프 읽기
+    # ------------------------------------------------------------------
+    def _read_event(self):
+        """
+        다음 이벤트와 그 이벤트 이후(다음 이벤트 전까지) 녹화된 호출 결과
+        Returns:
+            ((시각, 이름, 인자) 또는 None, {(signature, 인자): deque(결과)})
+        """
+        event = self._peek
+        self._peek = None
+        frame = {}
+        for kind, ts, payload in self._records:
+            if kind == KIND_EVENT:
+                self._peek = (ts, payload[0], tuple(payload[1]))
+                break
+            if kind == KIND_CALL:
+                signature, args, result = payload
+                frame.setdefault((signature, tuple(args)), deque()).append(result)
+            elif kind == KIND_META:
+                self.market_start = datetime.fromisoformat(payload["market_start"])
+        return event, frame
+
+    # ------------------------------------------------------------------
+    # 가상 시계 (kiwoom_simulator 와 같은 인터페이스)
+    # ------------------------------------------------------------------
+    def now(self):
+        return self._now
+
+    def market_now(self):
+        return self.market_start + timedelta(seconds=self._now)
+
+    def schedule(self, delay, func, *args):
+        self._seq += 1
+        heapq.heappush(self._queue, (self._now + delay, self._seq, func, args))
+
+    def run_until(self, t):
+        """녹화 시각 t 까지의 이벤트와 예약 작업을 시각 순서대로 실행"""
+        queue = self._queue
+        while True:
+            timer_due = queue[0][0] if queue else float("inf")
+            event_due = self._event[0] if self._event else float("inf")
+            due = min(timer_due, event_due)
+            if due > t:
+                break
+            if timer_due <= event_due:
+                _, _, func, args = heapq.heappop(queue)
+                self._now = max(self._now, due)
+                func(*args)
+            else:
+                self._now = max(self._now, due)
+                self._emit_next()
+        if t > self._now and t != float("inf"):
+            self._now = t
+
+    def run(self, drain=0.0):
+        """남은 테이프를 최대 속도로 재생하고, 마지막 이벤트 후 drain 초 동안 예약 작업 실행"""
+        while self._event is not None:
+            self.run_until(self._event[0])
+        self.run_until(self._now + drain)
+
+    def _pump(self):
+        self.run_until((time.monotonic() - self._wall_start) * self.speed)
+        if self._event is None and not self._queue:
+            self._timer.stop()
+
+    def _emit_next(self):
+        _, name, args = self._event
+        self.unused += sum(len(results) for results in self._frame.values())
+        self._frame = self._event_frame
+        self._event, self._event_frame = self._read_event()
+        self.event_count += 1
+        getattr(self, name).emit(*args)
+        if self._event is None and not self._finished:
+            self._finished = True
+            self.replay_finished.emit()
+
+    @property
+    def finished(self):
+        return self._event is None
+
+    # ------------------------------------------------------------------
+    # dynamicCall
+    # ------------------------------------------------------------------
+    def dynamicCall(self, signature, *args):
+        args = _call_args(args)
+        name = signature.split("(", 1)[0]
+        self.call_counts[name] += 1
+        key = (signature, args)
+        results = self._frame.get(key)
+        if results:
+            result = results.popleft()
+            self.matched += 1
+        elif key in self._last:
+            result = self._last[key]
+            self.fallback += 1
+        else:
+            result = REPLAY_DEFAULTS.get(name, "")
+            self.missed += 1
+        self._last[key] = result
+        return result
+
+    def stats(self):
+        """재생 지표: 이벤트 수, 녹화 결과 일치/대체/없음, 재생 중 호출되지 않은 녹화 호출 수"""
+        return {
+            "events": self.event_count,
+            "calls": sum(self.call_counts.values()),
+            "matched": self.matched,
+            "fallback": self.fallback,
+            "missed": self.missed,
+            "unused": self.unused + sum(len(results) for results in self._frame.values()),
+            "time": self._now,
+        }
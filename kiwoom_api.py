@@ -1,40 +1,594 @@
+import numpy as np
 import pandas as pd
+import time
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime
 
-from PyQt5.QAxContainer import QAxWidget
 from PyQt5.QtCore import pyqtSignal, QObject, QTimer
-from trade_logger import TradeLogger_Sqlite3
+from kiwoom_backend import create_backend, TR_MULTI_FIELDS
+from screen_pool import ScreenPool
+from stock_master import StockMaster
+from order_book import OrderBook, SIDE_BUY, SIDE_SELL, ORDER_CANCELLED, ORDER_REJECTED
+from position_book import PositionBook, profit_rate
+from trade_logger import TradeJournal
+from latency import LatencyTracker, STAGE_SIGNAL, STAGE_QUEUED, STAGE_SENT, STAGE_ACCEPTED, STAGE_FILLED
 from log_manager import LogManager
+from bar_data import Bars
+
+# opw00018 계좌 요약 (싱글데이터) 필드
+OPW00018_SUMMARY_FIELDS = ("총자산평가금액", "총평가손익금액", "총수익률(%)")
+
+# 잔고 항목 키 -> opw00018 멀티데이터 필드
+OPW00018_BALANCE_FIELDS = {
+    "종목코드": "종목번호",
+    "종목명": "종목명",
+    "보유수량": "보유수량",
+    "매입가": "매입가",
+    "현재가": "현재가",
+    "평가금액": "평가금액",
+    "손익률": "수익률(%)",
+}
+
+
+# TR 요청 우선순위 (숫자가 작을수록 먼저 전송)
+PRIORITY_ORDER = 0    # 주문 판단에 필요한 조회 (손절/익절 점검 등)
+PRIORITY_BALANCE = 1  # 주기적 잔고 보정
+PRIORITY_UI = 2       # 화면 갱신
+PRIORITY_HISTORY = 3  # 과거 데이터 수집 (다른 조회가 없을 때만 전송)
+
+# OpenAPI 조회 제한: 초당 5회, 시간당 1000회 (여유를 두고 설정)
+TR_RATE_PER_SECOND = 4.8
+TR_BURST_PER_HOUR = 100
+TR_RATE_PER_HOUR = 900 / 3600
+TR_RESPONSE_TIMEOUT = 10.0  # 초
+
+OP_ERR_SISE_OVERFLOW = -200  # 시세조회 과부하
+
+# 차트 TR (최신 봉부터 한 페이지씩, 연속조회로 과거 방향)
+CHART_MINUTE = "opt10080"  # 주식분봉차트조회요청 (페이지당 900봉)
+CHART_DAILY = "opt10081"   # 주식일봉차트조회요청 (페이지당 600봉)
+CHART_RQ_NAMES = {CHART_MINUTE: "주식분봉차트조회", CHART_DAILY: "주식일봉차트조회"}
+CHART_TIME_FIELDS = {CHART_MINUTE: ("체결시간", "%Y%m%d%H%M%S"), CHART_DAILY: ("일자", "%Y%m%d")}
+CHART_VALUE_FIELDS = ("시가", "고가", "저가", "현재가", "거래량")
+
+# OpenAPI 주문 제한: 초당 5회 (여유를 두고 설정)
+ORDER_RATE_PER_SECOND = 4.8
+ORDER_MAX_RETRIES = 5  # 주문전송 과부하(-308) 재시도 횟수
+
+# 주문 우선순위 (숫자가 작을수록 먼저 전송)
+ORDER_PRIORITY_EXIT = 0   # 매도 (손절/익절/수동 매도)
+ORDER_PRIORITY_ENTRY = 1  # 매수
+
+OP_ERR_ORD_OVERFLOW = -308  # 주문전송 과부하
+
+# SendOrder 반환값
+ORDER_ERROR_MESSAGES = {
+    -300: "입력 값 오류",
+    -301: "계좌 비밀번호 없음",
+    -302: "타인계좌 사용 오류",
+    -303: "주문가격이 20억원을 초과",
+    -304: "주문가격이 50억원을 초과",
+    -305: "주문수량이 총발행주수의 1% 초과",
+    -306: "주문수량이 총발행주수의 3% 초과",
+    -307: "주문전송 실패",
+    -308: "주문전송 과부하",
+    -309: "주문수량 300계약 초과",
+    -310: "주문수량 500계약 초과",
+    -340: "계좌정보 없음",
+    -500: "종목코드 없음",
+}
+
+ORDER_ACK_TIMEOUT = 30.0  # 주문번호 미수신 주문을 거부로 처리하는 시간(초)
+
+# SendCondition 조회구분
+CONDITION_SEARCH_REALTIME = 1  # 검색 후 실시간 감시
+CONDITION_SEARCH_NEXT = 2      # 초기 결과 연속조회
+
+
+class TrRequestError(Exception):
+    """CommRqData 실패 또는 응답 시간 초과"""
+    def __init__(self, code, message=""):
+        super().__init__(message or f"TR 요청 실패 (에러 코드: {code})")
+        self.code = code
+
+
+class TokenBucket:
+    """토큰 버킷: 초당 rate 개씩 채워지고 최대 capacity 개까지 쌓인다."""
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """토큰이 있으면 하나 소비하고 True"""
+        self._refill()
+        if self.tokens >= 1 - 1e-9:  # 부동소수점 오차 허용
+            self.tokens = max(0.0, self.tokens - 1)
+            return True
+        return False
+
+    def wait_time(self):
+        """다음 토큰까지 남은 시간(초)"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 - 1e-9 else (1 - self.tokens) / self.rate
+
+
+class TrRequest:
+    def __init__(self, rq_name, tr_code, inputs, screen_no, prev_next, priority, key):
+        self.rq_name = rq_name
+        self.tr_code = tr_code
+        self.inputs = inputs
+        self.screen_no = screen_no
+        self.prev_next = prev_next
+        self.priority = priority
+        self.key = key
+        self.future = Future()
+        self.sent_at = None
+        self.leased_screen = False
+        self.pages = []  # 연속조회로 지금까지 받은 데이터 (요청이 끝나면 함께 버려짐)
+
+
+class TrScheduler:
+    """
+    TR 조회 스케줄러
+    - 토큰 버킷으로 초당/시간당 조회 제한 이하로 CommRqData 전송
+    - 우선순위 대기열 (PRIORITY_ORDER > PRIORITY_BALANCE > PRIORITY_UI > PRIORITY_HISTORY)
+    - 같은 key 의 대기 중인 요청은 하나로 합치고, 같은 key 는 동시에 하나만 전송
+    - 요청마다 Future 를 반환하며 응답 수신 시 complete() 로 결과 전달
+    """
+    def __init__(self, kiwoom, screens, clock=time.monotonic, call_later=None, logger=None):
+        """
+        Args:
+            kiwoom: OpenAPI 백엔드
+            screens (ScreenPool): 화면번호를 지정하지 않은 요청에 사용할 화면번호 풀
+            clock: 현재 시각(초) 함수
+            call_later: call_later(delay, func) 지연 실행 함수 (기본값: QTimer.singleShot)
+        """
+        self.kiwoom = kiwoom
+        self.screens = screens
+        self.clock = clock
+        self.call_later = call_later or (lambda delay, func: QTimer.singleShot(int(delay * 1000), func))
+        self.logger = logger
+        self.buckets = [
+            TokenBucket(TR_RATE_PER_SECOND, 1, clock),
+            TokenBucket(TR_RATE_PER_HOUR, TR_BURST_PER_HOUR, clock),
+        ]
+        self.lanes = [deque() for _ in (PRIORITY_ORDER, PRIORITY_BALANCE, PRIORITY_UI, PRIORITY_HISTORY)]
+        self.pending = {}    # key -> 대기 중인 TrRequest
+        self.in_flight = {}  # (화면번호, 요청명) -> 전송된 TrRequest
+        self.sent_count = 0
+        self.coalesced_count = 0
+        self._wakeup_scheduled = False
+
+    def submit(self, rq_name, tr_code, inputs, screen_no=None, prev_next=0, priority=PRIORITY_UI, key=None):
+        """
+        TR 요청 등록
+        Args:
+            rq_name (str): 사용자 요청명
+            tr_code (str): TR 코드
+            inputs (dict): SetInputValue 항목
+            screen_no (str): 화면번호 (None 이면 전송 시 화면번호 풀에서 할당하고 완료 시 반납)
+            prev_next (int): 0 조회, 2 연속조회
+            priority (int): PRIORITY_*
+            key: 중복 판단 키 (기본값: (tr_code, prev_next, inputs))
+        Returns:
+            Future: 응답 처리 결과
+        """
+        if key is None:
+            key = (tr_code, prev_next, tuple(sorted(inputs.items())))
+
+        request = self.pending.get(key)
+        if request is not None:
+            self.coalesced_count += 1
+            if priority < request.priority:
+                self.lanes[request.priority].remove(request)
+                request.priority = priority
+                self.lanes[priority].append(request)
+                self._pump()
+            return request.future
+
+        request = TrRequest(rq_name, tr_code, inputs, screen_no, prev_next, priority, key)
+        self.pending[key] = request
+        self.lanes[priority].append(request)
+        self._pump()
+        return request.future
+
+    def complete(self, screen_no, rq_name, result):
+        """OnReceiveTrData 처리 결과를 해당 요청의 Future 에 전달"""
+        request = self.in_flight.pop((screen_no, rq_name), None)
+        if request is not None:
+            self._release_screen(request)
+            if not request.future.done():
+                request.future.set_result(result)
+        self._pump()
+
+    def continue_request(self, screen_no, rq_name):
+        """
+        연속조회(prev_next=2) 요청 등록
+        다음 페이지는 같은 화면번호/요청명으로 이어서 받아야 하므로, 마지막 페이지까지 해당 슬롯을 점유하고
+        대기열 맨 앞에서 조회 제한에 맞춰 전송한다. Future 는 마지막 페이지 complete() 시 완료된다.
+        """
+        slot = (screen_no, rq_name)
+        request = self.in_flight.get(slot)
+        if request is None:
+            return
+
+        next_request = TrRequest(request.rq_name, request.tr_code, request.inputs, request.screen_no,
+                                 2, request.priority, (request.key, "연속조회"))
+        next_request.future = request.future
+        next_request.leased_screen = request.leased_screen
+        next_request.pages = request.pages
+        next_request.sent_at = self.clock()
+        self.in_flight[slot] = next_request
+        self.pending[next_request.key] = next_request
+        self.lanes[next_request.priority].appendleft(next_request)
+        self.call_later(TR_RESPONSE_TIMEOUT, self._pump)  # 다음 페이지가 오지 않으면 만료
+        self._pump()
+
+    def pages(self, screen_no, rq_name):
+        """전송 중인 요청이 연속조회로 받은 데이터 목록 (만료/실패한 요청의 늦은 응답이면 None)"""
+        request = self.in_flight.get((screen_no, rq_name))
+        return request.pages if request is not None else None
+
+    def queue_depth(self):
+        return len(self.pending)
+
+    def _next_request(self):
+        busy_keys = {request.key for request in self.in_flight.values()}
+        for lane in self.lanes:
+            for request in lane:
+                # 연속조회 중인 슬롯은 해당 연속조회 요청만 전송 가능
+                holder = self.in_flight.get((request.screen_no, request.rq_name))
+                if holder is request:
+                    return request
+                if holder is not None or request.key in busy_keys:
+                    continue
+                return request
+        return None
+
+    def _pump(self):
+        self._expire_in_flight()
+        while True:
+            request = self._next_request()
+            if request is None:
+                break
+
+            wait = max(bucket.wait_time() for bucket in self.buckets)
+            if wait > 0:
+                self._wake_after(wait)
+                break
+            for bucket in self.buckets:
+                bucket.try_acquire()
+
+            self.lanes[request.priority].remove(request)
+            del self.pending[request.key]
+            self._send(request)
+
+    def _send(self, request):
+        if request.screen_no is None:
+            request.screen_no = self.screens.lease(f"TR {request.rq_name}")
+            if request.screen_no is None:
+                self.pending[request.key] = request
+                self.lanes[request.priority].appendleft(request)
+                self._wake_after(1.0)
+                return
+            request.leased_screen = True
+
+        for name, value in request.inputs.items():
+            self.kiwoom.dynamicCall("SetInputValue(QString, QString)", name, value)
+        ret = self.kiwoom.dynamicCall("CommRqData(QString, QString, int, QString)",
+                                      request.rq_name, request.tr_code, request.prev_next, request.screen_no)
+        self.sent_count += 1
+
+        slot = (request.screen_no, request.rq_name)
+        continuing = self.in_flight.get(slot) is request  # 연속조회: 슬롯을 이미 점유 중
+        if ret == OP_ERR_SISE_OVERFLOW:
+            # 서버 측 과부하 판정: 대기열 맨 앞으로 되돌리고 1초 후 재시도
+            # 연속조회는 같은 화면번호로 이어서 받아야 하므로 화면/슬롯을 유지한 채 그대로 재전송
+            if self.logger:
+                self.logger.warning(f"[TR 과부하] {request.rq_name} 재시도 대기")
+            if not continuing:
+                self._release_screen(request)
+            self.pending[request.key] = request
+            self.lanes[request.priority].appendleft(request)
+            self._wake_after(1.0)
+        elif ret != 0:
+            if continuing:
+                del self.in_flight[slot]
+            self._release_screen(request)
+            request.future.set_exception(TrRequestError(ret))
+        else:
+            request.sent_at = self.clock()
+            self.in_flight[slot] = request
+            self.call_later(TR_RESPONSE_TIMEOUT, self._pump)
+
+    def _expire_in_flight(self):
+        now = self.clock()
+        for slot, request in list(self.in_flight.items()):
+            if now - request.sent_at >= TR_RESPONSE_TIMEOUT:
+                del self.in_flight[slot]
+                if self.pending.get(request.key) is request:
+                    del self.pending[request.key]
+                    self.lanes[request.priority].remove(request)
+                self._release_screen(request)
+                if not request.future.done():
+                    request.future.set_exception(TrRequestError(0, f"TR 응답 시간 초과: {request.rq_name}"))
+
+    def _release_screen(self, request):
+        if request.leased_screen:
+            self.screens.release(request.screen_no)
+            request.leased_screen = False
+            request.screen_no = None
+
+    def _wake_after(self, delay):
+        if self._wakeup_scheduled:
+            return
+        self._wakeup_scheduled = True
+        self.call_later(delay, self._wakeup)
+
+    def _wakeup(self):
+        self._wakeup_scheduled = False
+        self._pump()
+
+
+class OrderDispatcher:
+    """
+    주문 전송기
+    - 토큰 버킷으로 초당 주문 제한 이하로 SendOrder 전송
+    - 우선순위 대기열 (ORDER_PRIORITY_EXIT > ORDER_PRIORITY_ENTRY): 손절/익절 매도가 매수보다 먼저 전송
+    - 같은 (종목코드, 매수/매도) 의 대기 주문은 하나만 유지
+    - 주문전송 과부하(-308)는 대기열 맨 앞으로 되돌려 재시도, 그 외 오류는 거부 처리
+    - 대기열 길이/대기 시간 등 지표 제공 (stats())
+    """
+    def __init__(self, kiwoom, orders, screens, clock=time.monotonic, call_later=None, on_update=None,
+                 rate=ORDER_RATE_PER_SECOND, max_retries=ORDER_MAX_RETRIES, logger=None):
+        """
+        Args:
+            kiwoom: OpenAPI 백엔드
+            orders (OrderBook): 주문 관리
+            screens (ScreenPool): 주문 화면번호 풀
+            clock: 현재 시각(초) 함수
+            call_later: call_later(delay, func) 지연 실행 함수 (기본값: QTimer.singleShot)
+            on_update: on_update(order, ret) 전송(ret=0) 또는 거부(ret=오류 코드) 시 호출
+        """
+        self.kiwoom = kiwoom
+        self.orders = orders
+        self.screens = screens
+        self.clock = clock
+        self.call_later = call_later or (lambda delay, func: QTimer.singleShot(int(delay * 1000), func))
+        self.on_update = on_update
+        self.max_retries = max_retries
+        self.logger = logger
+        self.bucket = TokenBucket(rate, 1, clock)
+        self.lanes = [deque() for _ in (ORDER_PRIORITY_EXIT, ORDER_PRIORITY_ENTRY)]
+        self.queued = {}    # (종목코드, 매수/매도) -> 대기 중인 Order
+        self._enqueued_at = {}  # Order -> (대기 등록 시각, 우선순위, 재시도 횟수)
+        self._wakeup_scheduled = False
+
+        # 지표
+        self.sent_count = 0        # SendOrder 성공
+        self.rejected_count = 0    # SendOrder 오류로 거부
+        self.retry_count = 0       # 과부하(-308) 재시도
+        self.coalesced_count = 0   # 같은 종목 대기 주문으로 합쳐진 요청
+        self.max_depth = 0         # 최대 대기열 길이
+        self.total_wait = 0.0      # 대기 ~ 전송 시간 합계(초)
+        self.max_wait = 0.0        # 최대 대기 시간(초)
+
+    def submit(self, order, priority):
+        """
+        전송 대기 주문(ORDER_QUEUED) 등록
+        Returns:
+            Order: 등록한 주문 (같은 종목/구분의 대기 주문이 있으면 기존 주문)
+        """
+        key = (order.code, order.side)
+        existing = self.queued.get(key)
+        if existing is not None:
+            self.coalesced_count += 1
+            self.orders.reject(order)
+            return existing
+
+        self.queued[key] = order
+        self._enqueued_at[order] = [self.clock(), priority, 0]
+        self.lanes[priority].append(order)
+        self.max_depth = max(self.max_depth, self.depth())
+        self._pump()
+        return order
+
+    def cancel(self, order):
+        """전송 전 대기 주문 취소"""
+        if self.queued.get((order.code, order.side)) is not order:
+            return False
+        _, priority, _ = self._enqueued_at.pop(order)
+        self.lanes[priority].remove(order)
+        del self.queued[(order.code, order.side)]
+        self.orders.reject(order)
+        return True
+
+    def coalesce(self, code, side):
+        """같은 종목/구분의 대기 주문이 있으면 반환 (새 주문을 만들지 않고 합침)"""
+        order = self.queued.get((code, side))
+        if order is not None:
+            self.coalesced_count += 1
+        return order
+
+    def depth(self, priority=None):
+        """대기열 길이"""
+        if priority is None:
+            return len(self.queued)
+        return len(self.lanes[priority])
+
+    def wait_time(self):
+        """다음 주문을 전송할 수 있을 때까지 남은 시간(초)"""
+        return self.bucket.wait_time()
+
+    def stats(self):
+        """대기열/전송 지표"""
+        sent = max(self.sent_count, 1)
+        return {
+            "depth_exit": self.depth(ORDER_PRIORITY_EXIT),
+            "depth_entry": self.depth(ORDER_PRIORITY_ENTRY),
+            "max_depth": self.max_depth,
+            "sent": self.sent_count,
+            "rejected": self.rejected_count,
+            "retried": self.retry_count,
+            "coalesced": self.coalesced_count,
+            "avg_wait_ms": self.total_wait / sent * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def _pump(self):
+        while self.queued:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                self._wake_after(wait)
+                return
+            lane = self.lanes[0] or self.lanes[1]
+            order = lane[0]
+
+            screen_no = self.screens.lease(f"{order.side}주문")
+            if screen_no is None:
+                if self.logger:
+                    self.logger.error(f"[주문 대기] {order.code} 주문 화면번호 없음")
+                self._wake_after(1.0)
+                return
+
+            self.bucket.try_acquire()
+            #사용자 정의 요청명, 화면번호, 계좌번호, 주문유형코드(1매수,2매도), 종목코드, 주문수량, 주문가격(시장가0), 호가구분(시장가"03", 지정가"00"), 원주문번호
+            ret = self.kiwoom.dynamicCall(
+                "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
+                ["자동매수" if order.side == SIDE_BUY else "자동매도", screen_no, order.account,
+                 1 if order.side == SIDE_BUY else 2, order.code, order.quantity, order.price, order.order_type, ""]
+            )
+            entry = self._enqueued_at[order]
+
+            if ret == OP_ERR_ORD_OVERFLOW and entry[2] < self.max_retries:
+                # 서버 측 과부하 판정: 대기열 맨 앞에 둔 채 1초 후 재시도
+                entry[2] += 1
+                self.retry_count += 1
+                self.screens.release(screen_no)
+                if self.logger:
+                    self.logger.warning(f"[주문 과부하] {order.code} {order.side} 재시도 대기 ({entry[2]}/{self.max_retries})")
+                self._wake_after(1.0)
+                return
+
+            lane.popleft()
+            del self.queued[(order.code, order.side)]
+            del self._enqueued_at[order]
+            waited = self.clock() - entry[0]
+            if ret == 0:
+                order.screen_no = screen_no
+                order.stamps[STAGE_SENT] = self.clock()
+                self.orders.mark_sent(order)
+                self.sent_count += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+            else:
+                self.screens.release(screen_no)
+                self.orders.reject(order)
+                self.rejected_count += 1
+            if self.on_update:
+                self.on_update(order, ret)
+
+    def _wake_after(self, delay):
+        if self._wakeup_scheduled:
+            return
+        self._wakeup_scheduled = True
+        self.call_later(delay, self._wakeup)
+
+    def _wakeup(self):
+        self._wakeup_scheduled = False
+        self._pump()
+
+
+def _to_int(value):
+    """체결/잔고 FID 문자열을 정수로 변환 (빈 값은 0)"""
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
 
 class KiwoomAPI(QObject):
     login_event = pyqtSignal(bool)  # 로그인 완료 시그널
     balance_event = pyqtSignal(list)  # 잔고 조회 완료 시그널
-    condition_event = pyqtSignal(str, str, str)  # 실시간 조건식 결과 이벤트 (종목코드, 이벤트종류, 조건이름)
+    condition_event = pyqtSignal(str, str, str, int)  # 실시간 조건식 결과 이벤트 (종목코드, 이벤트종류, 조건이름, 조건식 인덱스)
     condition_list_event = pyqtSignal(list)
+    condition_initial_event = pyqtSignal(list, str, int)  # 조건검색 초기 결과 (종목코드 목록, 조건이름, 조건식 인덱스)
+    price_event = pyqtSignal(str, int)  # 실시간 체결가 (종목코드, 현재가)
+    exit_event = pyqtSignal(str, int, float, str)  # 손절/익절 조건 도달 (종목코드, 수량, 수익률, 사유)
+    trade_event = pyqtSignal(str, str, int, int)  # 체결 (매수체결/매도체결, 종목코드, 체결수량, 체결가)
+    order_event = pyqtSignal(str)  # 주문 상태 변경 (종목코드)
+    position_event = pyqtSignal(str)  # 보유 종목 수량/매입금액 변경 (종목코드, 체결 또는 잔고 보정)
 
-    logger = LogManager().get_logger()
+    logger = LogManager().get_logger("kiwoom_api")
 
-    def __init__(self):
+    def __init__(self, backend=None, db_path="trade_log.db", master_path="stock_master.json"):
+        """
+        Args:
+            backend: OpenAPI 백엔드 (None 이면 실제 키움 OCX 사용, kiwoom_backend 참고)
+            db_path (str): 매매 기록 DB 경로
+            master_path (str): 종목 마스터 캐시 파일 경로
+        """
         super().__init__()
-        self.kiwoom = QAxWidget("KHOPENAPI.KHOpenAPICtrl.1")
+        self.kiwoom = backend if backend is not None else create_backend()
+
+        # 시뮬레이터는 자체 가상 시계/타이머를 제공
+        self.clock = getattr(self.kiwoom, "now", time.monotonic)
+        self.market_now = getattr(self.kiwoom, "market_now", datetime.now)  # 장 운영시간 판단용 현재 시각
+        self.call_later = getattr(self.kiwoom, "schedule", None) or (
+            lambda delay, func: QTimer.singleShot(int(delay * 1000), func))
+        self.screens = ScreenPool(self.kiwoom, logger=self.logger)
+        self.tr_scheduler = TrScheduler(self.kiwoom, self.screens, clock=self.clock,
+                                        call_later=self.call_later, logger=self.logger)
         
+        self.master = StockMaster(self.kiwoom, path=master_path, logger=self.logger)  # 종목명/전일가 캐시
+
         self.account_num = ""
-        self.order_map = {} # 주문 번호 -> 주문 정보
-        self.active_conditions = {}  # 실행 중인 조건식 상태 추적
-        self.screen_number = 5000  # 화면번호 기본값
+        self.order_map = {} # 종목코드 -> 보유 종목 정보 (매입가, 수량, 매도 주문 여부)
+        self.orders = OrderBook(clock=self.clock)  # 주문번호 -> 주문 (미체결/부분체결 추적)
+        self.positions = PositionBook(clock=self.clock)  # 체결/실시간 체결가로 계산하는 보유 종목/손익 (원)
+        self.active_conditions = {}  # 실행 중인 조건식 이름 -> 화면번호
+
+        self.real_codes = set()  # 실시간 시세 등록 종목
+        self.last_prices = {}  # 종목코드 -> 최근 체결가
+        self.loss_cutoff = None  # 손절 기준 수익률(%)
+        self.gain_cutoff = None  # 익절 기준 수익률(%)
+        self.exit_overrides = {}  # 종목코드 -> (손절, 익절) 종목별 기준 (조건식별 설정)
+        self.code_conditions = {}  # 종목코드 -> 매수 신호를 낸 조건식 (매매 기록용)
+        self.exit_signal_at = {}  # 종목코드 -> 손절/익절 조건 도달 시각 (매도 주문 지연 측정용)
+        self.latency = LatencyTracker()  # 주문 단계별 지연 (p50/p95/p99)
+        self.dispatcher = OrderDispatcher(self.kiwoom, self.orders, self.screens, clock=self.clock,
+                                          call_later=self.call_later, on_update=self.on_order_dispatched,
+                                          logger=self.logger)  # 주문 제한/우선순위
 
         self.kiwoom.OnEventConnect.connect(self.on_login)
         self.kiwoom.OnReceiveTrData.connect(self.on_receive_tr_data)
         self.kiwoom.OnReceiveConditionVer.connect(self.on_receive_condition_ver)
+        self.kiwoom.OnReceiveTrCondition.connect(self.on_receive_tr_condition)
         self.kiwoom.OnReceiveRealCondition.connect(self.on_receive_real_condition)
         self.kiwoom.OnReceiveChejanData.connect(self.on_receive_chejan_data)
+        self.kiwoom.OnReceiveRealData.connect(self.on_receive_real_data)
 
-        self.conditions = []  # 조건식 리스트 저장용
+        self.conditions = {}  # 조건식 인덱스 -> 조건식 이름
+        self.condition_index = {}  # 조건식 이름 -> 조건식 인덱스
+        self.bulk_tr_extraction = True  # GetCommDataEx 로 멀티데이터 일괄 조회
+        self._chart_requests = {}  # 요청명 -> 차트 조회 상태 (종목코드, since, 받은 페이지)
 
-        self.db = TradeLogger_Sqlite3(db_path="trade_log.db")
-        self.db.create_table()
+        self.db = TradeJournal(db_path=db_path)  # 체결 기록은 별도 스레드에서 모아서 저장
 
 
+    def close(self):
+        """종료 처리: 저장 대기 중인 매매 기록 저장"""
+        self.db.close()
+
     def get_instance(self):
         return self.kiwoom
     
@@ -47,6 +601,7 @@ class KiwoomAPI(QObject):
         """로그인 이벤트 핸들러"""
         if err_code == 0:
             self.logger.debug("로그인 성공!")
+            self.master.open_session()  # 날짜가 바뀌었으면 종목 마스터 다시 읽기
             self.login_event.emit(True)  # UI에 로그인 성공 신호 보냄
         else:
             self.logger.debug(f"로그인 실패 (에러 코드: {err_code})")
@@ -68,45 +623,152 @@ class KiwoomAPI(QObject):
     #     return code
     
 
-    def request_balance(self, account_number, password="0000"):
-        """잔고 조회 요청"""
+    def request_balance(self, account_number, password="0000", priority=PRIORITY_BALANCE):
+        """
+        잔고 조회 요청 (TR 스케줄러를 통해 전송)
+        Returns:
+            Future: 잔고 데이터(list) 결과
+        """
         #self.logger.debug("잔고 조회 요청")
-        self.kiwoom.dynamicCall("SetInputValue(QString, QString)", "계좌번호", account_number)
-        self.kiwoom.dynamicCall("SetInputValue(QString, QString)", "비밀번호", password)
-        self.kiwoom.dynamicCall("SetInputValue(QString, QString)", "비밀번호입력매체구분", "00")
-        self.kiwoom.dynamicCall("SetInputValue(QString, QString)", "조회구분", "1")
-        #self.kiwoom.dynamicCall("CommRqData(QString, QString, int, QString)", "잔고조회", "opw00004", 0, "2000")
-        self.kiwoom.dynamicCall("CommRqData(QString, QString, int, QString)", "계좌평가잔고내역조회", "opw00018", 0, "2000")
+        inputs = {
+            "계좌번호": account_number,
+            "비밀번호": password,
+            "비밀번호입력매체구분": "00",
+            "조회구분": "1",
+        }
+        #self.tr_scheduler.submit("잔고조회", "opw00004", inputs)
+        return self.tr_scheduler.submit("계좌평가잔고내역조회", "opw00018", inputs,
+                                        priority=priority, key=("opw00018", account_number))
 
     def on_receive_tr_data(self, screen_no, rq_name, tr_code, record_name, prev_next, data_len, err_code, msg1, msg2):
         """TR 데이터 수신 이벤트 핸들러"""
         if rq_name == "계좌평가잔고내역조회":
+            pages = self.tr_scheduler.pages(screen_no, rq_name)
+            if pages is None:
+                self.logger.debug(f"[잔고 조회] 만료된 요청의 응답 무시 (화면 {screen_no})")
+                return
             #self.logger.debug("잔고 조회 수신")
-            item_count = self.kiwoom.dynamicCall("GetRepeatCnt(QString, QString)", tr_code, record_name)
-            balance_data = []
-
             #self.logger.debug("\n[계좌 요약 정보]")
-            total_asset = self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, 0, "총자산평가금액").strip()
-            total_profit = self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, 0, "총평가손익금액").strip()
-            total_rate = self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, 0, "총수익률(%)").strip()            
-
-            for i in range(item_count):
-                code = self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)",tr_code, record_name, i, "종목번호").strip()
-                if code.startswith("A"):
-                    code = code[1:]
-
-                item = {
-                    "종목코드": code,    
-                    "종목명": self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, "종목명").strip(),
-                    "보유수량": self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, "보유수량").strip(),
-                    "매입가": self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, "매입가").strip(),
-                    "평가금액": self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, "평가금액").strip(),
-                    "손익률": self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, "수익률(%)").strip(),
-                }
-                balance_data.append(item)
+            summary = {
+                field: self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, 0, field).strip()
+                for field in OPW00018_SUMMARY_FIELDS
+            }
+
+            columns = self.get_comm_data_block(tr_code, record_name, OPW00018_BALANCE_FIELDS.values())
+            page = []
+            for values in zip(*(columns[field] for field in OPW00018_BALANCE_FIELDS.values())):
+                item = dict(zip(OPW00018_BALANCE_FIELDS, values))
+                if item["종목코드"].startswith("A"):
+                    item["종목코드"] = item["종목코드"][1:]
+                page.append(item)
+
+            # 페이지 단위로 보유 종목 반영 (손절/익절 감시는 첫 페이지부터 시작)
+            self.update_order_map_from_balance(page, final=False)
+            pages.append(page)  # 요청(TrRequest)에 보관: 실패/만료되면 함께 버려짐
+
+            if prev_next == "2":
+                self.tr_scheduler.continue_request(screen_no, rq_name)
+                return
 
+            balance_data = [item for page in pages for item in page]
             self.update_order_map_from_balance(balance_data)
+            self.reconcile_positions(balance_data)
             self.balance_event.emit(balance_data)  # UI에 잔고 데이터 전달
+            self.tr_scheduler.complete(screen_no, rq_name, balance_data)
+        elif rq_name in self._chart_requests:
+            self.on_chart_data(screen_no, rq_name, tr_code, record_name, prev_next)
+        else:
+            self.tr_scheduler.complete(screen_no, rq_name, None)
+
+    def request_chart(self, tr_code, code, since=None, max_pages=None, tick=1, priority=PRIORITY_HISTORY):
+        """
+        분봉/일봉 차트 조회 요청 (TR 스케줄러를 통해 전송)
+        최신 봉부터 받아서 since 이전 봉에 닿거나 max_pages 페이지를 받을 때까지 연속조회한다.
+        Args:
+            tr_code (str): CHART_MINUTE / CHART_DAILY
+            code (str): 종목코드
+            since (datetime64): 이 시각 이후(포함)의 봉만 필요 (None 이면 받을 수 있는 만큼)
+            max_pages (int): 최대 페이지 수 (None 이면 제한 없음)
+            tick (int): 분봉 틱범위 (1, 3, 5, 10, 15, 30, 45, 60)
+            priority (int): PRIORITY_*
+        Returns:
+            Future: bar_data.Bars (since 이후, 시간 오름차순)
+        """
+        inputs = {"종목코드": code}
+        if tr_code == CHART_MINUTE:
+            inputs["틱범위"] = str(tick)
+        else:
+            inputs["기준일자"] = self.market_now().strftime("%Y%m%d")
+        inputs["수정주가구분"] = "1"
+
+        rq_name = f"{CHART_RQ_NAMES[tr_code]}_{code}"
+        self._chart_requests.setdefault(rq_name, {
+            "code": code,
+            "since": None if since is None else np.datetime64(since, "m"),
+            "max_pages": max_pages,
+            "pages": [],
+        })
+        future = self.tr_scheduler.submit(rq_name, tr_code, inputs, priority=priority, key=(tr_code, code, tick))
+        future.add_done_callback(lambda _: self._chart_requests.pop(rq_name, None))
+        return future
+
+    def on_chart_data(self, screen_no, rq_name, tr_code, record_name, prev_next):
+        """차트 TR 한 페이지 수신: 다음 페이지가 필요하면 연속조회, 아니면 봉을 합쳐서 완료"""
+        request = self._chart_requests[rq_name]
+        time_field, time_format = CHART_TIME_FIELDS[tr_code]
+        columns = self.get_comm_data_block(tr_code, record_name, (time_field,) + CHART_VALUE_FIELDS)
+
+        stamps = [value for value in columns[time_field] if value]
+        count = len(stamps)
+        times = pd.to_datetime(stamps, format=time_format).values.astype("datetime64[m]")
+        # 가격은 전일 대비 부호(+/-)가 붙어서 오므로 절댓값
+        values = [np.abs(np.asarray(columns[field][:count] or [], dtype=np.int64)) for field in CHART_VALUE_FIELDS]
+        request["pages"].append((times, values))
+
+        since = request["since"]
+        reached = not count or (since is not None and times.min() <= since)
+        max_pages = request["max_pages"]
+        if prev_next == "2" and not reached and (max_pages is None or len(request["pages"]) < max_pages):
+            self.tr_scheduler.continue_request(screen_no, rq_name)
+            return
+
+        times = np.concatenate([page[0] for page in request["pages"]])
+        values = [np.concatenate([page[1][i] for page in request["pages"]]) for i in range(len(CHART_VALUE_FIELDS))]
+        keep = slice(None) if since is None else times >= since
+        order = np.argsort(times[keep], kind="stable")
+        bars = Bars(request["code"], times[keep][order], *(column[keep][order] for column in values))
+        self.tr_scheduler.complete(screen_no, rq_name, bars)
+
+    def get_comm_data_block(self, tr_code, record_name, fields):
+        """
+        TR 멀티데이터를 컬럼 형태로 한 번에 조회
+        GetCommDataEx 로 전체 행을 한 번의 호출로 가져오고, 지원하지 않는 TR 이면 필드별 GetCommData 로 조회
+        Args:
+            tr_code (str): TR 코드
+            record_name (str): 레코드명
+            fields (iterable): 조회할 필드명
+        Returns:
+            dict: 필드명 -> 행별 값 리스트 (공백 제거)
+        """
+        fields = list(fields)
+        layout = TR_MULTI_FIELDS.get(tr_code)
+
+        if self.bulk_tr_extraction and layout:
+            rows = self.kiwoom.dynamicCall("GetCommDataEx(QString, QString)", tr_code, record_name)
+            if rows is not None:
+                if not rows:
+                    return {field: [] for field in fields}
+                table = list(zip(*rows))
+                return {field: [value.strip() for value in table[layout.index(field)]] for field in fields}
+
+        item_count = self.kiwoom.dynamicCall("GetRepeatCnt(QString, QString)", tr_code, record_name)
+        return {
+            field: [
+                self.kiwoom.dynamicCall("GetCommData(QString, QString, int, QString)", tr_code, record_name, i, field).strip()
+                for i in range(item_count)
+            ]
+            for field in fields
+        }
     
     def get_condition_list(self):
         # 조건식 리스트 요청
@@ -122,11 +784,13 @@ class KiwoomAPI(QObject):
             data = self.kiwoom.dynamicCall("GetConditionNameList()")
             self.logger.debug("조건식 리스트:")
             self.conditions.clear()
+            self.condition_index.clear()
             condition_items = []
             for cond in data.split(';'):
                 if cond:
                     cond_id, cond_name = cond.split('^')
-                    self.conditions.append((int(cond_id), cond_name))
+                    self.conditions[int(cond_id)] = cond_name
+                    self.condition_index[cond_name] = int(cond_id)
                     condition_items.append(cond_name)
                     print(f"   ID: {cond_id}, 이름: {cond_name}")
             
@@ -137,53 +801,81 @@ class KiwoomAPI(QObject):
             self.logger.debug("조건식 불러오기 실패")
     
     def start_condition_monitoring(self, cond_name: str):
-        """조건식을 실행하여 실시간 감시 시작"""
-        cond_id = None
-        for cid, name in self.conditions:
-            if name == cond_name:
-                cond_id = cid
-                break
-        
+        """조건식을 실행하여 실시간 감시 시작 (여러 조건식을 동시에 감시 가능)"""
+        cond_id = self.condition_index.get(cond_name)
         if cond_id is None:
             self.logger.error(f"조건식 '{cond_name}'을 찾을 수 없습니다.")
             return
         
-        screen_no = "5000" # 화면 번호는 임의로 지정 ( 충돌 피할 것 )
-        search = 1 # 검색 후 실시간 감시
-        #realtime = 1
+        if cond_name in self.active_conditions:
+            self.logger.debug(f"이미 감시 중인 조건식: {cond_name}")
+            return
+
+        screen_no = self.screens.lease(f"조건식 {cond_name}")
+        if screen_no is None:
+            self.logger.error(f"조건식 '{cond_name}' 감시 시작 실패: 사용 가능한 화면번호 없음")
+            return
+        self.active_conditions[cond_name] = screen_no
         self.logger.debug(f"조건식 감시 시작 : {cond_name} (ID: {cond_id})")
 
-        self.kiwoom.dynamicCall("SendCondition(QString, QString, int, int)", screen_no, cond_name, cond_id, search)
+        self.kiwoom.dynamicCall("SendCondition(QString, QString, int, int)", screen_no, cond_name, cond_id,
+                                CONDITION_SEARCH_REALTIME)
 
     def stop_condition_monitoring(self, cond_name: str):
         """조건식 실시간 감시 중지"""
-        cond_id = None
-        for cid, name in self.conditions:
-            if name == cond_name:
-                cond_id = cid
-                break
-        
+        cond_id = self.condition_index.get(cond_name)
         if cond_id is None:
             self.logger.error(f"조건식 '{cond_name}'을 찾을 수 없습니다.")
             return
         
-        screen_no = "5000"  # start_condition_monitoring과 동일한 화면번호 사용
+        screen_no = self.active_conditions.pop(cond_name, None)  # start_condition_monitoring에서 할당한 화면번호
+        if screen_no is None:
+            return
         
         # SendConditionStop 함수 호출하여 감시 중지
         self.kiwoom.dynamicCall("SendConditionStop(QString, QString, int)", screen_no, cond_name, cond_id)
+        self.screens.release(screen_no)
         self.logger.debug(f"조건식 감시 중지 : {cond_name} (ID: {cond_id})")
 
+    def on_receive_tr_condition(self, screen_no, code_list, cond_name, cond_index, next_):
+        """
+        조건검색 초기 결과 수신 (SendCondition 직후 현재 조건을 만족하는 종목 전체)
+        - code_list : 종목코드 목록 ("000020;000040;...")
+        - next_ : 연속조회 여부 (2 이면 이어지는 결과 있음)
+        페이지마다 condition_initial_event 를 보내고, 이어지는 결과는 감시 시작 시 받은 화면번호로 연속조회한다.
+        """
+        codes = list(dict.fromkeys(code for code in code_list.split(';') if code))  # 순서 유지, 중복 제거
+        self.logger.debug(f"[조건검색 초기 결과] 조건명: {cond_name}, {len(codes)}종목, 연속: {next_}")
+        try:
+            index = int(cond_index)
+        except (TypeError, ValueError):
+            index = self.condition_index.get(cond_name, -1)
+        if codes:
+            self.condition_initial_event.emit(codes, cond_name, index)
+
+        if str(next_).strip() == "2":
+            screen_no = self.active_conditions.get(cond_name)
+            if screen_no is None:
+                return  # 감시를 중지한 조건식
+            self.kiwoom.dynamicCall("SendCondition(QString, QString, int, int)", screen_no, cond_name, index,
+                                    CONDITION_SEARCH_NEXT)
+
     def on_receive_real_condition(self, code, type_, cond_name, cond_index):
         """
         조건식에 해당되는 종목 실시간 수신
         - code : 종목 코드
         - type : "I"(편입), "D"(이탈)
         - cond_name: 조건식 이름
+        - cond_index: 조건식 인덱스 (문자열)
         """
         self.logger.debug(f"[조건검색 실시간] 종목코드: {code}, 이벤트: {type_}, 조건명: {cond_name}")
-        self.condition_event.emit(code, type_, cond_name)
+        try:
+            index = int(cond_index)
+        except (TypeError, ValueError):
+            index = self.condition_index.get(cond_name, -1)
+        self.condition_event.emit(code, type_, cond_name, index)
 
-    def send_buy_order(self, account, code, quantity, price=0, order_type="03", retry_count=0):
+    def send_buy_order(self, account, code, quantity, price=0, order_type="03", retry_count=0, condition="", stamps=None):
         """
         매수 주문 실행
         - code: 종목코드 (ex: A005930)
@@ -191,26 +883,28 @@ class KiwoomAPI(QObject):
         - price: 주문 가격
         - 주문 유형 (1: 매수, 2: 매도도)
         - order_type: 주문 유형 (03: 시장가, 00: 지정가, 05: 조건부 지정가: 10:최유리)
+        - stamps: 주문 이전 단계 시각 (편입 수신, 필터 통과. latency 모듈 참고)
         """
-        sceen_no = "6000"
+        queued = self.dispatcher.coalesce(code, SIDE_BUY)
+        if queued is not None:
+            self.logger.debug(f"[매수 스킵] 이미 전송 대기 중: {code}")
+            return queued
 
-        order_id = self.kiwoom.dynamicCall(
-            "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
-            ["자동매수", sceen_no, account, 1, code, quantity, price, order_type, ""]
-        )
+        order = self.orders.enqueue(account, code, SIDE_BUY, quantity, price, order_type)
+        if stamps:
+            order.stamps.update(stamps)
+        order.stamps[STAGE_QUEUED] = self.clock()
+        order.condition = condition
+        if condition:
+            self.code_conditions[code] = condition
 
-        self.logger.debug(f"[주문 전송] 종목: {code}, 주문수량: {quantity}, 주문가격: {price}, 계좌 : {account}, 주문 타입 : {order_type}")
+        self.logger.debug(f"[주문 대기] 종목: {code}, 주문수량: {quantity}, 주문가격: {price}, 계좌 : {account}, 주문 타입 : {order_type}")
 
-        # 주문번호 저장 (order_id는 실제 반환 안되므로 별도 추적 필요)
-        self.order_map[code] = {
-            "account": account,
-            "code": code,
-            "quantity": quantity,
-            "price": price,
-            "retry": retry_count,
-            "filled": False,
-            "sell_sent": False
-        }
+        # 주문 제한에 맞춰 SendOrder 전송 (on_order_dispatched 에서 결과 처리)
+        # SendOrder 는 성공 여부만 반환하고 주문번호는 체결 이벤트(FID 9203)로 수신됨
+        order = self.dispatcher.submit(order, ORDER_PRIORITY_ENTRY)
+        self.order_event.emit(code)
+        return order
 
         # # 5초 후 체결 여부 확인 및 재시도
         # QTimer.singleShot(5000, lambda: self.check_order_fill(code))
@@ -248,36 +942,133 @@ class KiwoomAPI(QObject):
         self.send_buy_order(account, code, quantity, price, order_type)
     
     def on_receive_chejan_data(self, gubun, item_cnt, fid_list):
-        #gubun : "0" : 체결, "1": 미체결/접수/확인
-        
-        if gubun != "0": # 주문체결이 아닌 경우 무시
-            return
+        #gubun : "0" : 주문체결(접수/체결/확인), "1": 잔고
         
         code = self.kiwoom.dynamicCall("GetChejanData(int)", 9001).strip() # 종목코드
         if code.startswith("A"):
             code = code[1:]
-        
-        filled_qty = self.kiwoom.dynamicCall("GetChejanData(int)", 911).strip() #체결수량
-        trade_type = self.kiwoom.dynamicCall("GetChejanData(int)", 905).strip() # "매수" 또는 "매도"
+
+        if gubun == "1":
+            self.on_balance_chejan(code)
+            return
+
+        if gubun != "0":
+            return
+
+        order_no = self.kiwoom.dynamicCall("GetChejanData(int)", 9203).strip()  # 주문번호
+        status = self.kiwoom.dynamicCall("GetChejanData(int)", 913).strip()    # 주문상태 (접수/체결/확인)
+        trade_type = self.kiwoom.dynamicCall("GetChejanData(int)", 905).strip() # "+매수", "-매도", "매수취소" 등
+        order_qty = self.kiwoom.dynamicCall("GetChejanData(int)", 900).strip()  # 주문수량
+        remaining = self.kiwoom.dynamicCall("GetChejanData(int)", 902).strip()  # 미체결수량
+        filled_qty = self.kiwoom.dynamicCall("GetChejanData(int)", 911).strip() # 누적 체결량
         price = self.kiwoom.dynamicCall("GetChejanData(int)", 910).strip()      # 체결가
+        org_order_no = self.kiwoom.dynamicCall("GetChejanData(int)", 904).strip() # 원주문번호
+        fee = _to_int(self.kiwoom.dynamicCall("GetChejanData(int)", 938).strip())  # 당일매매수수료 (주문 누적)
+        tax = _to_int(self.kiwoom.dynamicCall("GetChejanData(int)", 939).strip())  # 당일매매세금 (주문 누적)
         
-        self.logger.debug(f"gubun: {gubun}, code: {code}, filled_qty: {filled_qty}, price: {price}, trade_type: {trade_type}")
-        
-        if not filled_qty or int(filled_qty) <= 0:
+        self.logger.debug(f"gubun: {gubun}, order_no: {order_no}, status: {status}, code: {code}, filled_qty: {filled_qty}, price: {price}, trade_type: {trade_type}")
+
+        order, fill_qty = self.orders.on_order_event(
+            order_no, code, trade_type, status,
+            _to_int(order_qty), _to_int(remaining), _to_int(filled_qty), abs(_to_int(price)), org_order_no
+        )
+        if order is None:
             return
-        
-        if code not in self.order_map:
-            self.logger.debug(f"[체결 무시] order_map에 없음: {code}")
+
+        now = self.clock()
+        if status == "접수" and STAGE_ACCEPTED not in order.stamps:
+            order.stamps[STAGE_ACCEPTED] = now
+        if fill_qty > 0 and STAGE_FILLED not in order.stamps:
+            order.stamps[STAGE_FILLED] = now
+            order.stamps.setdefault(STAGE_ACCEPTED, now)  # 접수 없이 체결이 먼저 온 경우
+            self.latency.record(order.stamps)
+            self.db.log_latency(order.order_no, code, order.side, order.condition, order.stamps)
+
+        if not order.is_open:
+            self.release_order_screen(order)
+
+        if order.side == SIDE_SELL and order.state in (ORDER_CANCELLED, ORDER_REJECTED):
+            # 매도 주문이 취소/거부되면 손절/익절 감시 재개
+            position = self.order_map.get(code)
+            if position is not None:
+                position["sell_sent"] = False
+
+        if fill_qty > 0:
+            fill_price = abs(_to_int(price))
+            self.log_fill(order, fill_qty, fill_price, fee, tax)
+            self.position_event.emit(code)
+            if order.side == SIDE_BUY:
+                self.logger.debug(f"[매수 체결] {code}, 주문번호: {order.order_no}, 수량: {fill_qty}, 가격: {fill_price}, 누적: {order.filled_qty}/{order.quantity}")
+                self.trade_event.emit("매수체결", code, fill_qty, fill_price)
+            else:
+                self.logger.debug(f"[매도 체결] {code}, 주문번호: {order.order_no}, 수량: {fill_qty}, 가격: {fill_price}, 누적: {order.filled_qty}/{order.quantity}")
+                self.trade_event.emit("매도체결", code, fill_qty, fill_price)
+
+        self.order_event.emit(code)
+
+    def log_fill(self, order, fill_qty, fill_price, fee, tax):
+        """
+        체결을 매매 기록에 저장
+        Args:
+            fee, tax (int): 주문 누적 수수료/세금 (이번 체결분은 이전 값과의 차이)
+        """
+        fee_delta, tax_delta = max(fee - order.fee, 0), max(tax - order.tax, 0)
+        order.fee, order.tax = max(fee, order.fee), max(tax, order.tax)
+
+        realized_pnl = self.positions.on_fill(order.code, order.side, fill_qty, fill_price, fee_delta, tax_delta)
+
+        self.db.log_trade(
+            order.code, order.side, fill_qty, fill_price,
+            order_no=order.order_no,
+            condition_name=order.condition,
+            account=order.account or self.account_num,
+            fee=fee_delta,
+            tax=tax_delta,
+            realized_pnl=realized_pnl,
+            fill_latency_ms=self._fill_latency_ms(order),
+        )
+
+    @staticmethod
+    def _fill_latency_ms(order):
+        """주문 전송 ~ 첫 체결 (ms). 직접 전송하지 않은 주문(HTS 등)은 None"""
+        sent_at, filled_at = order.stamps.get(STAGE_SENT), order.stamps.get(STAGE_FILLED)
+        if sent_at is None or filled_at is None:
+            return None
+        return int((filled_at - sent_at) * 1000)
+
+    def release_order_screen(self, order):
+        """완료된 주문의 화면번호 반납"""
+        if order.screen_no:
+            self.screens.release(order.screen_no)
+            order.screen_no = ""
+
+    def on_balance_chejan(self, code):
+        """
+        잔고(gubun "1") 이벤트: 체결 직후의 보유수량/매입단가로 보유 종목 갱신
+        """
+        quantity = _to_int(self.kiwoom.dynamicCall("GetChejanData(int)", 930).strip())   # 보유수량
+        avg_price = abs(_to_int(self.kiwoom.dynamicCall("GetChejanData(int)", 931).strip()))  # 매입단가
+
+        if quantity <= 0:
+            # 전량 매도 완료: 보유 종목에서 제거하고 실시간 시세 해제
+            self.order_map.pop(code, None)
+            self.exit_overrides.pop(code, None)
+            self.exit_signal_at.pop(code, None)
+            self.unsubscribe_real_price(code)
             return
 
-        if trade_type == "+매수":
-            self.order_map[code]["filled"] = True
-            self.logger.debug(f"[매수 체결 완료] {code}, 수량: {filled_qty}, 가격: {price}")
-        
-        elif trade_type == "-매도":
-            self.logger.debug(f"[매도 체결 완료] {code}, 수량: {filled_qty}, 가격: {price}")
-        
-        
+        previous = self.order_map.get(code, {})
+        self.order_map[code] = {
+            "account": self.account_num,
+            "code": code,
+            "quantity": quantity,
+            "price": avg_price,
+            "retry": 0,
+            "filled": True,
+            "sell_sent": previous.get("sell_sent", False)
+        }
+        self.subscribe_real_price([code])
+
         # if code in self.order_map and filled_qty and int(filled_qty) > 0:
         #     self.order_map[code]["filled"] = True
         #     print(f"[체결 완료] {code}, 체결 수량: {filled_qty}")
@@ -327,8 +1118,12 @@ class KiwoomAPI(QObject):
 
     # 시장가 매도시 target_price = 0, order_type="03"
     def send_sell_order(self, account, code, quantity, price=0, order_type="03", retry_count=0):
-        order = self.order_map.get(code)
-        if not order:
+        position = self.order_map.get(code)
+        if not position:
+            return
+
+        if self.orders.has_open(code, SIDE_SELL):
+            self.logger.debug(f"[매도 스킵] 이미 매도 주문 중: {code}")
             return
         
         #account = order["account"]
@@ -345,27 +1140,53 @@ class KiwoomAPI(QObject):
         else:
             self.logger.debug(f"[자동매도, 지정가] {code} 수량: {quantity}, 매도가: {price}")
         
-        screen_no = "7000"
-        #사용자 정의 요청명, 화면번호, 계좌번호, 주문유형코드(1매수,2매도), 종목코드, 주문수량, 주문가격(시장가0), 호가구분(시장가"03", 지정가"00"), 원주문번호
-        self.kiwoom.dynamicCall(
-               "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
-                ["자동매도", screen_no, account, 2, code, quantity, price, order_type, ""]
-        )
-    
+        order = self.orders.enqueue(account, code, SIDE_SELL, quantity, price, order_type)
+        signal_at = self.exit_signal_at.pop(code, None)
+        if signal_at is not None:
+            order.stamps[STAGE_SIGNAL] = signal_at
+        order.stamps[STAGE_QUEUED] = self.clock()
+        order.condition = self.code_conditions.get(code, "")
+        # 매도(손절/익절)는 대기 중인 매수보다 먼저 전송
+        order = self.dispatcher.submit(order, ORDER_PRIORITY_EXIT)
+        self.order_event.emit(code)
+        return order
+
+    def on_order_dispatched(self, order, ret):
+        """OrderDispatcher 전송 결과 처리 (ret: SendOrder 반환값)"""
+        if ret == 0:
+            waited = order.stamps[STAGE_SENT] - order.stamps.get(STAGE_QUEUED, order.stamps[STAGE_SENT])
+            self.logger.debug(f"[주문 전송] {order.code} {order.side} {order.quantity}주, 대기 {waited * 1000:.0f}ms")
+        else:
+            if order.side == SIDE_SELL:
+                position = self.order_map.get(order.code)
+                if position is not None:
+                    position["sell_sent"] = False
+            message = ORDER_ERROR_MESSAGES.get(ret, "알 수 없는 오류")
+            self.logger.error(f"[주문 실패] {order.code} {order.side} 주문 전송 실패 (에러 코드: {ret}, {message})")
+        self.order_event.emit(order.code)
+
+    def is_position_active(self, code):
+        """보유 중이거나 매수 주문 중인 종목인지 여부 (매수 파이프라인/조건검색 초기 결과 공통)"""
+        return code in self.order_map or self.orders.has_open(code, SIDE_BUY)
+
     def get_current_price(self, code):
         """
-        종목코드의 현재가 조회 (호가 기준 가격)
+        종목코드의 현재가 조회
+        실시간 체결가를 받는 종목은 최근 체결가, 아니면 종목 마스터의 전일가 (COM 호출 없음)
         """
-        price = self.kiwoom.dynamicCall("GetMasterLastPrice(QString)", code)
-        try:
-            return int(price)
-        except ValueError:
-            return 0
+        price = self.last_prices.get(code)
+        if price:
+            return price
+        return self.master.last_price(code)
     
-    def update_order_map_from_balance(self, balance_data):
+    def update_order_map_from_balance(self, balance_data, final=True):
         """
         잔고 데이터를 기반으로 order_map을 갱신
+        Args:
+            balance_data (list): 잔고 항목
+            final (bool): 전체 잔고인지 여부. 연속조회 중간 페이지는 False (잔고에 없는 종목 정리 생략)
         """
+        held_codes = []
         for item in balance_data:
             name = item["종목명"]
             code = item["종목코드"]
@@ -378,6 +1199,7 @@ class KiwoomAPI(QObject):
                 price = 0
 
             if quantity > 0:
+                previous = self.order_map.get(code, {})
                 self.order_map[code] = {
                     "account": self.account_num,
                     "code": code,
@@ -385,11 +1207,140 @@ class KiwoomAPI(QObject):
                     "price": price,
                     "retry": 0,
                     "filled": True,       # 이미 체결된 상태
-                    "sell_sent": False    # 아직 매도 안한 상태
+                    "sell_sent": previous.get("sell_sent", False)  # 매도 주문 중이면 유지
                 }
+                held_codes.append(code)
                 #self.logger.debug(f"[보유종목 등록] {code} 수량: {quantity}, 매입가: {price}")
+
+        self.subscribe_real_price(held_codes)
+        if not final:
+            return
+        for order in self.orders.expire_submitted(ORDER_ACK_TIMEOUT):
+            self.release_order_screen(order)
+        held = set(held_codes)
+        # 잔고에 없는 종목 정리 (매수 체결 직후라 잔고 조회에 아직 반영되지 않은 종목은 유지)
+        for code in list(self.order_map):
+            if code not in held and not self.orders.has_open(code, SIDE_BUY):
+                del self.order_map[code]
+        for code in [code for code in self.exit_overrides if code not in self.order_map and not self.orders.has_open(code, SIDE_BUY)]:
+            del self.exit_overrides[code]
+        for code in self.real_codes - held - set(self.order_map):
+            self.unsubscribe_real_price(code)
+
+    def reconcile_positions(self, balance_data):
+        """
+        잔고 TR 결과로 보유 종목/손익(PositionBook) 보정
+        평소에는 체결/실시간 체결가로 계산하고, 잔고 TR 과 다른 종목만 잔고 값으로 맞춘다.
+        미체결 주문이 있는 종목은 잔고 TR 이 체결보다 늦을 수 있으므로 제외한다.
+        실시간 체결가를 받지 않는 종목은 잔고 TR 의 현재가로 평가한다.
+        """
+        holdings = {}
+        for item in balance_data:
+            holdings[item["종목코드"]] = (
+                _to_int(item["보유수량"].replace(",", "")),
+                abs(_to_int(item["매입가"].replace(",", ""))),
+                abs(_to_int(item["현재가"].replace(",", ""))),
+            )
+        skip = {code for code in holdings.keys() | self.positions.positions.keys() if self.orders.has_open(code)}
+        mismatches = self.positions.reconcile(holdings, skip=skip, live=self.last_prices.keys())
+        # 첫 보정은 시작 시 보유 종목 적재
+        log = self.logger.warning if self.positions.reconcile_count > 1 else self.logger.debug
+        for code, local, remote in mismatches:
+            log(f"[잔고 보정] {code} 계산 {local[0]}주 @ {local[1]:,} → 잔고 {remote[0]}주 @ {remote[1]:,}")
+        for code, _, _ in mismatches:
+            self.position_event.emit(code)
+
+    def set_exit_thresholds(self, loss_cutoff, gain_cutoff, code=None):
+        """
+        실시간 체결가로 평가할 손절/익절 기준 수익률(%) 설정
+        code 를 지정하면 해당 종목에만 적용 (None 값은 전역 기준 사용), 종목 정리 시 함께 삭제된다.
+        """
+        if code is None:
+            self.loss_cutoff = loss_cutoff
+            self.gain_cutoff = gain_cutoff
+        elif loss_cutoff is None and gain_cutoff is None:
+            self.exit_overrides.pop(code, None)
+        else:
+            self.exit_overrides[code] = (loss_cutoff, gain_cutoff)
+
+    def get_exit_thresholds(self, code):
+        """종목에 적용되는 (손절, 익절) 기준 수익률(%)"""
+        loss_cutoff, gain_cutoff = self.exit_overrides.get(code, (None, None))
+        if loss_cutoff is None:
+            loss_cutoff = self.loss_cutoff
+        if gain_cutoff is None:
+            gain_cutoff = self.gain_cutoff
+        return loss_cutoff, gain_cutoff
+
+    def subscribe_real_price(self, codes):
+        """종목 실시간 체결(주식체결) 등록. 이미 등록된 종목은 무시"""
+        new_codes = [code for code in codes if code not in self.real_codes]
+        if not new_codes:
+            return
+        # 화면당 최대 100 종목씩 배정
+        for screen_no, screen_codes in self.screens.assign_real_codes(new_codes).items():
+            self.real_codes.update(screen_codes)
+            # FID 10: 현재가, 옵션 "1": 기존 등록 종목 유지
+            self.kiwoom.dynamicCall("SetRealReg(QString, QString, QString, QString)",
+                                    screen_no, ";".join(screen_codes), "10", "1")
+            self.logger.debug(f"[실시간 등록] 화면 {screen_no}: {screen_codes}")
+
+    def unsubscribe_real_price(self, code):
+        """종목 실시간 체결 등록 해제"""
+        if code not in self.real_codes:
+            return
+        self.real_codes.discard(code)
+        self.last_prices.pop(code, None)
+        screen_no = self.screens.code_screens.get(code)
+        if screen_no is not None:
+            self.kiwoom.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+            self.screens.remove_real_code(code)  # 화면에 남은 종목이 없으면 화면번호 반납
+        self.logger.debug(f"[실시간 해제] {code}")
+
+    def on_receive_real_data(self, code, real_type, real_data):
+        """실시간 시세 수신 이벤트 핸들러"""
+        if real_type != "주식체결":
+            return
+
+        raw_price = self.kiwoom.dynamicCall("GetCommRealData(QString, int)", code, 10).strip()
+        try:
+            price = abs(int(raw_price))  # 전일 대비 부호(+/-)가 붙어서 옴
+        except ValueError:
+            return
+
+        self.last_prices[code] = price
+        self.positions.on_price(code, price)
+        self.price_event.emit(code, price)
+        self.check_exit_threshold(code, price)
+
+    def check_exit_threshold(self, code, price):
+        """
+        체결가 기준 손절/익절 조건 평가
+        보유 종목(PositionBook)의 매입금액 대비 수익률이 기준에 도달하면 exit_event 를 한 번만 발생시킨다.
+        """
+        order = self.order_map.get(code)
+        if not order or not order.get("filled") or order.get("sell_sent"):
+            return
+
+        position = self.positions.get(code)
+        if position is None or position.cost <= 0:
+            return
+
+        quantity = position.quantity
+        rate = profit_rate(quantity, price, position.cost)
+        loss_cutoff, gain_cutoff = self.get_exit_thresholds(code)
+        if loss_cutoff is not None and rate <= loss_cutoff:
+            reason = "손절"
+        elif gain_cutoff is not None and rate >= gain_cutoff:
+            reason = "익절"
+        else:
+            return
+
+        order["sell_sent"] = True
+        self.exit_signal_at[code] = self.clock()  # 매도 주문 지연 측정 시작
+        self.exit_event.emit(code, quantity, rate, reason)
     
     def get_stock_name(self, code):
-        """종목코드로 종목명 조회"""
-        return self.kiwoom.dynamicCall("GetMasterCodeName(QString)", code).strip()
+        """종목코드로 종목명 조회 (종목 마스터 캐시)"""
+        return self.master.name(code)
     
@@ -0,0 +1,65 @@
+"""
+KiwoomAPI 가 사용하는 OpenAPI 백엔드 생성
+
+KiwoomAPI 는 백엔드 객체에 대해 아래 인터페이스만 사용한다.
+    - dynamicCall(signature, *args)
+    - OnEventConnect(int)
+    - OnReceiveTrData(str, str, str, str, str, int, str, str, str)
+    - OnReceiveConditionVer(int, str)
+    - OnReceiveTrCondition(str, str, str, int, int)
+    - OnReceiveRealCondition(str, str, str, str)
+    - OnReceiveChejanData(str, int, str)
+    - OnReceiveRealData(str, str, str)
+
+실제 키움 OCX(QAxWidget), kiwoom_simulator.KiwoomSimulator, event_tape.ReplayBackend(녹화 재생)가
+이 인터페이스를 제공한다.
+"""
+
+BACKEND_KIWOOM = "kiwoom"
+BACKEND_SIMULATOR = "simulator"
+BACKEND_REPLAY = "replay"
+
+
+def create_backend(name=BACKEND_KIWOOM, **kwargs):
+    """
+    이름으로 OpenAPI 백엔드 생성
+    Args:
+        name (str): "kiwoom"(실제 OCX), "simulator" 또는 "replay"
+        kwargs: 시뮬레이터 생성 옵션 (kiwoom_simulator.KiwoomSimulator 참고)
+                재생은 path(테이프 경로), speed (event_tape.ReplayBackend 참고)
+    Returns:
+        백엔드 객체
+    """
+    if name == BACKEND_KIWOOM:
+        # QAxContainer 는 윈도우에서만 사용 가능하므로 필요할 때 import
+        from PyQt5.QAxContainer import QAxWidget
+        return QAxWidget("KHOPENAPI.KHOpenAPICtrl.1")
+
+    if name == BACKEND_SIMULATOR:
+        from kiwoom_simulator import KiwoomSimulator
+        return KiwoomSimulator(**kwargs)
+
+    if name == BACKEND_REPLAY:
+        from event_tape import ReplayBackend
+        return ReplayBackend(**kwargs)
+
+    raise ValueError(f"알 수 없는 백엔드: {name}")
+
+
+# TR 멀티데이터 출력 필드 순서 (KOA Studio 기준, GetCommDataEx 결과의 컬럼 순서)
+TR_MULTI_FIELDS = {
+    "opw00018": (
+        "종목번호", "종목명", "평가손익", "수익률(%)", "매입가", "전일종가", "보유수량",
+        "매매가능수량", "현재가", "전일매수수량", "전일매도수량", "금일매수수량", "금일매도수량",
+        "매입금액", "매입수수료", "평가금액", "평가수수료", "세금", "수수료합", "보유비중(%)",
+        "신용구분", "신용구분명", "대출일",
+    ),
+    "opt10080": (
+        "현재가", "거래량", "체결시간", "시가", "고가", "저가", "수정주가구분", "수정비율",
+        "대업종구분", "소업종구분", "종목정보", "수정주가이벤트", "전일종가",
+    ),
+    "opt10081": (
+        "종목코드", "현재가", "거래량", "거래대금", "일자", "시가", "고가", "저가", "수정주가구분", "수정비율",
+        "대업종구분", "소업종구분", "종목정보", "수정주가이벤트", "전일종가",
+    ),
+}
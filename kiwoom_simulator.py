@@ -0,0 +1,638 @@
+"""
+키움 OpenAPI 시뮬레이터
+
+실제 OCX(KHOPENAPI.KHOpenAPICtrl.1)와 같은 dynamicCall / 이벤트 인터페이스를 제공하여
+윈도우/실계좌 없이 KiwoomAPI, MainWindow 를 구동하고 성능을 측정하기 위한 용도.
+
+- 모든 이벤트는 가상 시계 기준의 이벤트 큐로 스케줄되며, seed 가 같으면 항상 같은 순서로 재현된다.
+- realtime=True : QTimer 로 실제 시간에 맞춰 이벤트 전달 (GUI 구동용)
+- realtime=False: run_for()/run_until() 호출 시 최대 속도로 이벤트 전달 (벤치마크용)
+"""
+import heapq
+import random
+import time
+from collections import Counter, deque
+from datetime import date, datetime, time as dtime, timedelta
+
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer
+
+from kiwoom_backend import TR_MULTI_FIELDS
+from trading_costs import FEE_RATE, SELL_TAX_RATE
+
+# OpenAPI 에러 코드
+OP_ERR_NONE = 0
+OP_ERR_SISE_OVERFLOW = -200  # 시세조회 과부하
+OP_ERR_ORD_OVERFLOW = -308   # 주문전송 과부하
+
+CONDITION_PAGE_SIZE = 100  # 조건검색 초기 결과(OnReceiveTrCondition) 한 번에 보내는 종목 수 (초과 시 next=2)
+
+# 차트 TR 한 페이지당 봉 수 (다른 TR 은 page_size)
+CHART_PAGE_SIZES = {"opt10080": 900, "opt10081": 600}
+CHART_SESSION = (dtime(9, 0), dtime(15, 30))  # 분봉 생성 시간 (09:00 ~ 15:29 봉)
+
+
+class KiwoomSimulator(QObject):
+    OnEventConnect = pyqtSignal(int)
+    OnReceiveTrData = pyqtSignal(str, str, str, str, str, int, str, str, str)
+    OnReceiveConditionVer = pyqtSignal(int, str)
+    OnReceiveTrCondition = pyqtSignal(str, str, str, int, int)
+    OnReceiveRealCondition = pyqtSignal(str, str, str, str)
+    OnReceiveChejanData = pyqtSignal(str, int, str)
+    OnReceiveRealData = pyqtSignal(str, str, str)
+    OnReceiveMsg = pyqtSignal(str, str, str, str)
+
+    def __init__(self, seed=0, stocks=None, stock_count=200, accounts=None, conditions=None,
+                 holdings=None, condition_rate=0.0, initial_hits=0, exit_ratio=0.3, tick_rate=0.0, tr_latency_ms=50,
+                 order_latency_ms=20, fill_latency_ms=100, partial_fill_ratio=0.0,
+                 page_size=20, enforce_limits=True, call_latency_us=0, realtime=True, speed=1.0,
+                 market_start=None, minute_chart_days=20, daily_chart_days=1000):
+        """
+        Args:
+            seed (int): 난수 시드 (같은 시드 → 같은 이벤트 순서)
+            stocks (dict): 종목코드 -> (종목명, 기준가). 없으면 stock_count 개 자동 생성
+            accounts (list): 계좌번호 목록
+            conditions (list): 조건식 이름 목록 (인덱스는 순서대로 0, 1, ...)
+            holdings (dict): 종목코드 -> (보유수량, 매입가) 초기 잔고
+            condition_rate (float): 조건식 하나당 초당 편입/이탈 이벤트 수
+            initial_hits (int): SendCondition 초기 검색 결과(OnReceiveTrCondition) 종목 수 (CONDITION_PAGE_SIZE 씩 연속조회)
+            exit_ratio (float): 조건식 이벤트 중 이탈(D) 비율
+            tick_rate (float): 실시간 등록 종목 전체의 초당 주식체결 틱 수
+            tr_latency_ms (int): CommRqData → OnReceiveTrData 지연
+            order_latency_ms (int): SendOrder → 접수 지연
+            fill_latency_ms (int): 접수 → 체결 지연
+            partial_fill_ratio (float): 주문이 두 번에 나뉘어 체결될 확률
+            page_size (int): 멀티데이터 TR 한 페이지당 행 수 (초과 시 prev_next="2")
+            enforce_limits (bool): 조회 5회/초, 주문 5회/초 제한 적용 여부
+            call_latency_us (int): dynamicCall 1회당 추가 지연 (COM 호출 비용 모사, busy-wait)
+            realtime (bool): True 면 QTimer 로 실제 시간에 맞춰 이벤트 전달
+            speed (float): realtime 모드에서 가상 시간 배속
+            market_start (datetime): 가상 시각 0 에 해당하는 시장 시각 (기본값: 오늘 09:00)
+            minute_chart_days (int): 분봉 차트(opt10080)로 제공하는 과거 영업일 수 (당일 제외)
+            daily_chart_days (int): 일봉 차트(opt10081)로 제공하는 영업일 수
+        """
+        super().__init__()
+        self.rng = random.Random(seed)
+
+        if stocks is None:
+            stocks = {}
+            for i in range(stock_count):
+                code = f"{(i + 1) * 10:06d}"
+                stocks[code] = (f"시뮬종목{i + 1:03d}", self.rng.randrange(1000, 200000, 10))
+        self.stock_names = {code: name for code, (name, _) in stocks.items()}
+        self.prices = {code: price for code, (_, price) in stocks.items()}
+        self.codes = list(stocks.keys())
+        self.base_prices = dict(self.prices)  # 차트 생성 기준가 (실시간 가격 변동과 무관)
+
+        self.accounts = accounts or ["8000000011"]
+        self.condition_names = conditions or ["시뮬조건식"]
+        self.holdings = {}
+        for code, (qty, avg_price) in (holdings or {}).items():
+            self.holdings[code] = [qty, avg_price]
+
+        self.condition_rate = condition_rate
+        self.initial_hits = initial_hits
+        self.exit_ratio = exit_ratio
+        self.tick_rate = tick_rate
+        self.tr_latency = tr_latency_ms / 1000.0
+        self.order_latency = order_latency_ms / 1000.0
+        self.fill_latency = fill_latency_ms / 1000.0
+        self.partial_fill_ratio = partial_fill_ratio
+        self.page_size = page_size
+        self.enforce_limits = enforce_limits
+        self.call_latency = call_latency_us / 1_000_000.0
+
+        self.market_start = market_start or datetime.combine(date.today(), dtime(9, 0))
+        self.minute_chart_days = minute_chart_days
+        self.daily_chart_days = daily_chart_days
+        self._chart_rows = {}  # (TR 코드, 입력값, 시장 시각(분)) -> 차트 행 (최신 봉부터)
+
+        self.call_counts = Counter()  # dynamicCall 함수별 호출 횟수
+
+        self._now = 0.0
+        self._seq = 0
+        self._queue = []  # (시각, 순번, 함수, 인자)
+
+        self._inputs = {}
+        self._tr_current = None      # OnReceiveTrData 처리 중인 응답
+        self._tr_cursor = {}         # (화면번호, TR 코드) -> 다음 페이지 시작 위치
+        self._chejan = {}            # OnReceiveChejanData 처리 중인 FID 값
+        self._active_conditions = {} # 조건식 인덱스 -> 화면번호
+        self._condition_pages = {}   # 조건식 인덱스 -> 연속조회로 보낼 남은 초기 결과
+        self._real_codes = {}        # 화면번호 -> 실시간 등록 종목 set
+        self._real_current = None    # OnReceiveRealData 처리 중인 (종목코드, FID 값)
+        self._ticking = False
+        self._order_seq = 0
+        self._tr_times = deque()
+        self._order_times = deque()
+
+        self._handlers = {}
+
+        self.realtime = realtime
+        self.speed = speed
+        self._timer = None
+        if realtime:
+            self._wall_start = time.monotonic()
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self._pump)
+            self._timer.start(1)
+
+    # ------------------------------------------------------------------
+    # 가상 시계 / 이벤트 큐
+    # ------------------------------------------------------------------
+    def now(self):
+        """현재 가상 시각(초)"""
+        return self._now
+
+    def market_now(self):
+        """현재 가상 시각의 시장 시각 (datetime)"""
+        return self.market_start + timedelta(seconds=self._now)
+
+    def schedule(self, delay, func, *args):
+        """delay 초 후에 func(*args) 실행 예약"""
+        self._seq += 1
+        heapq.heappush(self._queue, (self._now + delay, self._seq, func, args))
+
+    def run_until(self, t):
+        """가상 시각 t 까지의 이벤트를 모두 전달"""
+        queue = self._queue
+        while queue and queue[0][0] <= t:
+            due, _, func, args = heapq.heappop(queue)
+            self._now = due
+            func(*args)
+        if t > self._now:
+            self._now = t
+
+    def run_for(self, seconds):
+        """현재 시각부터 seconds 초 동안의 이벤트를 최대 속도로 전달"""
+        self.run_until(self._now + seconds)
+
+    def pending_events(self):
+        return len(self._queue)
+
+    def _pump(self):
+        self.run_until((time.monotonic() - self._wall_start) * self.speed)
+
+    # ------------------------------------------------------------------
+    # 스크립트 이벤트
+    # ------------------------------------------------------------------
+    def schedule_condition(self, at, code, type_, cond_index=0):
+        """가상 시각 at 에 조건식 편입(I)/이탈(D) 이벤트 발생"""
+        self.schedule(max(0.0, at - self._now), self._emit_real_condition, code, type_, cond_index)
+
+    def schedule_price(self, at, code, price):
+        """가상 시각 at 에 종목 가격 변경"""
+        self.schedule(max(0.0, at - self._now), self._set_price, code, price)
+
+    def _set_price(self, code, price):
+        self.prices[code] = price
+        if self._is_real_registered(code):
+            self._emit_tick(code)
+
+    # ------------------------------------------------------------------
+    # dynamicCall
+    # ------------------------------------------------------------------
+    def dynamicCall(self, signature, *args):
+        name = signature.split("(", 1)[0]
+        if len(args) == 1 and isinstance(args[0], (list, tuple)):
+            args = tuple(args[0])
+        self.call_counts[name] += 1
+        if self.call_latency:
+            deadline = time.perf_counter() + self.call_latency
+            while time.perf_counter() < deadline:
+                pass
+
+        handler = self._handlers.get(name)
+        if handler is None:
+            handler = getattr(self, f"_call_{name}", None)
+            if handler is None:
+                return ""
+            self._handlers[name] = handler
+        return handler(*args)
+
+    def _over_limit(self, times, per_second=5):
+        if not self.enforce_limits:
+            return False
+        while times and times[0] <= self._now - 1.0:
+            times.popleft()
+        if len(times) >= per_second:
+            return True
+        times.append(self._now)
+        return False
+
+    # 로그인 / 계좌 ---------------------------------------------------------
+    def _call_CommConnect(self):
+        self.schedule(0.1, self.OnEventConnect.emit, 0)
+        return OP_ERR_NONE
+
+    def _call_GetConnectState(self):
+        return 1
+
+    def _call_GetLoginInfo(self, tag):
+        if tag == "ACCNO":
+            return ";".join(self.accounts) + ";"
+        if tag == "ACCOUNT_CNT":
+            return str(len(self.accounts))
+        if tag in ("USER_ID", "USER_NAME"):
+            return "simulator"
+        if tag == "GetServerGubun":
+            return "1"  # 모의투자
+        return ""
+
+    # 종목 정보 -----------------------------------------------------------
+    def _call_GetMasterCodeName(self, code):
+        return self.stock_names.get(code, "")
+
+    def _call_GetMasterLastPrice(self, code):
+        return str(self.prices.get(code, 0))
+
+    def _call_GetMasterConstruction(self, code):
+        return "정상" if code in self.prices else ""
+
+    def _call_GetCodeListByMarket(self, market):
+        # 앞 절반은 코스피("0"), 나머지는 코스닥("10")
+        half = (len(self.codes) + 1) // 2
+        if str(market) == "0":
+            codes = self.codes[:half]
+        elif str(market) == "10":
+            codes = self.codes[half:]
+        else:
+            codes = []
+        return ";".join(codes) + ";" if codes else ""
+
+    # TR 조회 -------------------------------------------------------------
+    def _call_SetInputValue(self, key, value):
+        self._inputs[key] = value
+
+    def _call_CommRqData(self, rq_name, tr_code, prev_next, screen_no):
+        if self._over_limit(self._tr_times):
+            self._inputs = {}
+            return OP_ERR_SISE_OVERFLOW
+
+        inputs, self._inputs = self._inputs, {}
+        builder = getattr(self, f"_tr_{tr_code}", None)
+        single, rows = builder(inputs) if builder else ({}, [])
+
+        cursor_key = (screen_no, tr_code)
+        page_size = CHART_PAGE_SIZES.get(tr_code, self.page_size)
+        start = self._tr_cursor.get(cursor_key, 0) if int(prev_next) == 2 else 0
+        page = rows[start:start + page_size]
+        has_next = start + page_size < len(rows)
+        self._tr_cursor[cursor_key] = start + page_size if has_next else 0
+
+        response = {"single": single, "multi": page}
+        next_flag = "2" if has_next else "0"
+        self.schedule(self.tr_latency, self._emit_tr_data, response,
+                      screen_no, rq_name, tr_code, next_flag)
+        return OP_ERR_NONE
+
+    def _emit_tr_data(self, response, screen_no, rq_name, tr_code, prev_next):
+        self._tr_current = response
+        self.OnReceiveTrData.emit(screen_no, rq_name, tr_code, "", prev_next, 0, "", "", "")
+        self._tr_current = None
+
+    def _call_GetRepeatCnt(self, tr_code, record_name):
+        if self._tr_current is None:
+            return 0
+        return len(self._tr_current["multi"])
+
+    def _call_GetCommData(self, tr_code, record_name, index, field):
+        response = self._tr_current
+        if response is None:
+            return ""
+        rows = response["multi"]
+        if index < len(rows) and field in rows[index]:
+            return rows[index][field]
+        return response["single"].get(field, "")
+
+    def _call_GetCommDataEx(self, tr_code, record_name):
+        response = self._tr_current
+        layout = TR_MULTI_FIELDS.get(tr_code)
+        if response is None or layout is None:
+            return None
+        return [[row.get(field, "") for field in layout] for row in response["multi"]]
+
+    def _tr_opw00018(self, inputs):
+        """계좌평가잔고내역요청"""
+        total_buy = 0
+        total_eval = 0
+        rows = []
+        for code, (qty, avg_price) in self.holdings.items():
+            if qty <= 0:
+                continue
+            price = self.prices.get(code, avg_price)
+            buy_amount = qty * avg_price
+            eval_amount = qty * price
+            profit = eval_amount - buy_amount
+            rate = profit / buy_amount * 100 if buy_amount else 0.0
+            total_buy += buy_amount
+            total_eval += eval_amount
+            rows.append({
+                "종목번호": f"A{code}",
+                "종목명": self.stock_names.get(code, ""),
+                "평가손익": f"{profit:015d}",
+                "수익률(%)": f"{rate:.2f}",
+                "매입가": f"{avg_price:015d}",
+                "보유수량": f"{qty:015d}",
+                "매매가능수량": f"{qty:015d}",
+                "현재가": f"{price:015d}",
+                "매입금액": f"{buy_amount:015d}",
+                "평가금액": f"{eval_amount:015d}",
+            })
+        total_profit = total_eval - total_buy
+        total_rate = total_profit / total_buy * 100 if total_buy else 0.0
+        single = {
+            "총매입금액": f"{total_buy:015d}",
+            "총평가금액": f"{total_eval:015d}",
+            "총평가손익금액": f"{total_profit:015d}",
+            "총수익률(%)": f"{total_rate:.2f}",
+            "총자산평가금액": f"{total_eval:015d}",
+        }
+        return single, rows
+
+    def _tr_opt10080(self, inputs):
+        """주식분봉차트조회요청: 과거 minute_chart_days 영업일 + 당일 현재 시각까지 (최신 봉부터)"""
+        return {}, self._chart(("opt10080", inputs.get("종목코드", ""), inputs.get("틱범위", "1")), self._minute_chart_rows)
+
+    def _tr_opt10081(self, inputs):
+        """주식일봉차트조회요청: 기준일자까지 daily_chart_days 영업일 (최신 봉부터)"""
+        return {}, self._chart(("opt10081", inputs.get("종목코드", ""), inputs.get("기준일자", "")), self._daily_chart_rows)
+
+    def _chart(self, key, builder):
+        now = self.market_now().replace(second=0, microsecond=0)
+        rows = self._chart_rows.get((key, now))
+        if rows is None:
+            if len(self._chart_rows) > 64:
+                self._chart_rows.clear()
+            rows = builder(*key[1:], now) if key[1] in self.base_prices else []
+            self._chart_rows[(key, now)] = rows
+        return rows
+
+    def _chart_day_bars(self, code, day, minutes):
+        """종목/일자로 시드를 정한 분봉 랜덤워크 (같은 날은 항상 같은 봉)"""
+        rng = random.Random(f"{code}{day.isoformat()}")
+        price = max(10, int(self.base_prices[code] * (1 + rng.uniform(-0.1, 0.1))))
+        step = max(1, price // 500)
+        bars = []
+        for _ in range(minutes):
+            open_ = price
+            high = low = price
+            for _ in range(3):
+                price = max(1, price + rng.choice((-step, 0, step)))
+                high = max(high, price)
+                low = min(low, price)
+            bars.append((open_, high, low, price, rng.randrange(100, 10000)))
+        return bars
+
+    def _minute_chart_rows(self, code, tick, now):
+        tick = max(1, int(tick or 1))
+        session = (CHART_SESSION[1].hour - CHART_SESSION[0].hour) * 60 + CHART_SESSION[1].minute - CHART_SESSION[0].minute
+        days = []
+        day = now.date()
+        while len(days) <= self.minute_chart_days:
+            if day.weekday() < 5:
+                days.append(day)
+            day -= timedelta(days=1)
+
+        rows = []
+        for day in reversed(days):
+            start = datetime.combine(day, CHART_SESSION[0])
+            bars = self._chart_day_bars(code, day, session)
+            for i in range(0, session, tick):
+                at = start + timedelta(minutes=i)
+                if at >= now:  # 진행 중인 봉까지
+                    break
+                chunk = bars[i:i + tick]
+                open_, close = chunk[0][0], chunk[-1][3]
+                rows.append({
+                    "현재가": f"{'+' if close >= open_ else '-'}{close}",
+                    "거래량": str(sum(bar[4] for bar in chunk)),
+                    "체결시간": at.strftime("%Y%m%d%H%M%S"),
+                    "시가": f"+{open_}",
+                    "고가": f"+{max(bar[1] for bar in chunk)}",
+                    "저가": f"+{min(bar[2] for bar in chunk)}",
+                })
+        rows.reverse()
+        return rows
+
+    def _daily_chart_rows(self, code, base_date, now):
+        end = datetime.strptime(base_date, "%Y%m%d").date() if base_date else now.date()
+        rng = random.Random(code)
+        price = self.base_prices[code]
+        rows = []
+        day = date(2015, 1, 1)  # 고정 시작일부터 생성 (기준일자와 관계없이 같은 날은 같은 봉)
+        while day <= end:
+            if day.weekday() < 5:
+                open_ = price
+                close = max(10, int(open_ * (1 + rng.gauss(0, 0.02))))
+                high = max(open_, close) + rng.randrange(0, max(1, open_ // 50))
+                low = max(1, min(open_, close) - rng.randrange(0, max(1, open_ // 50)))
+                price = close
+                rows.append({
+                    "종목코드": code,
+                    "현재가": str(close),
+                    "거래량": str(rng.randrange(10000, 1000000)),
+                    "일자": day.strftime("%Y%m%d"),
+                    "시가": str(open_),
+                    "고가": str(high),
+                    "저가": str(low),
+                })
+            day += timedelta(days=1)
+        rows = rows[-self.daily_chart_days:]
+        rows.reverse()
+        return rows
+
+    # 조건검색 -------------------------------------------------------------
+    def _call_GetConditionLoad(self):
+        self.schedule(0.05, self.OnReceiveConditionVer.emit, 1, "")
+        return 1
+
+    def _call_GetConditionNameList(self):
+        return "".join(f"{i}^{name};" for i, name in enumerate(self.condition_names))
+
+    def _call_SendCondition(self, screen_no, cond_name, cond_index, search):
+        cond_index = int(cond_index)
+        if int(search) == 2:
+            # 연속조회: 남은 초기 결과 다음 페이지
+            codes = self._condition_pages.pop(cond_index, None)
+            if codes is None or cond_index not in self._active_conditions:
+                return 0
+            self._emit_condition_page(screen_no, cond_name, cond_index, codes)
+            return 1
+        if cond_index in self._active_conditions:
+            return 1
+        self._active_conditions[cond_index] = screen_no
+        codes = self.rng.sample(self.codes, min(self.initial_hits, len(self.codes)))
+        self._emit_condition_page(screen_no, cond_name, cond_index, codes)
+        if int(search) == 1 and self.condition_rate > 0:
+            self.schedule(self.rng.expovariate(self.condition_rate),
+                          self._condition_tick, cond_index)
+        return 1
+
+    def _emit_condition_page(self, screen_no, cond_name, cond_index, codes):
+        """초기 결과 한 페이지 전송 (남은 종목은 연속조회용으로 보관)"""
+        page, rest = codes[:CONDITION_PAGE_SIZE], codes[CONDITION_PAGE_SIZE:]
+        if rest:
+            self._condition_pages[cond_index] = rest
+        self.schedule(self.tr_latency, self.OnReceiveTrCondition.emit,
+                      screen_no, "".join(f"{code};" for code in page), cond_name, cond_index, 2 if rest else 0)
+
+    def _call_SendConditionStop(self, screen_no, cond_name, cond_index):
+        self._active_conditions.pop(int(cond_index), None)
+        self._condition_pages.pop(int(cond_index), None)
+
+    def _condition_tick(self, cond_index):
+        if cond_index not in self._active_conditions:
+            return
+        code = self.rng.choice(self.codes)
+        type_ = "D" if self.rng.random() < self.exit_ratio else "I"
+        self._emit_real_condition(code, type_, cond_index)
+        self.schedule(self.rng.expovariate(self.condition_rate), self._condition_tick, cond_index)
+
+    def _emit_real_condition(self, code, type_, cond_index):
+        name = self.condition_names[cond_index] if cond_index < len(self.condition_names) else ""
+        self.OnReceiveRealCondition.emit(code, type_, name, str(cond_index))
+
+    # 실시간 시세 ----------------------------------------------------------
+    def _call_SetRealReg(self, screen_no, code_list, fid_list, opt_type):
+        codes = self._real_codes.setdefault(screen_no, set())
+        if str(opt_type) == "0":
+            codes.clear()
+        codes.update(c for c in code_list.split(";") if c)
+        if self.tick_rate > 0 and not self._ticking:
+            self._ticking = True
+            self.schedule(self.rng.expovariate(self.tick_rate), self._tick)
+        return OP_ERR_NONE
+
+    def _call_SetRealRemove(self, screen_no, code):
+        if screen_no == "ALL":
+            self._real_codes.clear()
+        elif screen_no in self._real_codes:
+            if code == "ALL":
+                self._real_codes.pop(screen_no)
+            else:
+                self._real_codes[screen_no].discard(code)
+
+    def _call_DisconnectRealData(self, screen_no):
+        self._real_codes.pop(screen_no, None)
+
+    def _call_GetCommRealData(self, code, fid):
+        if self._real_current is None or self._real_current[0] != code:
+            return ""
+        return self._real_current[1].get(int(fid), "")
+
+    def _is_real_registered(self, code):
+        return any(code in codes for codes in self._real_codes.values())
+
+    def _tick(self):
+        registered = sorted(set().union(*self._real_codes.values())) if self._real_codes else []
+        if not registered:
+            self._ticking = False
+            return
+        code = self.rng.choice(registered)
+        price = self.prices.get(code, 0)
+        step = max(1, price // 1000)  # 약 0.1% 단위 랜덤워크
+        self.prices[code] = max(1, price + self.rng.choice((-step, step)))
+        self._emit_tick(code)
+        self.schedule(self.rng.expovariate(self.tick_rate), self._tick)
+
+    def _emit_tick(self, code):
+        price = self.prices[code]
+        self._real_current = (code, {
+            10: f"+{price}",
+            15: "+1",
+            20: time.strftime("%H%M%S"),
+        })
+        self.OnReceiveRealData.emit(code, "주식체결", "")
+        self._real_current = None
+
+    # 주문 / 체결 ----------------------------------------------------------
+    def _call_SendOrder(self, rq_name, screen_no, account, order_type, code, quantity, price, hoga, org_order_no):
+        if self._over_limit(self._order_times):
+            return OP_ERR_ORD_OVERFLOW
+
+        order_type = int(order_type)
+        quantity = int(quantity)
+        if order_type not in (1, 2) or quantity <= 0 or code not in self.prices:
+            self.schedule(self.order_latency, self.OnReceiveMsg.emit,
+                          screen_no, rq_name, "", "[시뮬레이터] 주문 거부")
+            return OP_ERR_NONE
+
+        self._order_seq += 1
+        order_no = f"{self._order_seq:07d}"
+        side = "+매수" if order_type == 1 else "-매도"
+        if order_type == 2:
+            held = self.holdings.get(code, [0, 0])[0]
+            quantity = min(quantity, held)
+            if quantity <= 0:
+                self.schedule(self.order_latency, self.OnReceiveMsg.emit,
+                              screen_no, rq_name, "", "[시뮬레이터] 매도가능수량 부족")
+                return OP_ERR_NONE
+
+        fill_price = int(price) if int(price) > 0 else self.prices[code]
+        self.schedule(self.order_latency, self._emit_order_chejan,
+                      order_no, code, side, quantity, quantity, 0, 0, 0, "접수")
+
+        if self.rng.random() < self.partial_fill_ratio and quantity > 1:
+            first = quantity // 2
+            fills = [first, quantity - first]
+        else:
+            fills = [quantity]
+
+        filled = 0
+        delay = self.order_latency
+        for unit in fills:
+            delay += self.fill_latency
+            filled += unit
+            self.schedule(delay, self._fill, order_no, code, side, quantity, filled, unit, fill_price)
+        return OP_ERR_NONE
+
+    def _fill(self, order_no, code, side, order_qty, filled, unit, price):
+        self._emit_order_chejan(order_no, code, side, order_qty, order_qty - filled, filled, unit, price, "체결")
+
+        holding = self.holdings.setdefault(code, [0, 0])
+        if side == "+매수":
+            total = holding[0] * holding[1] + unit * price
+            holding[0] += unit
+            holding[1] = total // holding[0]
+        else:
+            holding[0] -= unit
+            if holding[0] <= 0:
+                holding[0], holding[1] = 0, 0
+
+        self._chejan = {
+            9201: self.accounts[0],
+            9001: f"A{code}",
+            302: self.stock_names.get(code, ""),
+            10: str(self.prices.get(code, price)),
+            930: str(holding[0]),
+            931: str(holding[1]),
+            933: str(holding[0]),
+            946: "2" if side == "+매수" else "1",
+        }
+        self.OnReceiveChejanData.emit("1", len(self._chejan), ";".join(map(str, self._chejan)))
+        self._chejan = {}
+
+    def _emit_order_chejan(self, order_no, code, side, order_qty, remain, filled, unit, price, status):
+        self._chejan = {
+            9201: self.accounts[0],
+            9203: order_no,
+            9001: f"A{code}",
+            302: self.stock_names.get(code, ""),
+            900: str(order_qty),
+            902: str(remain),
+            905: side,
+            908: time.strftime("%H%M%S"),
+            909: order_no if filled else "",
+            910: str(price) if filled else "",
+            911: str(filled) if filled else "",
+            913: status,
+            915: str(unit) if filled else "",
+            # 주문 단위 누적 수수료/세금
+            938: str(int(filled * price * FEE_RATE) // 10 * 10) if filled else "",
+            939: str(int(filled * price * SELL_TAX_RATE)) if filled and side == "-매도" else "",
+        }
+        self.OnReceiveChejanData.emit("0", len(self._chejan), ";".join(map(str, self._chejan)))
+        self._chejan = {}
+
+    def _call_GetChejanData(self, fid):
+        return self._chejan.get(int(fid), "")
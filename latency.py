@@ -0,0 +1,95 @@
+"""
+주문 단계별 지연 측정
+
+주문마다 단계별 시각(KiwoomAPI.clock: 실계좌는 time.monotonic, 시뮬레이터는 가상 시계)을 기록하고,
+체결 시 구간별 지연을 히스토그램(최근 N건)에 넣어 p50/p95/p99 를 계산한다.
+
+단계
+    signal   : 조건식 편입 수신 (매수) / 손절·익절 조건 도달 (매도)
+    filtered : 매수 파이프라인 필터 통과
+    queued   : 주문 등록 (주문 전송기 대기열)
+    sent     : SendOrder 전송
+    accepted : 접수 (주문체결 이벤트)
+    filled   : 첫 체결
+"""
+from collections import deque
+
+STAGE_SIGNAL = "signal"
+STAGE_FILTERED = "filtered"
+STAGE_QUEUED = "queued"
+STAGE_SENT = "sent"
+STAGE_ACCEPTED = "accepted"
+STAGE_FILLED = "filled"
+
+STAGES = (STAGE_SIGNAL, STAGE_FILTERED, STAGE_QUEUED, STAGE_SENT, STAGE_ACCEPTED, STAGE_FILLED)
+
+# 구간 이름 -> (시작 단계, 종료 단계)
+SPANS = {
+    "신호→전송": (STAGE_SIGNAL, STAGE_SENT),
+    "대기→전송": (STAGE_QUEUED, STAGE_SENT),
+    "전송→접수": (STAGE_SENT, STAGE_ACCEPTED),
+    "접수→체결": (STAGE_ACCEPTED, STAGE_FILLED),
+    "전송→체결": (STAGE_SENT, STAGE_FILLED),
+    "신호→체결": (STAGE_SIGNAL, STAGE_FILLED),
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """최근 size 건의 지연(초) 표본으로 백분위수 계산"""
+    def __init__(self, size=10000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentiles(self, points=PERCENTILES):
+        """백분위수(초) 딕셔너리 (표본이 없으면 빈 딕셔너리)"""
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {point: ordered[min(last, int(round(point / 100 * last)))] for point in points}
+
+
+class LatencyTracker:
+    def __init__(self, size=10000):
+        self.histograms = {name: LatencyHistogram(size) for name in SPANS}
+
+    def record(self, stamps):
+        """
+        체결된 주문의 단계별 시각으로 구간 지연 기록
+        Args:
+            stamps (dict): 단계 -> 시각(초)
+        """
+        for name, (start, end) in SPANS.items():
+            if start in stamps and end in stamps:
+                self.histograms[name].add(max(0.0, stamps[end] - stamps[start]))
+
+    def summary(self):
+        """구간 이름 -> {"count", "p50", "p95", "p99", "max"} (ms)"""
+        result = {}
+        for name, histogram in self.histograms.items():
+            if not histogram.count:
+                continue
+            item = {"count": histogram.count, "max": histogram.max * 1000}
+            for point, value in histogram.percentiles().items():
+                item[f"p{point}"] = value * 1000
+            result[name] = item
+        return result
+
+    def format_summary(self, spans=("신호→전송", "전송→체결", "신호→체결")):
+        """상태 표시줄용 요약 문자열"""
+        summary = self.summary()
+        parts = []
+        for name in spans:
+            item = summary.get(name)
+            if item:
+                parts.append(f"{name} p50 {item['p50']:.0f} / p95 {item['p95']:.0f} / p99 {item['p99']:.0f}ms ({item['count']:,}건)")
+        return " | ".join(parts)
@@ -1,10 +1,182 @@
+import atexit
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import re
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener
+
+from config import Config
+
+# config.json 의 LOGGING 항목 기본값
+#   level         : 전체 로그 레벨
+#   console_level : 콘솔 출력 레벨
+#   modules       : 모듈별 레벨 (예: {"kiwoom_api": "INFO"})
+#   max_bytes     : 파일 하나의 최대 크기 (넘으면 같은 날짜의 다음 번호 파일로 전환, 0 이면 제한 없음)
+#   backup_days   : 보관 일수 (0 이면 삭제 안 함)
+#   json          : True 면 파일 로그를 JSON lines(.jsonl)로 기록
+DEFAULT_LOG_OPTIONS = {
+    "level": "DEBUG",
+    "console_level": "DEBUG",
+    "modules": {},
+    "max_bytes": 50 * 1024 * 1024,
+    "backup_days": 30,
+    "json": False,
+}
+
+LOG_FORMAT = '[%(asctime)s] [%(levelname)s] %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 하나의 JSON 객체 (ts, level, logger, thread, msg[, exc])"""
+    def format(self, record):
+        item = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            item["exc"] = self.formatException(record.exc_info)
+        return json.dumps(item, ensure_ascii=False)
+
+
+class DailyRotatingFileHandler(logging.FileHandler):
+    """
+    날짜별 로그 파일 (trading_2025-01-02.log)
+    기록 시각의 날짜가 바뀌면 새 날짜 파일로, 파일이 max_bytes 를 넘으면 같은 날짜의 다음 번호 파일
+    (trading_2025-01-02.1.log, ...)로 전환한다. backup_days 보다 오래된 파일은 전환 시 삭제한다.
+    """
+    def __init__(self, log_dir, log_name, suffix=".log", max_bytes=0, backup_days=0, encoding="utf-8"):
+        self.log_dir = log_dir
+        self.log_name = log_name
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.backup_days = backup_days
+        self.day = datetime.now().date()
+        self.index = 0
+        # 같은 날 다시 실행한 경우 크기가 찬 파일은 건너뜀
+        while self.max_bytes and os.path.exists(self._path()) and os.path.getsize(self._path()) >= self.max_bytes:
+            self.index += 1
+        super().__init__(self._path(), encoding=encoding, delay=True)
+
+    def _path(self):
+        number = f".{self.index}" if self.index else ""
+        return os.path.join(self.log_dir, f"{self.log_name}_{self.day.isoformat()}{number}{self.suffix}")
+
+    def emit(self, record):
+        try:
+            day = datetime.fromtimestamp(record.created).date()
+            if day != self.day:
+                self._rollover(day)
+            elif self.max_bytes and self.stream is not None and self.stream.tell() >= self.max_bytes:
+                self._rollover(day)
+        except Exception:
+            self.handleError(record)
+            return
+        super().emit(record)
+
+    def _rollover(self, day):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if day != self.day:
+            self.day = day
+            self.index = 0
+        else:
+            self.index += 1
+        self.baseFilename = os.path.abspath(self._path())
+        self._purge()
+
+    def _purge(self):
+        """보관 일수가 지난 로그 파일 삭제"""
+        if not self.backup_days:
+            return
+        oldest = self.day - timedelta(days=self.backup_days)
+        pattern = re.compile(rf"^{re.escape(self.log_name)}_(\d{{4}}-\d{{2}}-\d{{2}})(\.\d+)?{re.escape(self.suffix)}$")
+        for name in os.listdir(self.log_dir):
+            match = pattern.match(name)
+            if match and datetime.strptime(match.group(1), "%Y-%m-%d").date() < oldest:
+                try:
+                    os.remove(os.path.join(self.log_dir, name))
+                except OSError:
+                    pass
+
+
+class BufferedQueueHandler(QueueHandler):
+    """
+    큐에 레코드를 그대로 넣는 QueueHandler (같은 프로세스의 리스너 스레드용)
+    기본 prepare() 의 메시지 포맷/레코드 복사를 생략하고, 인자(args)가 있을 때만 호출 시점 값으로 메시지를 확정한다.
+    """
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def create_handlers(log_dir, log_name, options, stream=None):
+    """
+    파일/콘솔 핸들러 생성
+    Args:
+        log_dir (str): 로그 디렉터리
+        log_name (str): 로그 파일 이름 접두어
+        options (dict): DEFAULT_LOG_OPTIONS 형식
+        stream: 콘솔 출력 스트림 (None 이면 stderr)
+    Returns:
+        list: [파일 핸들러, 콘솔 핸들러]
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+    file_handler = DailyRotatingFileHandler(
+        log_dir, log_name,
+        suffix=".jsonl" if options["json"] else ".log",
+        max_bytes=options["max_bytes"],
+        backup_days=options["backup_days"],
+    )
+    file_handler.setFormatter(JsonFormatter() if options["json"] else formatter)
+
+    console_handler = logging.StreamHandler(stream)
+    console_handler.setLevel(options["console_level"])
+    console_handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def attach_queue(logger, handlers):
+    """
+    로거에는 QueueHandler 만 붙이고, 실제 파일/콘솔 기록은 QueueListener 스레드에서 처리
+    Returns:
+        QueueListener: 시작된 리스너 (종료 시 stop() 으로 남은 로그 기록)
+    """
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(BufferedQueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def load_log_options(config=None):
+    """config.json 의 LOGGING 항목 (없는 값은 DEFAULT_LOG_OPTIONS)"""
+    options = dict(DEFAULT_LOG_OPTIONS)
+    if config is None:
+        if not os.path.exists("config.json"):
+            return options
+        config = Config()
+    try:
+        options.update(config.get('LOGGING', {}) or {})
+    except Exception as e:
+        print(f"[에러] 로그 설정(LOGGING)이 올바르지 않습니다: {e}")
+    return options
+
 
 class LogManager:
     _instance = None
     _logger = None
+    _listener = None
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -16,60 +188,41 @@ class LogManager:
             return
 
         if LogManager._logger is None:
+            options = load_log_options()
+
             logger = logging.getLogger(log_name)
-            logger.setLevel(level)
+            logger.setLevel(options.get("level", level))
+            logger.propagate = False
 
             if logger.hasHandlers():
                 logger.handlers.clear()
 
-
             base_dir = os.path.dirname(os.path.abspath(__file__))
-            log_dir = os.path.join(base_dir, 'logs')
-            os.makedirs(log_dir, exist_ok=True)
-
-            today = datetime.now().strftime("%Y-%m-%d")
-            log_file = os.path.join(log_dir, f"{log_name}_{today}.log")
-
-            formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] %(message)s',
-                                          datefmt='%Y-%m-%d %H:%M:%S')
+            log_dir = os.path.join(base_dir, log_dir)
 
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            # 매매 경로(Qt 스레드)에서는 큐에 넣기만 하고 디스크/콘솔 I/O 는 백그라운드 스레드에서 처리
+            LogManager._listener = attach_queue(logger, create_handlers(log_dir, log_name, options))
+            atexit.register(self.shutdown)
 
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            # 모듈별 레벨 (get_logger(모듈 이름) 으로 받은 하위 로거)
+            for module, module_level in options["modules"].items():
+                logger.getChild(module).setLevel(module_level)
 
             LogManager._logger = logger
 
         self._initialized = True
 
-    # def _setup_handlers(self, log_name, log_dir, level):
-    #     # 로그 디렉토리 생성
-    #     os.makedirs(log_dir, exist_ok=True)
-
-    #     # 날짜 기반 파일명
-    #     today = datetime.now().strftime("%Y-%m-%d")
-    #     log_file = os.path.join(log_dir, f"{log_name}_{today}.log")
-
-    #     # 로그 포맷
-    #     formatter = logging.Formatter(
-    #         '[%(asctime)s] [%(levelname)s] %(message)s',
-    #         datefmt='%Y-%m-%d %H:%M:%S'
-    #     )
-
-    #     # 파일 핸들러
-    #     file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    #     file_handler.setLevel(level)
-    #     file_handler.setFormatter(formatter)
-    #     self.logger.addHandler(file_handler)
-
-    #     # 콘솔 핸들러
-    #     console_handler = logging.StreamHandler()
-    #     console_handler.setLevel(level)
-    #     console_handler.setFormatter(formatter)
-    #     self.logger.addHandler(console_handler)
-
-    def get_logger(self):
-        return LogManager._logger
\ No newline at end of file
+    def get_logger(self, name=None):
+        """
+        Args:
+            name (str): 모듈 이름 (주면 "trading.<name>" 하위 로거, LOGGING.modules 로 레벨 지정 가능)
+        """
+        if name:
+            return LogManager._logger.getChild(name)
+        return LogManager._logger
+
+    def shutdown(self):
+        """대기 중인 로그를 모두 기록하고 백그라운드 스레드 종료"""
+        if LogManager._listener is not None:
+            LogManager._listener.stop()
+            LogManager._listener = None
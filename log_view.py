@@ -0,0 +1,75 @@
+"""
+화면 로그 뷰 (최근 N줄 고정, 타이머로 모아서 출력, 레벨 필터)
+
+로그는 링 버퍼(deque)에만 쌓고, flush_interval_ms 마다 대기 중인 줄을 한 번의 appendPlainText 로 붙인다.
+QPlainTextEdit.maximumBlockCount 로 화면 줄 수도 같이 제한해, 장 중 메시지가 많아도 GUI 스레드 비용과
+메모리가 세션 길이와 상관없이 일정하게 유지된다.
+"""
+import logging
+from collections import deque
+from datetime import datetime
+
+from PyQt5.QtCore import QObject, QTimer
+
+# 콤보박스 표시 이름 -> 최소 레벨
+LOG_LEVELS = (
+    ("전체", logging.DEBUG),
+    ("정보", logging.INFO),
+    ("경고", logging.WARNING),
+    ("오류", logging.ERROR),
+)
+
+
+class LogView(QObject):
+    def __init__(self, widget, max_lines=5000, flush_interval_ms=200, level=logging.DEBUG, parent=None):
+        """
+        Args:
+            widget (QPlainTextEdit): 로그를 표시할 위젯
+            max_lines (int): 보관/표시할 최대 줄 수
+            flush_interval_ms (int): 화면 반영 간격
+            level (int): 표시할 최소 로그 레벨
+        """
+        super().__init__(parent)
+        self.widget = widget
+        self.level = level
+        self.lines = deque(maxlen=max_lines)    # (레벨, 줄) 최근 max_lines 줄
+        self.pending = deque(maxlen=max_lines)  # 화면에 아직 붙이지 않은 줄 (레벨 필터 통과분)
+
+        widget.setMaximumBlockCount(max_lines)
+        widget.setUndoRedoEnabled(False)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(flush_interval_ms)
+
+    def append(self, message, level=logging.INFO):
+        """로그 한 줄 추가 (화면 반영은 다음 flush 에서)"""
+        line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}"
+        self.lines.append((level, line))
+        if level >= self.level:
+            self.pending.append(line)
+
+    def flush(self):
+        """대기 중인 줄을 한 번에 화면에 반영 (맨 아래를 보고 있던 경우에만 따라 내려감)"""
+        if not self.pending:
+            return
+        scrollbar = self.widget.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        text = "\n".join(self.pending)
+        self.pending.clear()
+        self.widget.appendPlainText(text)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def set_level(self, level):
+        """표시 레벨 변경 (보관 중인 줄로 화면을 다시 그림)"""
+        self.level = level
+        self.pending.clear()
+        self.widget.setPlainText("\n".join(line for line_level, line in self.lines if line_level >= level))
+        scrollbar = self.widget.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        self.lines.clear()
+        self.pending.clear()
+        self.widget.clear()
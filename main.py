@@ -1,78 +1,69 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QSizePolicy
-from PyQt5.QtCore import QTimer, Qt
+import signal
+import logging
+import argparse
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QSizePolicy, QLabel
+from PyQt5.QtCore import QCoreApplication, QTimer, Qt
 from ui.main_ui import Ui_MainWindow
-from kiwoom_api import KiwoomAPI
+from kiwoom_backend import create_backend, BACKEND_KIWOOM, BACKEND_SIMULATOR, BACKEND_REPLAY
+from order_book import ORDER_STATE_NAMES
+from trading_engine import TradingEngine
+from table_models import BalanceTableModel, OrdersTableModel, ConditionStocksTableModel
+from log_view import LogView, LOG_LEVELS
 from config import Config
 from log_manager import LogManager
-from datetime import datetime
+from datetime import datetime, timedelta
 from PyQt5.QtGui import QBrush, QColor
 
 class MainWindow(QMainWindow):
-    logger = LogManager().get_logger()
+    """매매 엔진(TradingEngine) 화면. 엔진 시그널을 표시하고 사용자 조작을 엔진에 전달한다."""
+    logger = LogManager().get_logger("main")
 
-    def __init__(self, app:QApplication):
+    def __init__(self, app:QApplication, engine=None, backend=None, db_path="trade_log.db"):
         super().__init__()
 
         self.app = app
+        self.engine = engine or TradingEngine(backend=backend, db_path=db_path)
+        self.kiwoom = self.engine.kiwoom
+        self.config = self.engine.config
 
-        self.CHECK_INTERVAL_MS = 10000   # 30초마다 잔고 조회
-        self.LOSS_CUTOFF = -6.0          # 손절 기준 수익률(%)
-        self.GAIN_CUTOFF = 6.0
+        self.LATENCY_REFRESH_MS = 1000   # 주문 지연 표시 갱신 간격
+        self.LOG_MAX_LINES = 5000        # 로그 화면 최대 줄 수
+        self.LOG_FLUSH_MS = 200          # 로그 화면 반영 간격
 
-        self.account_num = ''
         self.is_initial_condition_set = False  # 초기 조건식 설정 여부 플래그
-        self.is_monitoring = False  # 조건식 모니터링 상태 플래그
-        self.is_initial_account_set = False  # 초기 계좌 설정 여부 플래그
-        self.is_logged_in = False  # 로그인 상태 플래그
-        
+
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
 
         # UI 초기화
         self.init_ui()
-
-        self.config = Config()
-        # 예산 설정 (대소문자 모두 지원)
-        self.buget_per_stock = self.config.get('BUDGET_PER_STOCK')
-        if self.buget_per_stock is None:
-            self.buget_per_stock = self.config.get('budget_per_stock')
-        try:
-            if self.buget_per_stock is not None:
-                self.buget_per_stock = int(self.buget_per_stock)
-        except Exception:
-            self.buget_per_stock = None
-            self.log("[설정오류] 주문 예산(budget_per_stock)이 올바르지 않습니다.")
-        self.selected_condition = self.config.get('condition', '')  # 설정된 조건식 가져오기
-        self.slack_webhook_url = self.config.get('SLACK_WEBHOOK_URL')
-        self.LOSS_CUTOFF = self.config.get('LOSS_CUTOFF')
-        self.GAIN_CUTOFF = self.config.get('GAIN_CUTOFF')
-        self.saved_account = self.config.get('ACCOUNT_NUM', '')  # config에서 계좌번호 가져오기
-
-        # Slack 알림 설정
-        if self.slack_webhook_url:
-            from slack_notifier import SlackNotifier
-            self.slack = SlackNotifier(self.slack_webhook_url)
-        else:
-            self.slack = None
-            self.logger.warning("Slack webhook URL이 설정되지 않았습니다. Slack 알림이 비활성화됩니다.")
-                
-        self.kiwoom = KiwoomAPI()
-        self.kiwoom.login_event.connect(self.on_login_success)
+        self.condition_model.archive = self.kiwoom.db.log_condition_hits  # 정리된 조건식 종목 행은 DB 에 보관
+
+        # 엔진 이벤트 연결
+        self.engine.log_event.connect(self.log)
+        self.engine.login_changed.connect(self.on_login_changed)
+        self.engine.accounts_event.connect(self.update_account_combobox)
+        self.engine.monitoring_changed.connect(lambda name, active: self.update_condition_button())
+        self.engine.condition_stock_event.connect(self.update_condition_stock_table)
+        self.engine.condition_initial_event.connect(self.add_initial_condition_stocks)
+
+        # 주문 단계별 지연 표시 (1초마다)
+        self.latency_timer = QTimer(self)
+        self.latency_timer.timeout.connect(self.update_latency_status)
+        self.latency_timer.start(self.LATENCY_REFRESH_MS)
         self.kiwoom.balance_event.connect(self.update_balance_table)  # 잔고 이벤트 연결
+        self.kiwoom.position_event.connect(self.update_balance_row)  # 체결/잔고 보정으로 바뀐 종목 행만 갱신
+        self.kiwoom.price_event.connect(self.balance_model.update_price)  # 실시간 체결가로 잔고 현재가 갱신
+        self.kiwoom.order_event.connect(self.update_order_rows)  # 주문 상태가 바뀐 종목의 주문 행만 갱신
         
         # 버튼 이벤트 연결
         self.ui.pushButton_login.clicked.connect(self.toggle_login)
-        self.ui.pushButton_load_conditions.clicked.connect(self.load_condition_list)
+        self.ui.pushButton_load_conditions.clicked.connect(self.engine.load_condition_list)
         self.ui.pushButton_start_condition.clicked.connect(self.toggle_condition_monitoring)
 
-        # 조건식 이벤트 연결
+        # 조건식 목록 이벤트 연결
         self.kiwoom.condition_list_event.connect(self.update_condition_combobox)
-        self.kiwoom.condition_event.connect(self.on_condition_event)
-
-        # 테스트 버튼
-        #self.ui.pushButton_test_buy.clicked.connect(self.test_buy)
-        #self.ui.pushButton_test_sell.clicked.connect(self.test_sell)
 
         # 계좌 선택 콤보 박스
         self.ui.comboBox_account.currentIndexChanged.connect(self.on_account_selected)
@@ -81,23 +72,15 @@ class MainWindow(QMainWindow):
         self.ui.comboBox_condition.currentTextChanged.connect(self.on_condition_selected)
 
         # 손절/익절 설정값 변경 이벤트 연결
-        self.ui.spinBox_loss_cut.valueChanged.connect(self.on_loss_cut_changed)
-        self.ui.spinBox_gain_cut.valueChanged.connect(self.on_gain_cut_changed)
+        self.ui.spinBox_loss_cut.valueChanged.connect(self.engine.set_loss_cutoff)
+        self.ui.spinBox_gain_cut.valueChanged.connect(self.engine.set_gain_cutoff)
 
         # 사이드바 메뉴 선택 이벤트 연결
         self.ui.listWidget_menu.currentRowChanged.connect(self.on_menu_changed)
 
-        # 테이블 초기화
-        self.init_tables()
-
-        self.account_list = []
-
         self.show()
         #self.showMaximized()
 
-        # 자동 로그인 및 조건식 로드
-        QTimer.singleShot(1000, self.auto_login)  # 1초 후 자동 로그인 시도
-
         # 조건식 저장 버튼 연결
         self.ui.pushButton_save_condition.clicked.connect(self.save_selected_condition)
 
@@ -112,29 +95,48 @@ class MainWindow(QMainWindow):
         # 첫 번째 메뉴 선택
         self.ui.listWidget_menu.setCurrentRow(0)
         
-        # 손절/익절 초기값 설정
-        self.ui.spinBox_loss_cut.setValue(abs(int(self.LOSS_CUTOFF)))
-        self.ui.spinBox_gain_cut.setValue(int(self.GAIN_CUTOFF))
+        # 손절/익절 초기값 설정 (엔진 설정값, 없으면 기본값)
+        loss_cutoff = self.engine.LOSS_CUTOFF if self.engine.LOSS_CUTOFF is not None else -6.0
+        gain_cutoff = self.engine.GAIN_CUTOFF if self.engine.GAIN_CUTOFF is not None else 6.0
+        self.ui.spinBox_loss_cut.setValue(abs(int(loss_cutoff)))
+        self.ui.spinBox_gain_cut.setValue(int(gain_cutoff))
+
+        # 잔고 테이블 모델 (종목코드 기준으로 바뀐 셀만 갱신)
+        self.balance_model = BalanceTableModel(self)
+        self.ui.tableView_balance.setModel(self.balance_model)
 
         # 테이블 크기 정책 설정
-        self.ui.tableWidget_balance.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.ui.tableWidget_balance.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
-        self.ui.tableWidget_balance.verticalHeader().setDefaultSectionSize(25)  # 행 높이 설정
+        self.ui.tableView_balance.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.ui.tableView_balance.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.ui.tableView_balance.verticalHeader().setDefaultSectionSize(25)  # 행 높이 설정
         
+        # 주문내역 테이블 모델 (주문별 행, 바뀐 종목의 주문 행만 갱신)
+        self.orders_model = OrdersTableModel(self.describe_order, self)
+        self.ui.tableView_orders.setModel(self.orders_model)
+        self.ui.tableView_orders.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.ui.tableView_orders.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.ui.tableView_orders.verticalHeader().setDefaultSectionSize(25)  # 행 높이 설정
+
+        # 주문 지연 (상태 표시줄)
+        self.label_latency = QLabel(self)
+        self.ui.statusbar.addPermanentWidget(self.label_latency)
+
+        # 로그 화면 (최근 LOG_MAX_LINES 줄, LOG_FLUSH_MS 마다 모아서 출력)
+        self.log_view = LogView(self.ui.plainTextEdit_log, max_lines=self.LOG_MAX_LINES,
+                                flush_interval_ms=self.LOG_FLUSH_MS, parent=self)
+        for name, level in LOG_LEVELS:
+            self.ui.comboBox_log_level.addItem(name, level)
+        self.ui.comboBox_log_level.currentIndexChanged.connect(
+            lambda index: self.log_view.set_level(self.ui.comboBox_log_level.itemData(index)))
+
+        # 조건식 종목 테이블 모델 (종목코드 -> 행 인덱스)
+        self.condition_model = ConditionStocksTableModel(self)
+        self.ui.tableView_condition_stocks.setModel(self.condition_model)
+
         # 조건식 테이블 크기 정책 설정
-        self.ui.tableWidget_condition_stocks.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.ui.tableWidget_condition_stocks.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
-        self.ui.tableWidget_condition_stocks.verticalHeader().setDefaultSectionSize(25)  # 행 높이 설정
-
-    def init_tables(self):
-        """테이블 위젯 초기화"""
-        # 잔고 테이블 설정
-        self.ui.tableWidget_balance.setColumnCount(8)
-        self.ui.tableWidget_balance.setHorizontalHeaderLabels(['', '종목코드', '종목명', '보유수량', '매입가', '현재가', '평가금액', '손익률'])
-        
-        # 조건식 종목 테이블 설정
-        self.ui.tableWidget_condition_stocks.setColumnCount(6)
-        self.ui.tableWidget_condition_stocks.setHorizontalHeaderLabels(['종목코드', '종목명', '현재가', '주문량', '상태', '시간'])
+        self.ui.tableView_condition_stocks.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.ui.tableView_condition_stocks.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.ui.tableView_condition_stocks.verticalHeader().setDefaultSectionSize(25)  # 행 높이 설정
 
     def on_menu_changed(self, index):
         """
@@ -144,68 +146,35 @@ class MainWindow(QMainWindow):
         """
         self.ui.stackedWidget_main.setCurrentIndex(index)
         
-    def on_loss_cut_changed(self, value):
-        """손절 기준 변경"""
-        self.LOSS_CUTOFF = -abs(value)
-        self.log(f"손절 기준 변경: {self.LOSS_CUTOFF}%")
-        
-    def on_gain_cut_changed(self, value):
-        """익절 기준 변경"""
-        self.GAIN_CUTOFF = value
-        self.log(f"익절 기준 변경: {self.GAIN_CUTOFF}%")
-
-    def log(self, message):
-        """로그 출력"""
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{current_time}] {message}"
-        self.ui.textEdit_log.append(log_message)
-        self.logger.debug(message)
+    def log(self, message, level=logging.INFO):
+        """로그 화면에 출력 (엔진 로그는 엔진에서 파일 로그에 기록)"""
+        self.log_view.append(message, level)
 
     def toggle_login(self):
         """로그인/로그아웃 토글"""
-        if self.is_logged_in:
-            self.logout()
+        if self.engine.is_logged_in:
+            self.engine.logout()
         else:
-            self.login()
-
-    def login(self):
-        self.kiwoom.comm_connect()
+            self.engine.login()
 
-    def logout(self):
-        """로그아웃: UI 및 상태 초기화 (OpenAPI는 실제 로그아웃 미지원)"""
-        self.is_logged_in = False
-        self.account_num = ''
+    def on_login_changed(self, logged_in):
+        """로그인 상태에 따라 버튼 표시, 로그아웃 시 화면 초기화"""
+        if logged_in:
+            self.ui.pushButton_login.setText("로그아웃")
+            return
         self.ui.comboBox_account.clear()
-        self.ui.tableWidget_balance.setRowCount(0)
+        self.balance_model.clear()
+        self.orders_model.clear()
         self.ui.comboBox_condition.clear()
-        self.ui.tableWidget_condition_stocks.setRowCount(0)
+        self.condition_model.clear()
         self.ui.pushButton_login.setText("로그인")
-        self.log("로그아웃 되었습니다.")
 
-    def on_login_success(self, success):
-        """로그인 성공 후 계좌 정보 가져오기"""
-        if success:
-            self.is_logged_in = True
-            self.ui.pushButton_login.setText("로그아웃")
-            accounts = self.kiwoom.get_account_list()
-            
-            self.log(f"계좌번호: {accounts}")
-            self.ui.comboBox_account.clear()
-            self.ui.comboBox_account.addItems(accounts)
-            
-            # config에 저장된 계좌번호가 있고 유효한 계좌번호인 경우 선택
-            if self.saved_account and self.saved_account in accounts:
-                self.ui.comboBox_account.setCurrentText(self.saved_account)
-                self.account_num = self.saved_account
-                self.log(f"저장된 계좌번호 '{self.saved_account}' 선택됨")
-                QTimer.singleShot(1000, lambda: self.kiwoom.request_balance(self.account_num))
-            # 저장된 계좌가 없거나 유효하지 않은 경우 첫 번째 계좌 선택
-            elif accounts:
-                self.account_num = accounts[0]
-                self.ui.comboBox_account.setCurrentText(self.account_num)
-                QTimer.singleShot(1000, lambda: self.kiwoom.request_balance(self.account_num))
-            
-            self.start_periodic_balance_check()
+    def update_account_combobox(self, accounts, selected):
+        """로그인 후 계좌 콤보박스 업데이트 (엔진이 선택한 계좌 표시)"""
+        self.ui.comboBox_account.clear()
+        self.ui.comboBox_account.addItems(accounts)
+        if selected:
+            self.ui.comboBox_account.setCurrentText(selected)
 
     def on_account_selected(self):
         """콤보박스에서 계좌 선택 시 호출"""
@@ -213,113 +182,46 @@ class MainWindow(QMainWindow):
         if not selected_account:
             self.logger.debug("계좌를 선택하세요.")
             return
+        self.engine.select_account(selected_account)
         
-        # 계좌번호가 변경된 경우에만 처리
-        if selected_account != self.account_num:
-            self.account_num = selected_account
-            self.config.set('ACCOUNT_NUM', selected_account)  # config에 저장
-            self.logger.debug(f"계좌번호 '{selected_account}' 저장됨")
-            self.logger.debug(f"잔고 조회 요청: {selected_account}")
-            self.kiwoom.request_balance(self.account_num)
-        
-    def update_balance_table(self, balance_data):
-        """잔고 데이터를 테이블에 업데이트"""
+    def update_balance_table(self, balance_data=None):
+        """
+        보유 종목(PositionBook, 체결/실시간 체결가로 계산한 값)을 잔고 테이블에 반영 (바뀐 종목/셀만 갱신, 체크 상태 유지)
+        Args:
+            balance_data (list): 잔고 조회 결과 (조회 완료 시에만 전달, 보유 종목 없음 안내용)
+        """
         try:
-            # 테이블 초기화
-            self.ui.tableWidget_balance.setRowCount(0)
-            
-            if not balance_data:
+            positions = self.kiwoom.positions.snapshot()
+            if balance_data is not None and not positions:
                 self.log("보유 종목이 없습니다.")
-                return
-            
-            total_eval_amount = 0  # 총평가금액
-            total_profit_loss = 0  # 총손익금액
-            
-            # 데이터 추가
-            for row, item in enumerate(balance_data):
-                self.ui.tableWidget_balance.insertRow(row)
-                # 체크박스
-                checkbox_item = QTableWidgetItem()
-                checkbox_item.setFlags(checkbox_item.flags() | Qt.ItemIsUserCheckable)
-                checkbox_item.setCheckState(Qt.Unchecked)
-                self.ui.tableWidget_balance.setItem(row, 0, checkbox_item)
-                # 종목코드
-                code = item.get('종목코드', '')
-                self.ui.tableWidget_balance.setItem(row, 1, QTableWidgetItem(code))
-                # 종목명
-                종목명 = item.get('종목명', '')
-                self.ui.tableWidget_balance.setItem(row, 2, QTableWidgetItem(종목명))
-                # 보유수량
-                보유수량 = item.get('보유수량', '0').replace(',', '')
-                self.ui.tableWidget_balance.setItem(row, 3, QTableWidgetItem(f"{int(보유수량):,}"))
-                # 매입가
-                매입가 = int(item.get('매입가', '0').replace(',', ''))
-                self.ui.tableWidget_balance.setItem(row, 4, QTableWidgetItem(f"{매입가:,}"))
-                # 현재가
-                현재가_str = item.get('현재가', '0').replace(',', '')
-                try:
-                    현재가 = int(현재가_str)
-                except Exception:
-                    현재가 = 0
-                if 현재가 == 0:
-                    code_for_price = item.get('종목코드', '')
-                    if code_for_price:
-                        현재가 = self.kiwoom.get_current_price(code_for_price)
-                self.ui.tableWidget_balance.setItem(row, 5, QTableWidgetItem(f"{현재가:,}"))
-                # 평가금액
-                평가금액 = int(item.get('평가금액', '0').replace(',', ''))
-                self.ui.tableWidget_balance.setItem(row, 6, QTableWidgetItem(f"{평가금액:,}"))
-                # 손익률
-                손익률 = float(item.get('손익률', '0').replace('%', ''))
-                손익률_item = QTableWidgetItem(f"{손익률:.2f}%")
-                if 손익률 > 0:
-                    손익률_item.setForeground(QBrush(QColor('red')))
-                elif 손익률 < 0:
-                    손익률_item.setForeground(QBrush(QColor('blue')))
-                self.ui.tableWidget_balance.setItem(row, 7, 손익률_item)
-                
-                # 총계 계산
-                total_eval_amount += 평가금액
-                total_profit_loss += 평가금액 * (손익률 / 100)
-            
-            # 총계 행 추가
-            total_row = self.ui.tableWidget_balance.rowCount()
-            self.ui.tableWidget_balance.insertRow(total_row)
-            
-            # 총계 행 설정
-            self.ui.tableWidget_balance.setItem(total_row, 0, QTableWidgetItem('총계'))
-            self.ui.tableWidget_balance.setItem(total_row, 5, QTableWidgetItem(f"{total_eval_amount:,}"))
-            
-            # 총손익률 계산 및 설정
-            if total_eval_amount > 0:
-                total_profit_rate = (total_profit_loss / (total_eval_amount - total_profit_loss)) * 100
-                total_profit_item = QTableWidgetItem(f"{total_profit_rate:.2f}%")
-                
-                if total_profit_rate > 0:
-                    total_profit_item.setForeground(QBrush(QColor('red')))
-                elif total_profit_rate < 0:
-                    total_profit_item.setForeground(QBrush(QColor('blue')))
-                
-                self.ui.tableWidget_balance.setItem(total_row, 7, total_profit_item)
-            
-            # 총계 행 스타일 설정
-            for col in range(self.ui.tableWidget_balance.columnCount()):
-                item = self.ui.tableWidget_balance.item(total_row, col)
-                if item:
-                    item.setBackground(QBrush(QColor(240, 240, 240)))
-                    font = item.font()
-                    font.setBold(True)
-                    item.setFont(font)
-            
+
+            for item in positions:
+                item["name"] = self._stock_name(item["code"])
+            self.balance_model.set_snapshot(positions)
+
             self.update_orders_table()
         except Exception as e:
-            self.log(f"잔고 업데이트 중 오류 발생: {str(e)}")
+            self.log(f"잔고 업데이트 중 오류 발생: {str(e)}", logging.ERROR)
+
+    def update_balance_row(self, code):
+        """
+        체결/잔고 보정으로 바뀐 종목 한 행만 잔고 테이블에 반영 (보유하지 않게 되면 행 제거)
+        Args:
+            code (str): 종목코드
+        """
+        position = self.kiwoom.positions.get(code)
+        if position is None:
+            self.balance_model.remove(code)
+            return
+        item = position.as_dict()
+        item["name"] = self._stock_name(code)
+        self.balance_model.upsert(item)
+
+    def _stock_name(self, code):
+        """잔고 테이블에 이미 있는 종목은 표시 중인 종목명 사용"""
+        row = self.balance_model.item(code)
+        return row["name"] if row is not None else self.kiwoom.get_stock_name(code)
 
-    # 조건식 리스트 불러오기
-    def load_condition_list(self):
-        self.kiwoom.get_condition_list()
-        
-    
     def test_buy(self):
         self.kiwoom.send_buy_order("8101216911", "084180", quantity=1, price=0, order_type="03")
 
@@ -337,381 +239,203 @@ class MainWindow(QMainWindow):
         if saved_condition and saved_condition in conditions and not self.is_initial_condition_set:
             self.is_initial_condition_set = True  # 초기 설정 완료 표시
             self.ui.comboBox_condition.setCurrentText(saved_condition)
-            self.current_condition = saved_condition
             self.log(f"저장된 조건식 '{saved_condition}' 선택됨")
         
         self.log("조건식 리스트 불러오기 완료")
 
-    # 조건식 감시 시작
-    def start_condition_monitoring(self):
-        """조건식 감시 시작"""
-        condition_name = self.ui.comboBox_condition.currentText()
-        if not condition_name:
-            self.log("조건식을 선택해주세요.")
-            return
-            
-        # 이미 모니터링 중인 경우 중복 시작 방지
-        if self.is_monitoring and hasattr(self, 'current_condition') and self.current_condition == condition_name:
-            self.log(f"이미 조건식 '{condition_name}'을 모니터링 중입니다.")
-            return
-            
-        self.log(f"조건식 감시 시작: {condition_name}")
-        self.kiwoom.start_condition_monitoring(condition_name)
-        self.current_condition = condition_name  # 현재 모니터링 중인 조건식 저장
-        self.is_monitoring = True
-        
-        # 시작 버튼 상태 업데이트
-        self.ui.pushButton_start_condition.setText("모니터링 중지")
-
-    #조건식 편입/이탈 이벤트 처리
-    def on_condition_event(self, code, type_, cond_name):
-        """조건식 편입/이탈 이벤트 처리"""
-        event_type = "편입" if type_ == "I" else "이탈"
-        self.log(f"[{cond_name}] {event_type} - 종목코드: {code}")
-
-        if type_ == "I":
-            try:
-                # 중복 주문 방지
-                if code in self.kiwoom.order_map:
-                    order = self.kiwoom.order_map[code]
-                    if order.get("filled", False):
-                        self.log(f"[매수 스킵] 이미 체결된 종목 재편입: {code}")
-                        return
-                    else:
-                        self.log(f"[매수 스킵] 이미 주문 중인 종목: {code}")
-                        return
-
-                selected_account = self.ui.comboBox_account.currentText()
-                if not selected_account:
-                    self.log("계좌가 선택되지 않았습니다. 매수 주문 생략.")
-                    return
-
-                # budget 체크
-                if not hasattr(self, 'buget_per_stock') or self.buget_per_stock is None:
-                    self.log("주문 예산이 설정되지 않았습니다.")
-                    return
-                
-                budget = self.buget_per_stock
-                if not isinstance(budget, (int, float)) or budget <= 0:
-                    self.log(f"유효하지 않은 주문 예산: {budget}")
-                    return
-
-                delay_ms = 100  # 약간의 딜레이 후 주문
-
-                def delayed_order():
-                    try:
-                        price = self.kiwoom.get_current_price(code)
-                        if price <= 0:
-                            self.log(f"[가격 조회 실패] 종목: {code}")
-                            return
-
-                        quantity = budget // price
-                        if quantity < 1:
-                            self.log(f"[예산 부족] {code} 현재가: {price:,}원, 예산: {budget:,}원 → 매수 불가")
-                            return
-
-                        # 매수 주문 실행
-                        self.kiwoom.send_buy_order(
-                            account=selected_account,
-                            code=code,
-                            quantity=quantity,
-                            price=0,  # 시장가
-                            order_type="03"  # 시장가
-                        )
-
-                        # 주문 정보를 테이블에 추가
-                        self.update_condition_stock_table(code, "매수중", quantity)
-                        self.log(f"[시장가 매수] {code} - 현재가: {price:,}원, 수량: {quantity}, 총액: {quantity * price:,}원")
-
-                    except Exception as e:
-                        self.log(f"[매수 주문 실패] {code} - 에러: {str(e)}")
-
-                QTimer.singleShot(delay_ms, delayed_order)
-
-            except Exception as e:
-                self.log(f"[조건식 이벤트 처리 실패] {code} - 에러: {str(e)}")
-
-    def update_condition_stock_table(self, code, status, quantity=0, price=0):
-        """조건식 종목 테이블 업데이트"""
+    def update_condition_button(self):
+        """선택된 조건식의 감시 여부에 따라 시작/중지 버튼 표시"""
+        if self.engine.is_monitoring(self.ui.comboBox_condition.currentText()):
+            self.ui.pushButton_start_condition.setText("모니터링 중지")
+        else:
+            self.ui.pushButton_start_condition.setText("모니터링 시작")
+
+    def add_initial_condition_stocks(self, codes, cond_name):
+        """조건검색 초기 결과 중 매수 대상 종목을 테이블에 일괄 추가"""
+        current_time = datetime.now().strftime("%H:%M:%S")
+        self.condition_model.insert_many([
+            dict(code=code, name=self.kiwoom.get_stock_name(code), price=self.kiwoom.get_current_price(code),
+                 status="편입", time=current_time, condition=cond_name)
+            for code in codes
+        ])
+
+    def update_condition_stock_table(self, code, status, quantity=0, price=0, condition=""):
+        """조건식 종목 테이블 업데이트 (종목코드로 행을 바로 찾아 바뀐 셀만 갱신)"""
         try:
             # 현재 시간
             current_time = datetime.now().strftime("%H:%M:%S")
-            
-            # 종목명과 현재가 조회
-            stock_name = self.kiwoom.get_stock_name(code)
-            current_price = self.kiwoom.get_current_price(code) if price == 0 else price
-            
-            # 기존 행이 있는지 확인
-            found = False
-            for row in range(self.ui.tableWidget_condition_stocks.rowCount()):
-                if self.ui.tableWidget_condition_stocks.item(row, 0).text() == code:
-                    found = True
-                    # 상태 업데이트
-                    self.ui.tableWidget_condition_stocks.item(row, 4).setText(status)
-                    # 시간 업데이트
-                    self.ui.tableWidget_condition_stocks.item(row, 5).setText(current_time)
-                    break
-            
-            # 새로운 행 추가
-            if not found:
-                row = self.ui.tableWidget_condition_stocks.rowCount()
-                self.ui.tableWidget_condition_stocks.insertRow(row)
-                
-                # 데이터 설정
-                items = [
-                    QTableWidgetItem(code),
-                    QTableWidgetItem(stock_name),
-                    QTableWidgetItem(f"{current_price:,}"),
-                    QTableWidgetItem(f"{quantity:,}"),
-                    QTableWidgetItem(status),
-                    QTableWidgetItem(current_time)
-                ]
-                
-                # 상태에 따른 색상 설정
-                status_color = {
-                    "매수중": QColor(255, 200, 200),  # 연한 빨강
-                    "매수완료": QColor(255, 150, 150),  # 빨강
-                    "매도중": QColor(200, 200, 255),  # 연한 파랑
-                    "매도완료": QColor(150, 150, 255),  # 파랑
-                    "실패": QColor(200, 200, 200)  # 회색
-                }
-                
-                for col, item in enumerate(items):
-                    if status in status_color and col == 4:  # 상태 컬럼
-                        item.setBackground(QBrush(status_color[status]))
-                    self.ui.tableWidget_condition_stocks.setItem(row, col, item)
-            
-        except Exception as e:
-            self.log(f"테이블 업데이트 중 오류 발생: {str(e)}")
 
-    def on_trade_event(self, event_type, code, quantity, price):
-        """매매 체결 이벤트 처리"""
-        try:
-            if event_type == "매수체결":
-                status = "매수완료"
-                self.log(f"[매수체결] {code} - {quantity}주 @ {price:,}원")
-            elif event_type == "매도체결":
-                status = "매도완료"
-                self.log(f"[매도체결] {code} - {quantity}주 @ {price:,}원")
-            else:
+            # 기존 행은 상태/시간만 업데이트
+            if self.condition_model.item(code) is not None:
+                self.condition_model.upsert(code, status=status, time=current_time, condition=condition or None)
                 return
-                
-            self.update_condition_stock_table(code, status, quantity, price)
-            
-            # Slack 알림 전송
-            if self.slack:
-                try:
-                    stock_name = self.kiwoom.get_stock_name(code)
-                    trade_type = "매수" if event_type == "매수체결" else "매도"
-                    
-                    # 계좌번호 마스킹 처리 (뒤 4자리만 표시)
-                    masked_account = f"...{self.account_num[-4:]}" if self.account_num else "계좌없음"
-                    
-                    message = (
-                        f"{trade_type} 체결 알림 ({masked_account})\n"
-                        f"• 종목: {stock_name} ({code})\n"
-                        f"• 체결가: {price:,}원\n"
-                        f"• 수량: {quantity:,}주\n"
-                        f"• 총액: {price * quantity:,}원"
-                    )
-                    
-                    color = "#36a64f" if trade_type == "매수" else "#ff4444"
-                    self.slack.send_message(message, color)
-                    
-                except Exception as e:
-                    self.log(f"Slack 알림 전송 실패: {str(e)}")
-            
+
+            # 새로운 행 추가
+            self.condition_model.upsert(
+                code,
+                name=self.kiwoom.get_stock_name(code),
+                price=self.kiwoom.get_current_price(code) if price == 0 else price,
+                quantity=quantity,
+                status=status,
+                time=current_time,
+                condition=condition,
+            )
+
         except Exception as e:
-            self.log(f"체결 처리 중 오류 발생: {str(e)}")
-
-    def check_and_sell_losscut(self):
-        def handle_balance(balance_list):
-            for item in balance_list:
-                try:
-                    code = item["종목코드"]
-                    qty = int(item["보유수량"].replace(",",""))
-                    rate = float(item["손익률"].replace("%","").replace(",",""))
-                except Exception as e:
-                    self.log(f"원인: {e}")
-                    continue
-                
-                if qty <=0 :
-                    continue
-                
-                if rate <= self.LOSS_CUTOFF:
-                    self.log(f"[손절 매도] {code} 손익률: {rate}%, 수량: {qty}")
-                    self.kiwoom.send_sell_order(self.account_num, code, qty)
-                
-                if rate >= self.GAIN_CUTOFF:
-                    self.log(f"[익절 매도] {code} 수익률: {rate}% → 시장가 매도")
-                    self.kiwoom.send_sell_order(self.account_num, code, qty)                    
-                
-            
-            # 한 번 연결 후 해제 (중복 연결 방지)
-            self.kiwoom.balance_event.disconnect(handle_balance)
-
-        self.kiwoom.balance_event.connect(handle_balance)
-        self.kiwoom.request_balance(self.account_num)
-
-    def start_periodic_balance_check(self):
-        
-        self.loss_timer = QTimer()
-        self.loss_timer.timeout.connect(self.check_and_sell_losscut)
-        self.loss_timer.start(self.CHECK_INTERVAL_MS)
-        print("[자동 모니터링] 손실 종목 감시 시작")
-    
+            self.log(f"테이블 업데이트 중 오류 발생: {str(e)}", logging.ERROR)
+
+    def update_latency_status(self):
+        """상태 표시줄에 주문 지연 p50/p95/p99 표시 (툴팁에 전체 구간)"""
+        summary = self.kiwoom.latency.summary()
+        if not summary:
+            self.label_latency.setText("주문 지연: -")
+            return
+        self.label_latency.setText(self.kiwoom.latency.format_summary())
+        self.label_latency.setToolTip("\n".join(
+            f"{name}: p50 {item['p50']:.1f} / p95 {item['p95']:.1f} / p99 {item['p99']:.1f} / 최대 {item['max']:.1f}ms ({item['count']:,}건)"
+            for name, item in summary.items()
+        ))
+
     def on_condition_selected(self, condition_name):
-        """조건식 선택 시 Config에 저장하고 모니터링 재시작"""
+        """조건식 선택 시 Config에 저장 (감시 중인 다른 조건식은 유지)"""
         if not condition_name:
             return
-            
+
+        self.update_condition_button()
+
         # 초기 설정 중이면 저장하지 않고 리턴
         if not self.is_initial_condition_set:
             return
-            
-        # 이전 조건식과 동일하면 무시
-        if hasattr(self, 'current_condition') and self.current_condition == condition_name:
-            return
-            
-        # 이전 조건식 모니터링 중지
-        if hasattr(self, 'current_condition') and self.current_condition:
-            self.stop_condition_monitoring()
-            
-        # 새로운 조건식 저장 (사용자가 수동으로 선택한 경우에만)
-        self.current_condition = condition_name
-        self.config.set('condition', condition_name)
-        self.log(f"조건식 '{condition_name}' 저장됨")
-        
-        QTimer.singleShot(1000, lambda: self.start_condition_monitoring())  # 1초 후 모니터링 시작
-
-    def stop_condition_monitoring(self):
-        """조건식 감시 중지"""
-        if hasattr(self, 'current_condition') and self.current_condition:
-            self.kiwoom.stop_condition_monitoring(self.current_condition)
-            self.log(f"조건식 '{self.current_condition}' 모니터링 중지")
-            self.current_condition = None
-            self.is_monitoring = False
-            
-            # 시작 버튼 상태 업데이트
-            self.ui.pushButton_start_condition.setText("모니터링 시작")
-
-    def auto_login(self):
-        """자동 로그인 및 조건식 로드"""
-        self.login()
-        # 로그인 후 2초 뒤에 조건식 로드
-        QTimer.singleShot(5000, self.auto_condition_monitoring)
-    
-    def auto_condition_monitoring(self):
-        """자동 조건식 감시 시작"""
-        self.load_condition_list()
-        
-        # 2초 후에 저장된 조건식으로 감시 시작 시도
-        QTimer.singleShot(2000, self.try_start_saved_condition)
 
-    def try_start_saved_condition(self):
-        """저장된 조건식으로 감시 시작 시도"""
-        saved_condition = self.config.get('condition', '')
-        if not saved_condition:
-            self.log("저장된 조건식이 없습니다.")
-            return
-            
-        current_conditions = [self.ui.comboBox_condition.itemText(i) 
-                            for i in range(self.ui.comboBox_condition.count())]
-        
-        if saved_condition in current_conditions:
-            self.ui.comboBox_condition.setCurrentText(saved_condition)
-            self.log(f"저장된 조건식 '{saved_condition}' 선택")
-            # 자동 시작 시에는 모니터링을 시작하지 않음
-            self.start_condition_monitoring()
-        else:
-            self.log(f"저장된 조건식 '{saved_condition}'을 찾을 수 없습니다.")
+        # 새로운 조건식 저장 (사용자가 수동으로 선택한 경우에만)
+        if self.config.get('condition', '') != condition_name:
+            self.config.set('condition', condition_name)
+            self.log(f"조건식 '{condition_name}' 저장됨")
 
     def toggle_condition_monitoring(self):
-        """모니터링 시작/중지 토글"""
-        if self.is_monitoring:
-            self.stop_condition_monitoring()
+        """선택된 조건식의 모니터링 시작/중지 토글"""
+        condition_name = self.ui.comboBox_condition.currentText()
+        if self.engine.is_monitoring(condition_name):
+            self.engine.stop_condition_monitoring(condition_name)
         else:
-            self.start_condition_monitoring()
+            self.engine.start_condition_monitoring(condition_name)
 
     def save_selected_condition(self):
         """선택한 조건식을 config에 저장"""
         condition = self.ui.comboBox_condition.currentText()
         if condition:
-            self.config.set('condition', condition)
-            self.log(f"조건식 '{condition}'이(가) 저장되었습니다.")
+            self.engine.save_condition(condition)
         else:
             self.log("저장할 조건식을 선택하세요.")
 
     def manual_sell_selected_stock(self):
         """잔고 테이블에서 체크된 종목을 수동 매도"""
         sold_any = False
-        for row in range(self.ui.tableWidget_balance.rowCount()):
-            checkbox_item = self.ui.tableWidget_balance.item(row, 0)
-            
-            if checkbox_item and checkbox_item.checkState() == Qt.Checked:
-                code_item = self.ui.tableWidget_balance.item(row, 1)
-                qty_item = self.ui.tableWidget_balance.item(row, 3)
-                if not code_item or not qty_item:
-                    self.log(f"[{row+1}행] 종목코드 또는 수량 정보를 찾을 수 없습니다.")
-                    continue
-                code = code_item.text()
-                try:
-                    qty = int(qty_item.text().replace(',', ''))
-                except Exception:
-                    self.log(f"[{row+1}행] 수량 정보가 올바르지 않습니다.")
-                    continue
-                if not code or qty <= 0:
-                    self.log(f"[{row+1}행] 유효한 종목코드 또는 수량이 아닙니다.")
-                    continue
-                self.kiwoom.send_sell_order(self.account_num, code, qty)
-                self.log(f"[수동 매도] {code} {qty}주 매도 주문 전송")
-                sold_any = True
+        for code, qty in self.balance_model.checked_positions():
+            if not code or qty <= 0:
+                self.log(f"[{code}] 유효한 종목코드 또는 수량이 아닙니다.", logging.WARNING)
+                continue
+            self.engine.sell(code, qty)
+            sold_any = True
         if not sold_any:
             self.log("체크된 종목이 없습니다. 매도할 종목을 선택하세요.")
         self.update_orders_table()
 
     def refresh_balance_table(self):
         """잔고 테이블 새로고침"""
-        if not self.account_num:
-            self.log("계좌가 선택되지 않았습니다.")
+        if not self.engine.refresh_balance():
             return
-        self.kiwoom.request_balance(self.account_num)
         self.log("잔고 새로고침 요청 완료.")
         self.update_orders_table()
 
     def update_orders_table(self):
-        """체결/미체결 주문내역 테이블 업데이트 (체결 완료는 제외)"""
-        table = self.ui.tableWidget_orders
-        table.setRowCount(0)
-        for order in self.kiwoom.order_map.values():
-            if order.get('filled', False):
-                continue  # 체결 완료된 주문은 표시하지 않음
-            row = table.rowCount()
-            table.insertRow(row)
-            order_id = order.get('order_id', order.get('code', ''))
-            code = order.get('code', '')
-            stock_name = self.kiwoom.get_stock_name(code) if code else ''
-            qty = order.get('quantity', '')
-            price = order.get('price', '')
-            status = '미체결'
-            order_type = '매도' if order.get('sell_sent', False) else '매수'
-            time_str = order.get('time', '')
-            items = [
-                QTableWidgetItem(str(order_id)),
-                QTableWidgetItem(str(code)),
-                QTableWidgetItem(str(stock_name)),
-                QTableWidgetItem(str(qty)),
-                QTableWidgetItem(str(price)),
-                QTableWidgetItem(status),
-                QTableWidgetItem(order_type),
-                QTableWidgetItem(time_str)
-            ]
-            for col, item in enumerate(items):
-                table.setItem(row, col, item)
+        """주문내역 테이블 전체 반영 (미완료 주문, 체결 완료는 제외)"""
+        self.orders_model.set_orders(self.kiwoom.orders.open_orders())
+
+    def update_order_rows(self, code):
+        """
+        주문 상태가 바뀐 종목의 주문 행만 반영 (완료된 주문은 행 제거)
+        Args:
+            code (str): 종목코드
+        """
+        self.orders_model.update_code(code, self.kiwoom.orders.open_orders(code))
+
+    def describe_order(self, order):
+        """주문내역 테이블 행 표시 값 (OrdersTableModel.FIELDS)"""
+        status = ORDER_STATE_NAMES.get(order.state, order.state)
+        if order.filled_qty:
+            status = f"{status} ({order.filled_qty}/{order.quantity})"
+        # submitted_at 은 KiwoomAPI.clock 기준이므로 경과 시간으로 주문 시각 환산
+        submitted = self.kiwoom.market_now() - timedelta(seconds=self.kiwoom.clock() - order.submitted_at)
+        return {
+            "order_no": order.order_no,
+            "code": order.code,
+            "name": self.kiwoom.get_stock_name(order.code) if order.code else '',
+            "quantity": order.quantity,
+            "price": order.price,
+            "status": status,
+            "side": order.side,
+            "time": submitted.strftime("%H:%M:%S"),
+        }
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    
-    window = MainWindow(app=app)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=[BACKEND_KIWOOM, BACKEND_SIMULATOR, BACKEND_REPLAY], default=None,
+                        help="OpenAPI 백엔드 (기본값: config.json 의 BACKEND, 없으면 kiwoom)")
+    parser.add_argument("--tape", help="재생할 이벤트 테이프 (--backend replay)")
+    parser.add_argument("--speed", type=float, default=1.0, help="테이프 재생 배속 (--backend replay)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="OpenAPI 이벤트를 테이프에 녹화 (config.json 의 RECORD_TAPE 가 true 면 tapes/ 에 자동 녹화)")
+    parser.add_argument("--headless", action="store_true",
+                        help="화면 없이 매매 엔진만 실행 (로그는 콘솔/로그 파일로 출력)")
+    args, qt_args = parser.parse_known_args()
+
+    backend_name = args.backend or Config().get('BACKEND', BACKEND_KIWOOM)
+    if args.headless and backend_name in (BACKEND_SIMULATOR, BACKEND_REPLAY):
+        app = QCoreApplication(sys.argv[:1] + qt_args)
+    else:
+        # 키움 OCX(QAxWidget)는 위젯이므로 headless 에서도 QApplication 이 필요 (창은 띄우지 않음)
+        app = QApplication(sys.argv[:1] + qt_args)
+
+    if backend_name == BACKEND_SIMULATOR:
+        # 시뮬레이터 옵션은 config.json 의 SIMULATOR 항목 사용 (kiwoom_simulator.KiwoomSimulator 참고)
+        backend = create_backend(backend_name, **Config().get('SIMULATOR', {}))
+    elif backend_name == BACKEND_REPLAY:
+        if not args.tape:
+            parser.error("--backend replay 에는 --tape 가 필요합니다")
+        backend = create_backend(backend_name, path=args.tape, speed=args.speed)
+    else:
+        backend = create_backend(backend_name)
+
+    record_path = args.record
+    if record_path is None and Config().get('RECORD_TAPE') and backend_name != BACKEND_REPLAY:
+        record_path = datetime.now().strftime("tapes/%Y-%m-%d_%H%M%S.tape")
+    if record_path:
+        from event_tape import RecordingBackend
+        try:
+            backend = RecordingBackend(backend, record_path)
+        except FileExistsError as e:
+            parser.error(str(e))
+        app.aboutToQuit.connect(backend.close)
+
+    engine = TradingEngine(backend=backend)
+    if args.headless:
+        # Ctrl+C / SIGTERM 시 이벤트 루프를 정상 종료해 매매 기록 저장 (aboutToQuit)
+        signal.signal(signal.SIGINT, lambda *_: app.quit())
+        signal.signal(signal.SIGTERM, lambda *_: app.quit())
+        signal_timer = QTimer()
+        signal_timer.timeout.connect(lambda: None)  # 이벤트 루프 중에도 파이썬 시그널 처리
+        signal_timer.start(500)
+    else:
+        window = MainWindow(app=app, engine=engine)
+
+    if backend_name == BACKEND_REPLAY:
+        # 재생은 테이프 시각에 맞춰 바로 로그인하고, 조건식 목록을 받으면 설정된 조건식 감시 시작
+        engine.kiwoom.condition_list_event.connect(lambda conditions: engine.try_start_saved_condition())
+        engine.login()
+        engine.load_condition_list()
+    else:
+        # 자동 로그인 및 조건식 로드
+        engine.auto_start()
 
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,245 @@
+"""
+주문 관리 (주문번호 기준)
+
+주문은 전송 대기(queued) 상태로 등록되어 주문 제한에 맞춰 SendOrder 로 전송되고,
+전송한 주문은 주문번호(FID 9203)가 오기 전까지 (종목코드, 매수/매도) 대기열에 두고,
+첫 주문체결(gubun "0") 이벤트가 오면 주문번호에 연결한다.
+
+주문 상태
+    queued → submitted → accepted → partial → filled
+                                  ↘ cancelled
+    queued/submitted → rejected
+"""
+import time
+from collections import deque
+
+ORDER_QUEUED = "queued"        # 전송 대기 (주문 제한)
+ORDER_SUBMITTED = "submitted"  # SendOrder 전송 완료, 주문번호 미수신
+ORDER_ACCEPTED = "accepted"    # 접수
+ORDER_PARTIAL = "partial"      # 일부 체결
+ORDER_FILLED = "filled"        # 전량 체결
+ORDER_CANCELLED = "cancelled"  # 취소 (미체결 잔량 포함)
+ORDER_REJECTED = "rejected"    # 거부 (SendOrder 실패 포함)
+
+ORDER_STATE_NAMES = {
+    ORDER_QUEUED: "대기",
+    ORDER_SUBMITTED: "전송",
+    ORDER_ACCEPTED: "접수",
+    ORDER_PARTIAL: "부분체결",
+    ORDER_FILLED: "체결",
+    ORDER_CANCELLED: "취소",
+    ORDER_REJECTED: "거부",
+}
+
+SIDE_BUY = "매수"
+SIDE_SELL = "매도"
+
+OPEN_STATES = (ORDER_QUEUED, ORDER_SUBMITTED, ORDER_ACCEPTED, ORDER_PARTIAL)
+
+_TRANSITIONS = {
+    ORDER_QUEUED: (ORDER_SUBMITTED, ORDER_CANCELLED, ORDER_REJECTED),
+    ORDER_SUBMITTED: (ORDER_ACCEPTED, ORDER_PARTIAL, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED),
+    ORDER_ACCEPTED: (ORDER_PARTIAL, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED),
+    ORDER_PARTIAL: (ORDER_PARTIAL, ORDER_FILLED, ORDER_CANCELLED),
+    ORDER_FILLED: (),
+    ORDER_CANCELLED: (),
+    ORDER_REJECTED: (),
+}
+
+
+def side_from_order_gubun(order_gubun):
+    """FID 905 주문구분("+매수", "-매도", "매수취소", "매도정정" 등)에서 매수/매도 구분"""
+    return SIDE_SELL if "매도" in order_gubun else SIDE_BUY
+
+
+class Order:
+    __slots__ = ("order_no", "account", "code", "side", "quantity", "price", "order_type",
+                 "state", "queued_at", "filled_qty", "fill_amount", "submitted_at", "updated_at", "screen_no",
+                 "condition", "fee", "tax", "stamps")
+
+    def __init__(self, account, code, side, quantity, price=0, order_type="03", order_no="", created_at=None):
+        self.order_no = order_no
+        self.account = account
+        self.code = code
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.order_type = order_type
+        self.state = ORDER_SUBMITTED
+        self.queued_at = None  # 전송 대기 등록 시각 (HTS 등 외부 주문은 None)
+        self.filled_qty = 0
+        self.fill_amount = 0  # 체결금액 합계 (원)
+        self.submitted_at = created_at if created_at is not None else time.monotonic()  # OrderBook.clock 기준
+        self.updated_at = self.submitted_at
+        self.screen_no = ""
+        self.condition = ""  # 매수 신호를 낸 조건식
+        self.fee = 0         # 누적 수수료 (원)
+        self.tax = 0         # 누적 세금 (원)
+        self.stamps = {}     # 단계 -> 시각 (latency 모듈 참고)
+
+    @property
+    def remaining(self):
+        return self.quantity - self.filled_qty
+
+    @property
+    def avg_fill_price(self):
+        return self.fill_amount // self.filled_qty if self.filled_qty else 0
+
+    @property
+    def is_open(self):
+        return self.state in OPEN_STATES
+
+    def __repr__(self):
+        return (f"Order({self.order_no or '-'}, {self.code}, {self.side}, {self.state}, "
+                f"{self.filled_qty}/{self.quantity})")
+
+
+class OrderBook:
+    def __init__(self, clock=time.monotonic):
+        """
+        Args:
+            clock: 현재 시각(초) 함수 (submitted_at/updated_at, 전송 주문 만료 판단용)
+        """
+        self.clock = clock
+        self.orders = {}          # 주문번호 -> Order
+        self._unassigned = {}     # (종목코드, 매수/매도) -> 주문번호 미수신 Order 대기열
+        self._open_by_code = {}   # 종목코드 -> 미완료 Order set
+        self._traded_codes = {SIDE_BUY: set(), SIDE_SELL: set()}  # 당일 주문한 종목
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def get(self, order_no):
+        return self.orders.get(order_no)
+
+    def has_open(self, code, side=None):
+        """미완료 주문 존재 여부 (O(1))"""
+        open_orders = self._open_by_code.get(code)
+        if not open_orders:
+            return False
+        if side is None:
+            return True
+        return any(order.side == side for order in open_orders)
+
+    def has_traded(self, code, side=SIDE_BUY):
+        """당일 해당 종목 주문 이력 여부 (O(1))"""
+        return code in self._traded_codes[side]
+
+    def open_orders(self, code=None):
+        """미완료 주문 목록 (주문 시각 순, code 를 지정하면 해당 종목만)"""
+        if code is not None:
+            return sorted(self._open_by_code.get(code, ()), key=lambda order: order.submitted_at)
+        result = []
+        for orders in self._open_by_code.values():
+            result.extend(orders)
+        result.sort(key=lambda order: order.submitted_at)
+        return result
+
+    # ------------------------------------------------------------------
+    # 상태 변경
+    # ------------------------------------------------------------------
+    def enqueue(self, account, code, side, quantity, price=0, order_type="03"):
+        """전송 대기 주문 등록 (미완료 주문으로 취급되어 중복 주문 판단에 포함)"""
+        order = Order(account, code, side, quantity, price, order_type, created_at=self.clock())
+        order.state = ORDER_QUEUED
+        order.queued_at = order.submitted_at
+        self._open_by_code.setdefault(code, set()).add(order)
+        self._traded_codes[side].add(code)
+        return order
+
+    def mark_sent(self, order):
+        """전송 대기 주문을 SendOrder 로 전송한 직후 호출"""
+        if not self._transition(order, ORDER_SUBMITTED):
+            return False
+        order.submitted_at = order.updated_at
+        self._unassigned.setdefault((order.code, order.side), deque()).append(order)
+        return True
+
+    def reject(self, order):
+        """SendOrder 실패 등으로 주문 거부 처리"""
+        pending = self._unassigned.get((order.code, order.side))
+        if pending and order in pending:
+            pending.remove(order)
+        self._transition(order, ORDER_REJECTED)
+
+    def on_order_event(self, order_no, code, order_gubun, status, order_qty, remaining,
+                       filled_qty, fill_price, org_order_no=""):
+        """
+        주문체결(gubun "0") 이벤트 반영
+        Args:
+            order_no (str): 주문번호 (FID 9203)
+            code (str): 종목코드 (FID 9001, "A" 제거)
+            order_gubun (str): 주문구분 (FID 905)
+            status (str): 주문상태 (FID 913, 접수/체결/확인)
+            order_qty (int): 주문수량 (FID 900)
+            remaining (int): 미체결수량 (FID 902)
+            filled_qty (int): 누적 체결량 (FID 911)
+            fill_price (int): 체결가 (FID 910)
+            org_order_no (str): 원주문번호 (FID 904)
+        Returns:
+            tuple: (Order, 이번 이벤트의 체결수량)
+        """
+        if "취소" in order_gubun:
+            # 취소 주문의 확인: 원주문을 취소 상태로
+            original = self.orders.get(org_order_no)
+            if original is not None and status == "확인":
+                self._transition(original, ORDER_CANCELLED)
+            return original, 0
+
+        order = self.orders.get(order_no)
+        if order is None:
+            order = self._bind(order_no, code, side_from_order_gubun(order_gubun), order_qty)
+
+        fill_delta = 0
+        if status == "접수":
+            if order.state == ORDER_SUBMITTED:
+                self._transition(order, ORDER_ACCEPTED)
+        elif status == "체결":
+            fill_delta = filled_qty - order.filled_qty
+            if fill_delta > 0:
+                order.filled_qty = filled_qty
+                order.fill_amount += fill_delta * fill_price
+            self._transition(order, ORDER_FILLED if remaining == 0 else ORDER_PARTIAL)
+        elif status == "확인" and remaining == 0 and order.remaining > 0:
+            self._transition(order, ORDER_CANCELLED)
+
+        return order, max(fill_delta, 0)
+
+    def expire_submitted(self, max_age):
+        """주문번호를 max_age 초 이상 받지 못한 전송 주문을 거부 처리 (서버 거부 메시지만 온 경우)"""
+        deadline = self.clock() - max_age
+        expired = []
+        for pending in self._unassigned.values():
+            while pending and pending[0].submitted_at < deadline:
+                expired.append(pending.popleft())
+        for order in expired:
+            self._transition(order, ORDER_REJECTED)
+        return expired
+
+    def _bind(self, order_no, code, side, order_qty):
+        """주문번호 최초 수신: 대기 중인 전송 주문과 연결 (없으면 HTS 등 외부 주문으로 등록)"""
+        pending = self._unassigned.get((code, side))
+        if pending:
+            order = pending.popleft()
+        else:
+            order = Order("", code, side, order_qty, created_at=self.clock())
+            self._open_by_code.setdefault(code, set()).add(order)
+            self._traded_codes[side].add(code)
+        order.order_no = order_no
+        if order_qty:
+            order.quantity = order_qty
+        self.orders[order_no] = order
+        return order
+
+    def _transition(self, order, state):
+        if state not in _TRANSITIONS[order.state]:
+            return False
+        order.state = state
+        order.updated_at = self.clock()
+        if not order.is_open:
+            open_orders = self._open_by_code.get(order.code)
+            if open_orders is not None:
+                open_orders.discard(order)
+                if not open_orders:
+                    del self._open_by_code[order.code]
+        return True
@@ -0,0 +1,249 @@
+"""
+보유 종목 / 손익 (원 단위 정수)
+
+체결(주문체결 gubun "0")과 실시간 체결가로 보유수량, 매입금액, 평가금액, 실현손익, 수수료/세금을
+이벤트마다 O(1) 로 갱신한다. 계좌 합계도 변경분만 더해서 유지하므로 잔고 TR 을 다시 조회하거나
+문자열을 다시 파싱하지 않고 바로 손익을 알 수 있다.
+잔고 TR(opw00018)은 주기적인 보정(reconcile)에만 사용한다.
+
+    매입금액(cost)  : 보유분의 매입가 합계 (수수료 제외). 매도 시 보유수량 비율만큼 차감 (원 미만 버림)
+    평균단가        : cost // 보유수량
+    평가손익        : 보유수량 × 현재가 - cost
+    수익률          : 평가손익 × 100 / cost (profit_rate, 손절/익절 판단과 잔고 표시가 같이 사용)
+    실현손익        : 매도금액 - 매도분 매입금액 - 수수료 - 세금 (매수 수수료는 매수 체결 시 차감)
+"""
+import time
+
+from order_book import SIDE_BUY
+
+RECONCILE_GRACE = 5.0  # 체결 후 잔고 TR 에 반영되기 전일 수 있는 시간(초). 이 시간 안의 종목은 보정 생략
+
+
+def profit_rate(quantity, price, cost):
+    """매입금액 대비 평가 수익률(%) (cost > 0 일 때만 호출)"""
+    return (quantity * price - cost) * 100 / cost
+
+
+class Position:
+    __slots__ = ("code", "quantity", "cost", "price", "realized_pnl", "fee", "tax", "updated_at")
+
+    def __init__(self, code, quantity=0, cost=0, price=0):
+        self.code = code
+        self.quantity = quantity
+        self.cost = cost          # 보유분 매입금액 (원)
+        self.price = price        # 현재가 (원)
+        self.realized_pnl = 0     # 실현손익 (원, 수수료/세금 차감)
+        self.fee = 0              # 누적 수수료 (원)
+        self.tax = 0              # 누적 세금 (원)
+        self.updated_at = None    # 마지막 체결 시각
+
+    @property
+    def avg_price(self):
+        return self.cost // self.quantity if self.quantity else 0
+
+    @property
+    def eval_amount(self):
+        return self.quantity * self.price
+
+    @property
+    def unrealized_pnl(self):
+        return self.quantity * self.price - self.cost if self.price else 0
+
+    @property
+    def rate(self):
+        """평가 수익률(%) (표시용)"""
+        return profit_rate(self.quantity, self.price, self.cost) if self.cost and self.price else 0.0
+
+    def as_dict(self):
+        return {
+            "code": self.code,
+            "quantity": self.quantity,
+            "avg_price": self.avg_price,
+            "cost": self.cost,
+            "price": self.price,
+            "eval_amount": self.eval_amount,
+            "unrealized_pnl": self.unrealized_pnl,
+            "rate": self.rate,
+            "realized_pnl": self.realized_pnl,
+        }
+
+    def __repr__(self):
+        return f"Position({self.code}, {self.quantity}주, 평균 {self.avg_price:,}, 현재 {self.price:,})"
+
+
+class PositionBook:
+    def __init__(self, clock=time.monotonic):
+        """
+        Args:
+            clock: 현재 시각(초) 함수 (RECONCILE_GRACE 판단용)
+        """
+        self.clock = clock
+        self.positions = {}    # 종목코드 -> Position (보유수량 > 0)
+        # 계좌 합계 (변경분만 반영)
+        self.total_cost = 0
+        self.total_eval = 0    # 현재가를 아는 종목의 평가금액 합계
+        self.priced_cost = 0   # 현재가를 아는 종목의 매입금액 합계 (평가손익 계산용)
+        self.realized_pnl = 0
+        self.fees = 0
+        self.taxes = 0
+        self.reconcile_count = 0
+        self.mismatch_count = 0
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def get(self, code):
+        return self.positions.get(code)
+
+    def __contains__(self, code):
+        return code in self.positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def unrealized_pnl(self):
+        return self.total_eval - self.priced_cost
+
+    def summary(self):
+        """계좌 합계 (원)"""
+        return {
+            "positions": len(self.positions),
+            "total_cost": self.total_cost,
+            "total_eval": self.total_eval,
+            "unrealized_pnl": self.unrealized_pnl,
+            "realized_pnl": self.realized_pnl,
+            "fees": self.fees,
+            "taxes": self.taxes,
+        }
+
+    def snapshot(self):
+        """보유 종목 목록 (Position.as_dict)"""
+        return [position.as_dict() for position in self.positions.values()]
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def on_fill(self, code, side, quantity, price, fee=0, tax=0):
+        """
+        체결 반영
+        Args:
+            side (str): SIDE_BUY / SIDE_SELL
+            quantity (int): 이번 체결수량
+            price (int): 체결가
+            fee, tax (int): 이번 체결분 수수료/세금
+        Returns:
+            int: 이번 체결의 실현손익 (매수는 -수수료). 보유하지 않은 종목의 매도는 매입금액을 모르므로 -수수료-세금
+        """
+        position = self.positions.get(code)
+        if position is None:
+            position = self.positions[code] = Position(code)
+        self._detach(position)
+
+        if side == SIDE_BUY:
+            position.quantity += quantity
+            position.cost += quantity * price
+            realized = -fee
+        else:
+            sold = min(quantity, position.quantity)
+            sold_cost = position.cost * sold // position.quantity if position.quantity else 0
+            position.quantity -= sold
+            position.cost -= sold_cost
+            realized = sold * price - sold_cost - fee - tax if sold else -fee - tax
+
+        if not position.price:
+            position.price = price
+        position.realized_pnl += realized
+        position.fee += fee
+        position.tax += tax
+        position.updated_at = self.clock()
+        self.realized_pnl += realized
+        self.fees += fee
+        self.taxes += tax
+
+        if position.quantity > 0:
+            self._attach(position)
+        else:
+            del self.positions[code]
+        return realized
+
+    def on_price(self, code, price):
+        """실시간 체결가 반영. Returns: Position (보유하지 않은 종목이면 None)"""
+        position = self.positions.get(code)
+        if position is None or price == position.price:
+            return position
+        if position.price:
+            self.total_eval += position.quantity * (price - position.price)
+        else:
+            self.total_eval += position.quantity * price
+            self.priced_cost += position.cost
+        position.price = price
+        return position
+
+    def reconcile(self, holdings, skip=(), live=()):
+        """
+        잔고 TR 결과로 보정
+        Args:
+            holdings (dict): 종목코드 -> (보유수량, 매입가, 현재가)
+            skip: 보정하지 않을 종목코드 (미체결 주문이 있는 종목 등)
+            live: 실시간 체결가를 받고 있는 종목코드. 그 외 종목은 잔고 TR 의 현재가로 평가
+        Returns:
+            list: (종목코드, 로컬 (수량, 평균단가), 잔고 (수량, 매입가)) 불일치 목록
+        """
+        self.reconcile_count += 1
+        now = self.clock()
+        mismatches = []
+        for code in set(self.positions) | set(holdings):
+            if code in skip:
+                continue
+            position = self.positions.get(code)
+            if position is not None and position.updated_at is not None and now - position.updated_at < RECONCILE_GRACE:
+                continue  # 방금 체결되어 잔고 TR 에 아직 반영되지 않았을 수 있음
+
+            quantity, avg_price, price = holdings.get(code, (0, 0, 0))
+            local = (position.quantity, position.avg_price) if position is not None else (0, 0)
+            # 평균단가는 원 미만 버림 차이 허용
+            if local[0] == quantity and abs(local[1] - avg_price) <= 1:
+                if position is not None and not position.price and price:
+                    self.on_price(code, price)
+                continue
+
+            mismatches.append((code, local, (quantity, avg_price)))
+            if position is not None:
+                self._detach(position)
+            if quantity <= 0:
+                self.positions.pop(code, None)
+                continue
+            if position is None:
+                position = self.positions[code] = Position(code)
+            position.quantity = quantity
+            position.cost = quantity * avg_price
+            if price and not position.price:
+                position.price = price
+            self._attach(position)
+
+        # 실시간 체결가가 없는 종목은 잔고 TR 현재가로 평가 (체결가에 머물러 손익률이 0 으로 남지 않도록)
+        for code, (_, _, price) in holdings.items():
+            if price and code not in live:
+                self.on_price(code, price)
+
+        self.mismatch_count += len(mismatches)
+        return mismatches
+
+    def clear(self):
+        self.positions.clear()
+        self.total_cost = self.total_eval = self.priced_cost = 0
+
+    def _detach(self, position):
+        """계좌 합계에서 종목 제외 (수량/매입금액 변경 전)"""
+        self.total_cost -= position.cost
+        if position.price:
+            self.total_eval -= position.quantity * position.price
+            self.priced_cost -= position.cost
+
+    def _attach(self, position):
+        """계좌 합계에 종목 포함 (수량/매입금액 변경 후)"""
+        self.total_cost += position.cost
+        if position.price:
+            self.total_eval += position.quantity * position.price
+            self.priced_cost += position.cost
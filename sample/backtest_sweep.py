@@ -0,0 +1,108 @@
+"""
+손절/익절 기준 그리드 백테스트
+
+    python sample/backtest_sweep.py                                   # 합성 분봉/신호로 소요 시간 측정
+    python sample/backtest_sweep.py --codes 500 --signals-per-day 200 --days 60
+    python sample/backtest_sweep.py --bars bars/ --signals signals.csv --loss 1 2 3 4 5 6 --gain 2 4 6 8 10
+    python sample/backtest_sweep.py --bars bars/ --tape /tmp/sim.tape
+
+--bars   : <종목코드>.csv 분봉 디렉터리 (bar_data.CsvBarSource)
+--signals: code, time 컬럼의 신호 CSV
+--tape   : 이벤트 테이프의 조건식 편입 이벤트를 신호로 사용
+--bars 를 주지 않으면 종목별 시드로 만든 랜덤워크 분봉과 랜덤 신호를 사용한다.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backtester import Backtester, load_signals, signals_from_tape
+from bar_data import Bars, CsvBarSource
+
+SESSION_MINUTES = 381  # 09:00 ~ 15:20
+
+
+class SyntheticBarSource:
+    """종목코드를 시드로 한 랜덤워크 분봉 (같은 종목은 항상 같은 봉)"""
+
+    def __init__(self, start, days, count):
+        self.start = np.datetime64(start, "D")
+        self.days = days
+        self.count = count
+
+    def codes(self):
+        return [f"{i:06d}" for i in range(1, self.count + 1)]
+
+    def load(self, code):
+        rng = np.random.default_rng(int(code))
+        dates = np.busday_offset(self.start, np.arange(self.days), roll="forward")
+        minutes = np.arange(SESSION_MINUTES).astype("timedelta64[m]") + np.timedelta64(9 * 60, "m")
+        times = (dates.astype("datetime64[m]")[:, None] + minutes[None, :]).ravel()
+        close = rng.integers(2000, 50000) * np.exp(np.cumsum(rng.normal(0, 0.002, len(times))))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.0015, len(times))) * close
+        high = np.maximum(open_, close) + spread
+        low = np.minimum(open_, close) - spread
+        return Bars(code, times, open_.round(), high.round(), low.round(), close.round(),
+                    rng.integers(100, 10000, len(times)))
+
+
+def synthetic_signals(source, per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = source.codes()
+    dates = np.busday_offset(source.start, np.arange(source.days), roll="forward").astype("datetime64[m]")
+    count = per_day * source.days
+    times = dates[rng.integers(0, source.days, count)] + (9 * 60 + rng.integers(0, SESSION_MINUTES - 20, count)).astype("timedelta64[m]")
+    return pd.DataFrame({"code": rng.choice(codes, count), "time": times})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", help="분봉 CSV 디렉터리 (기본: 합성 분봉)")
+    parser.add_argument("--signals", help="신호 CSV (code, time)")
+    parser.add_argument("--tape", help="신호로 사용할 이벤트 테이프")
+    parser.add_argument("--loss", type=float, nargs="+", default=[float(x) for x in range(1, 11)], help="손절 기준(%%)")
+    parser.add_argument("--gain", type=float, nargs="+", default=[float(x) for x in range(1, 21)], help="익절 기준(%%)")
+    parser.add_argument("--budget", type=int, default=1_000_000, help="종목당 예산")
+    parser.add_argument("--max-positions", type=int, default=None, help="동시 보유 최대 종목 수")
+    parser.add_argument("--horizon-days", type=int, default=5, help="최대 보유 일수")
+    parser.add_argument("--processes", type=int, default=None, help="작업 프로세스 수 (1: 단일 프로세스)")
+    parser.add_argument("--codes", type=int, default=200, help="합성 종목 수")
+    parser.add_argument("--days", type=int, default=40, help="합성 거래일 수")
+    parser.add_argument("--signals-per-day", type=int, default=100, help="합성 신호 수 (일)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 상위 조합 수")
+    args = parser.parse_args()
+
+    if args.bars:
+        source = CsvBarSource(args.bars)
+        if args.tape:
+            signals = signals_from_tape(args.tape)
+        elif args.signals:
+            signals = load_signals(args.signals)
+        else:
+            parser.error("--bars 에는 --signals 또는 --tape 가 필요합니다")
+    else:
+        source = SyntheticBarSource("2024-01-02", args.days, args.codes)
+        signals = synthetic_signals(source, args.signals_per_day)
+
+    backtester = Backtester(source, args.budget, max_positions=args.max_positions,
+                            horizon_days=args.horizon_days, processes=args.processes)
+    started = time.perf_counter()
+    result = backtester.sweep(signals, args.loss, args.gain)
+    elapsed = time.perf_counter() - started
+
+    combos = len(args.loss) * len(args.gain)
+    print(f"신호 {len(signals):,}건, 기준 조합 {combos:,}개 ({len(args.loss)} × {len(args.gain)}), "
+          f"소요 {elapsed:.2f}s ({len(signals) * combos / elapsed:,.0f} 신호·조합/s)")
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(result.head(args.top).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
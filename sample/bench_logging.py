@@ -0,0 +1,96 @@
+"""
+로그 호출 비용 벤치마크
+
+    python sample/bench_logging.py --count 50000
+
+sync  : 로거에 FileHandler + StreamHandler 를 직접 붙인 기존 방식 (호출 스레드에서 디스크/콘솔 I/O)
+async : LogManager 방식 (QueueHandler → QueueListener 스레드에서 기록)
+
+콘솔 출력은 /dev/null 로 보내고, 로그 파일은 임시 디렉터리에 기록한다 (종료 시 삭제).
+호출 스레드 기준 1건당 비용(평균/p99)과 리스너가 모두 기록할 때까지의 시간을 출력한다.
+    연속   : 쉬지 않고 count 건 호출 (리스너 스레드와 GIL 을 나눠 씀)
+    버스트 : burst 건씩 호출하고 interval_ms 쉼 (조건식/체결 이벤트가 몰렸다 쉬는 실제 패턴)
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_manager import DEFAULT_LOG_OPTIONS, LOG_FORMAT, LOG_DATE_FORMAT, create_handlers, attach_queue
+
+
+def make_sync_logger(log_dir, stream):
+    logger = logging.getLogger("bench.sync")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    file_handler = logging.FileHandler(os.path.join(log_dir, "sync.log"), encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler(stream)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    return logger, None
+
+
+def make_async_logger(log_dir, stream, json_lines=False):
+    logger = logging.getLogger("bench.async.json" if json_lines else "bench.async")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    options = dict(DEFAULT_LOG_OPTIONS, json=json_lines)
+    listener = attach_queue(logger, create_handlers(log_dir, "async", options, stream=stream))
+    return logger, listener
+
+
+def run(name, logger, listener, count, burst=0, interval=0.0):
+    samples = []
+    perf = time.perf_counter
+    started = perf()
+    for i in range(count):
+        t = perf()
+        logger.debug("[조건검색 실시간] 종목코드: %06d, 이벤트: I, 조건명: 시뮬조건식", i)
+        samples.append(perf() - t)
+        if burst and (i + 1) % burst == 0:
+            time.sleep(interval)
+    if listener is not None:
+        listener.stop()  # 큐에 남은 로그 기록 완료까지 대기
+    drained = perf() - started
+    samples.sort()
+    close(logger, listener)
+    print(f"{name:<12} 평균 {sum(samples) / count * 1e6:7.2f}us  p99 {samples[int(len(samples) * 0.99)] * 1e6:7.2f}us"
+          f"  최대 {samples[-1] * 1e6:9.1f}us  (기록 완료 {drained:.3f}s)")
+
+
+def close(logger, listener):
+    """중지한 리스너와 로거의 핸들러(로그 파일) 닫기 (임시 디렉터리를 지울 수 있도록)"""
+    handlers = list(logger.handlers)
+    if listener is not None:
+        handlers.extend(listener.handlers)
+    for handler in handlers:
+        handler.close()
+    logger.handlers.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=50000, help="로그 호출 수")
+    parser.add_argument("--burst", type=int, default=50, help="버스트 한 번의 로그 호출 수")
+    parser.add_argument("--interval-ms", type=float, default=10.0, help="버스트 사이 대기 시간")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w", encoding="utf-8") as devnull:
+        for title, burst in (("연속", 0), (f"버스트 ({args.burst}건/{args.interval_ms:g}ms)", args.burst)):
+            print(f"[{title}]")
+            interval = args.interval_ms / 1000
+            run("sync", *make_sync_logger(log_dir, devnull), args.count, burst, interval)
+            run("async", *make_async_logger(log_dir, devnull), args.count, burst, interval)
+            run("async+json", *make_async_logger(log_dir, devnull, json_lines=True), args.count, burst, interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+보유 종목 손익 계산 비용 벤치마크
+
+    python sample/bench_positions.py --positions 50 --ticks 100000
+
+parse      : 기존 방식. 잔고 TR 결과(문자열)를 갱신할 때마다 다시 파싱하고 종목별 float 계산으로 합계를 구함
+positions  : PositionBook. 실시간 체결가 한 건마다 해당 종목과 계좌 합계만 정수로 갱신 (O(1))
+틱 한 건당 최신 계좌 평가손익을 얻는 비용을 비교한다.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from order_book import SIDE_BUY
+from position_book import PositionBook
+
+
+def make_balance(holdings, prices):
+    """opw00018 잔고 항목 (KiwoomAPI.on_receive_tr_data 결과와 같은 문자열 형식)"""
+    items = []
+    for code, (qty, avg_price) in holdings.items():
+        price = prices[code]
+        rate = (price - avg_price) / avg_price * 100
+        items.append({
+            "종목코드": code,
+            "종목명": f"종목{code}",
+            "보유수량": f"{qty:,}",
+            "매입가": f"{avg_price:,}",
+            "현재가": f"{price:,}",
+            "평가금액": f"{qty * price:,}",
+            "손익률": f"{rate:.2f}%",
+        })
+    return items
+
+
+def parse_totals(balance_data):
+    total_eval_amount = 0
+    total_profit_loss = 0
+    for item in balance_data:
+        int(item["보유수량"].replace(",", ""))
+        int(item["매입가"].replace(",", ""))
+        int(item["현재가"].replace(",", ""))
+        profit_rate = float(item["손익률"].replace("%", ""))
+        eval_amount = int(item["평가금액"].replace(",", ""))
+        total_eval_amount += eval_amount
+        total_profit_loss += eval_amount * (profit_rate / 100)
+    return total_eval_amount, total_profit_loss
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, default=50, help="보유 종목 수")
+    parser.add_argument("--ticks", type=int, default=100000, help="실시간 체결가 수")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    codes = [f"{(i + 1) * 10:06d}" for i in range(args.positions)]
+    holdings = {code: (rng.randrange(1, 500), rng.randrange(1000, 200000, 10)) for code in codes}
+    prices = {code: avg_price for code, (_, avg_price) in holdings.items()}
+    ticks = [(rng.choice(codes), rng.uniform(-0.05, 0.05)) for _ in range(args.ticks)]
+    ticks = [(code, max(1, int(holdings[code][1] * (1 + move)))) for code, move in ticks]
+
+    balance_data = make_balance(holdings, prices)
+    started = time.perf_counter()
+    for _ in ticks:
+        parse_totals(balance_data)
+    parse_elapsed = time.perf_counter() - started
+
+    book = PositionBook()
+    for code, (qty, avg_price) in holdings.items():
+        book.on_fill(code, SIDE_BUY, qty, avg_price)
+    started = time.perf_counter()
+    for code, price in ticks:
+        book.on_price(code, price)
+        book.unrealized_pnl
+    positions_elapsed = time.perf_counter() - started
+
+    # 변경분으로 유지한 합계가 종목별 합산과 같은지 확인
+    assert book.unrealized_pnl == sum(position.unrealized_pnl for position in book.positions.values())
+
+    print(f"보유 {args.positions}종목, 체결가 {args.ticks:,}건")
+    print(f"parse     {parse_elapsed / args.ticks * 1e6:8.2f}us/건")
+    print(f"positions {positions_elapsed / args.ticks * 1e6:8.2f}us/건  평가손익 {book.unrealized_pnl:,}원")
+
+
+if __name__ == "__main__":
+    main()
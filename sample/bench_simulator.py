@@ -0,0 +1,99 @@
+"""
+시뮬레이터 기반 벤치마크 (리눅스 headless 실행 가능)
+
+    python sample/bench_simulator.py --rate 2000 --seconds 10
+    QT_QPA_PLATFORM=offscreen python sample/bench_simulator.py --rate 2000 --seconds 10 --gui
+
+조건식 편입 이벤트를 초당 rate 건 발생시켜 KiwoomAPI → TradingEngine 주문 경로를 구동하고
+처리량과 dynamicCall 호출 횟수를 출력한다. --gui 를 주면 MainWindow 를 붙여 화면 갱신 비용까지 측정한다.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QCoreApplication
+
+from kiwoom_simulator import KiwoomSimulator
+from trading_engine import TradingEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=1000.0, help="조건식 이벤트 수/초")
+    parser.add_argument("--seconds", type=float, default=10.0, help="가상 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--conditions", type=int, default=1, help="동시에 감시할 조건식 수")
+    parser.add_argument("--initial-hits", type=int, default=0, help="조건식별 초기 검색 결과 종목 수")
+    parser.add_argument("--gui", action="store_true", help="MainWindow 를 붙여서 실행")
+    parser.add_argument("--record", metavar="PATH", help="OpenAPI 이벤트를 테이프에 녹화 (sample/replay_tape.py 로 재생)")
+    args = parser.parse_args()
+    record_path = os.path.abspath(args.record) if args.record else None
+
+    # config.json / trade_log.db 를 건드리지 않도록 임시 디렉터리에서 실행
+    work_dir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(ROOT, "config.json"), work_dir)
+    os.chdir(work_dir)
+
+    if args.gui:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+    else:
+        app = QCoreApplication(sys.argv[:1])
+    conditions = [f"시뮬조건식{i}" for i in range(args.conditions)]
+    sim = KiwoomSimulator(seed=args.seed, conditions=conditions, condition_rate=args.rate / args.conditions,
+                          initial_hits=args.initial_hits, realtime=False)
+    backend = sim
+    if record_path:
+        from event_tape import RecordingBackend
+        try:
+            backend = RecordingBackend(sim, record_path)
+        except FileExistsError as e:
+            parser.error(str(e))
+    engine = TradingEngine(backend=backend)
+    if args.gui:
+        from main import MainWindow
+        window = MainWindow(app=app, engine=engine)
+
+    engine.login()
+    engine.load_condition_list()
+    sim.run_for(1.0)
+    for condition_name in sim.condition_names:
+        engine.start_condition_monitoring(condition_name)
+
+    counter = {"events": 0}
+    engine.kiwoom.condition_event.connect(lambda *_: counter.__setitem__("events", counter["events"] + 1))
+
+    sim.call_counts.clear()
+    step = 0.01
+    started = time.perf_counter()
+    elapsed_virtual = 0.0
+    while elapsed_virtual < args.seconds:
+        sim.run_for(step)
+        app.processEvents()
+        elapsed_virtual += step
+    wall = time.perf_counter() - started
+
+    print(f"가상 시간: {args.seconds:.1f}s, 실제 소요: {wall:.3f}s")
+    print(f"조건식 이벤트: {counter['events']:,}건 ({counter['events'] / wall:,.0f}건/s)")
+    print("매수 파이프라인:", ", ".join(f"{key}={value:,.1f}" if isinstance(value, float) else f"{key}={value:,}"
+                                  for key, value in engine.pipeline.stats().items()))
+    print("주문 전송기:", ", ".join(f"{key}={value:,.0f}" for key, value in engine.kiwoom.dispatcher.stats().items()))
+    print("주문 지연 (가상 시간):")
+    for name, item in engine.kiwoom.latency.summary().items():
+        print(f"  {name:<8} p50 {item['p50']:8.1f}ms  p95 {item['p95']:8.1f}ms  p99 {item['p99']:8.1f}ms  ({item['count']:,}건)")
+    if record_path:
+        backend.close()
+        print(f"테이프: {record_path} ({backend.writer.count:,}건, {os.path.getsize(record_path):,} bytes)")
+    print("dynamicCall 호출 횟수:")
+    for name, count in sim.call_counts.most_common():
+        print(f"  {name:<24} {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+SlackNotifier 백그라운드 전송 확인 (로컬 HTTP 스텁 서버 사용, 실제 Slack 으로 전송하지 않음)
+
+    python sample/bench_slack.py --messages 20 --delay 0.2
+
+스텁 서버는 요청마다 delay 초 후 응답하고, 처음 fail 개 요청은 500 으로 응답한다.
+send_message 호출 시간(호출 스레드가 막히는 시간)과 실제 웹훅 요청 수를 출력한다.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from slack_notifier import SlackNotifier
+
+
+def make_handler(delay, fail, stats):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            stats["requests"] += 1
+            status = 500 if stats["requests"] <= fail else 200
+            self.send_response(status)
+            self.end_headers()
+            self.wfile.write(b"ok" if status == 200 else b"error")
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20, help="연속으로 보낼 체결 알림 수")
+    parser.add_argument("--delay", type=float, default=0.2, help="스텁 서버 응답 지연(초)")
+    parser.add_argument("--fail", type=int, default=1, help="500 으로 응답할 처음 요청 수")
+    args = parser.parse_args()
+
+    stats = {"requests": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.delay, args.fail, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+    for background in (False, True):
+        stats["requests"] = 0
+        notifier = SlackNotifier(url, background=background, backoff=0.1)
+        started = time.perf_counter()
+        for i in range(args.messages):
+            notifier.send_message(f"매수 체결 알림\n• 종목: 시뮬종목{i:03d}\n• 수량: {i + 1}주", "#36a64f")
+        blocked = time.perf_counter() - started
+        notifier.close()
+        total = time.perf_counter() - started
+
+        mode = "백그라운드" if background else "동기"
+        print(f"[{mode}] send_message {args.messages}회 호출 시간: {blocked * 1000:,.1f}ms, "
+              f"전송 완료: {total * 1000:,.1f}ms, 웹훅 요청: {stats['requests']}회, "
+              f"성공: {notifier.sent_count}, 실패: {notifier.failed_count}, 버림: {notifier.dropped_count}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+opw00018 멀티데이터 추출 방식 비교 (필드별 GetCommData vs GetCommDataEx 일괄 조회)
+
+    QT_QPA_PLATFORM=offscreen python sample/bench_tr_extraction.py --holdings 100 --call-latency-us 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication
+
+from kiwoom_api import KiwoomAPI
+from kiwoom_simulator import KiwoomSimulator
+
+
+def run(api, sim, bulk, repeat):
+    api.bulk_tr_extraction = bulk
+    received = []
+    api.balance_event.connect(received.append)
+
+    sim.call_counts.clear()
+    elapsed = 0.0
+    for _ in range(repeat):
+        api.request_balance(sim.accounts[0])
+        started = time.perf_counter()
+        sim.run_for(1.0)
+        elapsed += time.perf_counter() - started
+
+    api.balance_event.disconnect(received.append)
+    calls = sum(sim.call_counts.values()) / repeat
+    return elapsed / repeat, calls, len(received[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--holdings", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--call-latency-us", type=int, default=0, help="dynamicCall 1회당 모사 비용")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv[:1])
+    sim = KiwoomSimulator(stock_count=args.holdings, realtime=False, enforce_limits=False,
+                          page_size=args.holdings, call_latency_us=args.call_latency_us)
+    for code in sim.codes:
+        sim.holdings[code] = [10, sim.prices[code]]
+
+    api = KiwoomAPI(backend=sim, db_path=os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+    for label, bulk in (("필드별 GetCommData", False), ("GetCommDataEx 일괄", True)):
+        per_call, calls, rows = run(api, sim, bulk, args.repeat)
+        print(f"{label:<20} 행 {rows:>4}개 | 1회 처리 {per_call * 1000:8.3f} ms | dynamicCall {calls:6.0f}회")
+
+
+if __name__ == "__main__":
+    main()
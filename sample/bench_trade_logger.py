@@ -0,0 +1,114 @@
+"""
+매매 기록 저장 벤치마크: 건별 커밋(TradeLogger_Sqlite3) vs 배치 저장(TradeJournal)
+
+    python sample/bench_trade_logger.py --rows 5000
+
+호출 스레드가 log_trade 에 쓰는 시간과 DB 에 모두 저장될 때까지의 처리량(rows/s)을 출력한다.
+--query-rows 를 지정하면 해당 건수의 기록을 만든 뒤 TradeStats 손익 조회 시간을 측정한다.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trade_logger import TradeLogger_Sqlite3, TradeJournal, TradeStats, INSERT_TRADE, make_trade_row, migrate
+
+
+def count_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def bench_per_row(db_path, rows):
+    logger = TradeLogger_Sqlite3(db_path=db_path)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 건별 print 출력 제외
+        for i in range(rows):
+            logger.log_trade(f"{i % 200:06d}", "매수", 10, 50000 + i)
+    elapsed = time.perf_counter() - started
+    logger.conn.close()
+    return elapsed, elapsed
+
+
+def bench_journal(db_path, rows):
+    journal = TradeJournal(db_path=db_path)
+    started = time.perf_counter()
+    for i in range(rows):
+        journal.log_trade(f"{i % 200:06d}", "매수", 10, 50000 + i)
+    blocked = time.perf_counter() - started
+    journal.close()
+    return blocked, time.perf_counter() - started
+
+
+def bench_queries(db_path, rows):
+    """1년치 체결 기록 rows 건 생성 후 손익 조회 시간 측정"""
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    rng = random.Random(0)
+    start = datetime(2025, 1, 2, 9, 0)
+    batch = []
+    for i in range(rows):
+        when = start + timedelta(seconds=i * 365 * 24 * 3600 // rows)
+        side = "매수" if i % 2 == 0 else "매도"
+        batch.append(make_trade_row(f"{rng.randrange(2000):06d}", side, rng.randint(1, 100), rng.randint(1000, 200000),
+                                    condition_name=f"조건식{rng.randrange(5)}", fee=rng.randint(0, 500),
+                                    realized_pnl=rng.randint(-50000, 50000) if side == "매도" else 0, when=when))
+        if len(batch) >= 100000:
+            with conn:
+                conn.executemany(INSERT_TRADE, batch)
+            batch = []
+    with conn:
+        conn.executemany(INSERT_TRADE, batch)
+    conn.close()
+
+    stats = TradeStats(db_path)
+    queries = {
+        "일자별 (1일)": lambda: stats.realized_pnl_by_day(20250603, 20250603),
+        "일자별 (1개월)": lambda: stats.realized_pnl_by_day(20250601, 20250630),
+        "종목별 (1일)": lambda: stats.realized_pnl_by_code(20250603, 20250603),
+        "조건식별 (1일)": lambda: stats.realized_pnl_by_condition(20250603, 20250603),
+        "종목 체결 목록 (최근 100건)": lambda: stats.trades(code="000100", limit=100),
+    }
+    for name, query in queries.items():
+        query()
+        repeat = 20
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = query()
+        elapsed = (time.perf_counter() - started) / repeat
+        print(f"[조회] {name:<24} {elapsed * 1000:8.3f}ms ({len(result)}행)")
+    stats.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000, help="저장할 체결 기록 수")
+    parser.add_argument("--query-rows", type=int, default=0, help="손익 조회 측정용 체결 기록 수 (예: 1000000)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    for name, bench in (("건별 커밋", bench_per_row), ("배치 저장(WAL)", bench_journal)):
+        db_path = os.path.join(work_dir, f"{bench.__name__}.db")
+        blocked, total = bench(db_path, args.rows)
+        stored = count_rows(db_path)
+        print(f"[{name}] 호출 스레드: {blocked * 1000:,.1f}ms ({blocked / args.rows * 1e6:,.1f}us/건), "
+              f"저장 완료: {total * 1000:,.1f}ms ({stored / total:,.0f} rows/s), 저장: {stored:,}건")
+
+    if args.query_rows:
+        bench_queries(os.path.join(work_dir, "stats.db"), args.query_rows)
+
+
+if __name__ == "__main__":
+    main()
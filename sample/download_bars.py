@@ -0,0 +1,95 @@
+"""
+과거 분봉/일봉 일괄 수집 (장 마감 후 야간 실행용)
+
+    python sample/download_bars.py --root bars                           # 실제 키움 OpenAPI, 전체 종목 1분봉
+    python sample/download_bars.py --root bars --interval daily --codes 005930 000660
+    python sample/download_bars.py --root /tmp/bars --backend simulator --limit 50
+
+같은 --root 로 다시 실행하면 종목별 마지막 봉 이후만 받는다.
+조회 제한(초당/시간당)은 TrScheduler 가 지키므로 종목 수가 많으면 몇 시간 걸릴 수 있다.
+시뮬레이터는 가상 시계로 최대 속도로 진행하며, 실제 조회 제한 기준의 소요 시간(가상 시간)을 출력한다.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bar_data import NpyBarStore
+from chart_downloader import ChartDownloader
+from kiwoom_api import KiwoomAPI, CHART_MINUTE, CHART_DAILY
+from kiwoom_backend import create_backend, BACKEND_KIWOOM, BACKEND_SIMULATOR
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default="bars", help="저장소 디렉터리")
+    parser.add_argument("--interval", choices=("minute", "daily"), default="minute")
+    parser.add_argument("--days", type=int, default=30, help="저장된 봉이 없는 종목을 받을 기간(일)")
+    parser.add_argument("--codes", nargs="*", help="종목코드 (기본: 종목 마스터 전체)")
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 수집할 종목 수")
+    parser.add_argument("--max-pages", type=int, default=None, help="종목당 최대 페이지 수")
+    parser.add_argument("--backend", choices=(BACKEND_KIWOOM, BACKEND_SIMULATOR), default=BACKEND_KIWOOM)
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+    tr_code = CHART_MINUTE if args.interval == "minute" else CHART_DAILY
+
+    # trade_log.db / stock_master.json 을 건드리지 않도록 임시 디렉터리에서 실행
+    os.chdir(tempfile.mkdtemp())
+    if args.backend == BACKEND_KIWOOM:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+        backend = create_backend(BACKEND_KIWOOM)
+    else:
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication(sys.argv[:1])
+        backend = create_backend(BACKEND_SIMULATOR, realtime=False)
+    kiwoom = KiwoomAPI(backend=backend)
+
+    def on_progress(code, added, done, total):
+        stats = downloader.stats()
+        print(f"[{done:,}/{total:,}] {code} +{added:,}봉 (조회 {stats['requests']:,}회, {stats['elapsed']:,.0f}s)", flush=True)
+
+    downloader = ChartDownloader(kiwoom, root, tr_code=tr_code, days=args.days, max_pages=args.max_pages,
+                                 on_progress=on_progress, on_finished=lambda stats: app.quit(),
+                                 logger=kiwoom.logger)
+
+    def on_login(ok):
+        if not ok:
+            print("로그인 실패")
+            app.quit()
+            return
+        codes = args.codes or sorted(kiwoom.master.stocks)
+        downloader.start(codes[:args.limit])
+
+    kiwoom.login_event.connect(on_login)
+    kiwoom.comm_connect()
+
+    started = time.perf_counter()
+    if args.backend == BACKEND_SIMULATOR:
+        backend.run_for(1.0)
+        while downloader.is_running():
+            backend.run_for(60.0)
+    else:
+        app.exec_()
+    wall = time.perf_counter() - started
+    kiwoom.close()
+
+    stats = downloader.stats()
+    store = NpyBarStore(root, downloader.store.interval)
+    print(f"수집: {stats['done']:,}종목, {stats['bars']:,}봉, 조회 {stats['requests']:,}회, 실패 {stats['failed']:,}")
+    print(f"소요: {stats['elapsed']:,.1f}s (조회 제한 기준), 실행 {wall:.2f}s")
+    print(f"저장소: {store.directory} ({len(store.codes()):,}종목)")
+    codes = store.codes()[:200]
+    started = time.perf_counter()
+    bars = sum(len(store.load(code)) for code in codes)
+    elapsed = time.perf_counter() - started
+    if codes:
+        print(f"읽기: {len(codes):,}종목 {bars:,}봉 {elapsed * 1000:.1f}ms ({bars / max(elapsed, 1e-9) / 1e6:.1f}M봉/s)")
+
+
+if __name__ == "__main__":
+    main()
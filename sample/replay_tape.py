@@ -0,0 +1,86 @@
+"""
+이벤트 테이프 재생 (장중 상황 재현 / 회귀 확인 / 벤치마크)
+
+main.py --record 또는 sample/bench_simulator.py --record 로 녹화한 테이프를 재생한다.
+
+    python sample/bench_simulator.py --seconds 10 --record /tmp/sim.tape
+    python sample/replay_tape.py /tmp/sim.tape
+    python sample/replay_tape.py /tmp/sim.tape --speed 1     # 녹화 속도로 재생
+
+테이프의 OpenAPI 이벤트를 KiwoomAPI → TradingEngine 에 그대로 다시 넣고 주문/체결 결과와 재생 지표를 출력한다.
+조건식 목록을 받으면 --conditions 로 지정한 조건식(기본: 전체)을 감시 시작한다.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QCoreApplication
+
+from event_tape import ReplayBackend
+from order_book import ORDER_STATE_NAMES
+from trading_engine import TradingEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tape", help="이벤트 테이프 경로")
+    parser.add_argument("--speed", type=float, default=None, help="재생 배속 (기본: 최대 속도)")
+    parser.add_argument("--conditions", nargs="*", default=None, help="감시 시작할 조건식 (기본: 전체)")
+    args = parser.parse_args()
+    tape_path = os.path.abspath(args.tape)
+
+    # config.json / trade_log.db 를 건드리지 않도록 임시 디렉터리에서 실행
+    work_dir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(ROOT, "config.json"), work_dir)
+    os.chdir(work_dir)
+
+    app = QCoreApplication(sys.argv[:1])
+    replay = ReplayBackend(tape_path, speed=args.speed)
+    engine = TradingEngine(backend=replay)
+
+    def on_condition_list(names):
+        for name in names:
+            if args.conditions is None or name in args.conditions:
+                engine.start_condition_monitoring(name)
+
+    engine.kiwoom.condition_list_event.connect(on_condition_list)
+    engine.login()
+    engine.load_condition_list()
+
+    started = time.perf_counter()
+    if args.speed:
+        replay.replay_finished.connect(lambda: QCoreApplication.instance().quit())
+        app.exec_()
+    else:
+        replay.run()
+    wall = time.perf_counter() - started
+    engine.kiwoom.close()
+
+    stats = replay.stats()
+    print(f"테이프: {tape_path}")
+    print(f"녹화 시간: {stats['time']:.1f}s, 재생 소요: {wall:.3f}s ({stats['events'] / wall:,.0f} 이벤트/s)")
+    print("재생:", ", ".join(f"{key}={value:,}" for key, value in stats.items() if key != "time"))
+    print("매수 파이프라인:", ", ".join(f"{key}={value:,.1f}" if isinstance(value, float) else f"{key}={value:,}"
+                                  for key, value in engine.pipeline.stats().items()))
+    print("주문 전송기:", ", ".join(f"{key}={value:,.0f}" for key, value in engine.kiwoom.dispatcher.stats().items()))
+    states = {}
+    for order in engine.kiwoom.orders.orders.values():
+        name = ORDER_STATE_NAMES.get(order.state, order.state)
+        states[name] = states.get(name, 0) + 1
+    print("주문 상태:", ", ".join(f"{name}={count:,}" for name, count in sorted(states.items())))
+    print("주문 지연 (녹화 시각 기준):")
+    for name, item in engine.kiwoom.latency.summary().items():
+        print(f"  {name:<8} p50 {item['p50']:8.1f}ms  p95 {item['p95']:8.1f}ms  p99 {item['p99']:8.1f}ms  ({item['count']:,}건)")
+    print("dynamicCall 호출 횟수:")
+    for name, count in replay.call_counts.most_common():
+        print(f"  {name:<24} {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
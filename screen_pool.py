@@ -0,0 +1,99 @@
+"""
+화면번호 관리
+
+OpenAPI 는 화면번호를 최대 200개까지 사용할 수 있고, 화면번호 하나에 실시간 등록 종목은 최대 100개이다.
+TR 조회, 조건검색, 주문, 실시간 시세 등록에 필요한 화면번호를 빌려주고(lease) 사용이 끝나면 반납(release)받는다.
+반납 시 DisconnectRealData 로 해당 화면의 실시간 데이터를 해제한다.
+"""
+
+MAX_SCREENS = 200
+MAX_CODES_PER_SCREEN = 100
+
+
+class ScreenPool:
+    def __init__(self, kiwoom, first_screen=1000, max_screens=MAX_SCREENS, logger=None):
+        """
+        Args:
+            kiwoom: OpenAPI 백엔드
+            first_screen (int): 첫 화면번호
+            max_screens (int): 최대 화면 수
+        """
+        self.kiwoom = kiwoom
+        self.logger = logger
+        self._free = [f"{first_screen + i:04d}" for i in reversed(range(max_screens))]
+        self.leased = {}        # 화면번호 -> 용도
+        self.real_codes = {}    # 실시간 화면번호 -> 등록 종목 set
+        self.code_screens = {}  # 종목코드 -> 실시간 화면번호
+
+    def lease(self, purpose=""):
+        """
+        사용 가능한 화면번호 할당
+        Returns:
+            str: 화면번호 (모두 사용 중이면 None)
+        """
+        if not self._free:
+            if self.logger:
+                self.logger.error(f"[화면번호 부족] {purpose} - 사용 중 {len(self.leased)}개")
+            return None
+        screen_no = self._free.pop()
+        self.leased[screen_no] = purpose
+        return screen_no
+
+    def release(self, screen_no):
+        """화면번호 반납 (실시간 데이터 해제)"""
+        if screen_no not in self.leased:
+            return
+        del self.leased[screen_no]
+        for code in self.real_codes.pop(screen_no, ()):
+            self.code_screens.pop(code, None)
+        self.kiwoom.dynamicCall("DisconnectRealData(QString)", screen_no)
+        self._free.append(screen_no)
+
+    def available(self):
+        return len(self._free)
+
+    # ------------------------------------------------------------------
+    # 실시간 등록 종목
+    # ------------------------------------------------------------------
+    def assign_real_codes(self, codes):
+        """
+        실시간 등록할 종목을 화면번호에 배정 (화면당 최대 MAX_CODES_PER_SCREEN 종목)
+        Returns:
+            dict: 화면번호 -> 새로 배정된 종목 리스트 (화면번호가 부족하면 일부 종목은 배정되지 않음)
+        """
+        assigned = {}
+        pending = [code for code in codes if code not in self.code_screens]
+        for screen_no, screen_codes in self.real_codes.items():
+            if not pending:
+                break
+            room = MAX_CODES_PER_SCREEN - len(screen_codes)
+            if room > 0:
+                assigned[screen_no], pending = pending[:room], pending[room:]
+
+        while pending:
+            screen_no = self.lease("실시간")
+            if screen_no is None:
+                break
+            self.real_codes[screen_no] = set()
+            assigned[screen_no], pending = pending[:MAX_CODES_PER_SCREEN], pending[MAX_CODES_PER_SCREEN:]
+
+        for screen_no, screen_codes in assigned.items():
+            self.real_codes[screen_no].update(screen_codes)
+            for code in screen_codes:
+                self.code_screens[code] = screen_no
+        return assigned
+
+    def remove_real_code(self, code):
+        """
+        실시간 등록 종목 제거. 화면에 남은 종목이 없으면 화면번호 반납
+        Returns:
+            str: 종목이 등록되어 있던 화면번호 (없으면 None)
+        """
+        screen_no = self.code_screens.pop(code, None)
+        if screen_no is None:
+            return None
+        screen_codes = self.real_codes[screen_no]
+        screen_codes.discard(code)
+        if not screen_codes:
+            self.release(screen_no)
+        return screen_no
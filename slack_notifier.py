@@ -1,15 +1,55 @@
 import requests
 import json
+import queue
+import threading
+import time
 from datetime import datetime
 
 class SlackNotifier:
-    def __init__(self, webhook_url):
+    """
+    Slack Incoming Webhook 알림
+
+    send_message 는 메시지를 큐에 넣고 바로 반환하며, 백그라운드 스레드가 전송한다.
+    - requests.Session 으로 연결 재사용, 요청마다 timeout 적용
+    - 실패(네트워크 오류, 429, 5xx) 시 지수 백오프로 재시도 (429 는 Retry-After 우선)
+    - coalesce_window 초 안에 몰린 메시지는 하나의 요약 메시지로 묶어서 전송
+    - 큐가 가득 차면 메시지를 버리고 dropped_count 증가 (매매 스레드를 막지 않음)
+    """
+    def __init__(self, webhook_url, background=True, queue_size=1000, timeout=5.0,
+                 max_retries=3, backoff=1.0, coalesce_window=1.0, max_batch=20):
         """
         SlackNotifier 초기화
         Args:
             webhook_url (str): Slack Incoming Webhook URL
+            background (bool): False 이면 send_message 호출 스레드에서 바로 전송
+            queue_size (int): 전송 대기 큐 최대 크기
+            timeout (float): 요청 타임아웃(초)
+            max_retries (int): 실패 시 재시도 횟수
+            backoff (float): 첫 재시도 대기 시간(초), 재시도마다 2배
+            coalesce_window (float): 묶어서 보낼 메시지를 기다리는 시간(초)
+            max_batch (int): 요약 메시지 하나에 묶는 최대 메시지 수
         """
         self.webhook_url = webhook_url
+        self.background = background
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+        self.sent_count = 0      # 전송 성공한 요청 수
+        self.failed_count = 0    # 재시도 후에도 실패한 요청 수
+        self.dropped_count = 0   # 큐가 가득 차서 버린 메시지 수
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="SlackNotifier", daemon=True)
+            self._thread.start()
 
     def send_message(self, message, color="#36a64f"):
         """
@@ -18,51 +58,134 @@ class SlackNotifier:
             message (str): 전송할 메시지
             color (str): 메시지 색상 (기본값: 초록색)
         Returns:
-            bool: 전송 성공 여부
+            bool: 전송 성공 여부 (백그라운드 전송이면 큐 등록 여부)
         """
+        if not self.background:
+            return self._post([(message, color, datetime.now())])
+
+        if self._closed:
+            return False
         try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            payload = {
-                "attachments": [
-                    {
-                        "color": color,
-                        "blocks": [
-                            {
-                                "type": "section",
-                                "text": {
+            self._queue.put_nowait((message, color, datetime.now()))
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+
+    def close(self, timeout=10.0):
+        """대기 중인 메시지를 모두 전송한 뒤 전송 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)  # 종료 표시
+            self._thread.join(timeout)
+        self.session.close()
+
+    def pending(self):
+        """전송 대기 중인 메시지 수"""
+        return self._queue.qsize()
+
+    def _run(self):
+        """전송 스레드: 메시지를 coalesce_window 동안 모아서 한 번에 전송"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.coalesce_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._post(batch)
+
+        # 종료 요청 이후 남은 메시지 전송
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        for start in range(0, len(batch), self.max_batch):
+            self._post(batch[start:start + self.max_batch])
+
+    def _build_payload(self, batch):
+        """메시지 하나는 그대로, 여러 개는 요약 메시지 하나로 구성"""
+        if len(batch) == 1:
+            message, color, created = batch[0]
+            text = f"*{message}*"
+        else:
+            colors = {color for _, color, _ in batch}
+            color = colors.pop() if len(colors) == 1 else "#808080"
+            created = batch[-1][2]
+            lines = [f"*알림 {len(batch)}건*"]
+            for message, _, item_time in batch:
+                lines.append(f"`{item_time.strftime('%H:%M:%S')}` {message}")
+            text = "\n".join(lines)
+
+        return {
+            "attachments": [
+                {
+                    "color": color,
+                    "blocks": [
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": text[:3000]  # section 블록 텍스트 최대 길이
+                            }
+                        },
+                        {
+                            "type": "context",
+                            "elements": [
+                                {
                                     "type": "mrkdwn",
-                                    "text": f"*{message}*"
+                                    "text": f"🕒 {created.strftime('%Y-%m-%d %H:%M:%S')}"
                                 }
-                            },
-                            {
-                                "type": "context",
-                                "elements": [
-                                    {
-                                        "type": "mrkdwn",
-                                        "text": f"🕒 {current_time}"
-                                    }
-                                ]
-                            }
-                        ]
-                    }
-                ]
-            }
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
 
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                return True
-            else:
-                print(f"Slack 메시지 전송 실패: {response.status_code} - {response.text}")
-                return False
-
-        except Exception as e:
-            print(f"Slack 메시지 전송 중 오류 발생: {str(e)}")
-            return False
+    def _post(self, batch):
+        """웹훅 전송 (재시도 포함)"""
+        data = json.dumps(self._build_payload(batch))
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            try:
+                response = self.session.post(self.webhook_url, data=data, timeout=self.timeout)
+                if response.status_code == 200:
+                    self.sent_count += 1
+                    return True
+                if response.status_code == 429:
+                    try:
+                        delay = max(delay, float(response.headers.get("Retry-After", 0)))
+                    except ValueError:
+                        pass
+                elif response.status_code < 500:
+                    # 잘못된 요청/URL 은 재시도해도 실패
+                    print(f"Slack 메시지 전송 실패: {response.status_code} - {response.text}")
+                    break
+                print(f"Slack 메시지 전송 실패: {response.status_code} (시도 {attempt + 1}/{self.max_retries + 1})")
+            except requests.RequestException as e:
+                print(f"Slack 메시지 전송 중 오류 발생: {str(e)} (시도 {attempt + 1}/{self.max_retries + 1})")
+            if attempt < self.max_retries:
+                time.sleep(delay)
+
+        self.failed_count += 1
+        return False
 
     def send_trade_signal(self, trade_type, stock_code, stock_name, price, quantity):
         """
@@ -95,35 +218,35 @@ class SlackNotifier:
         """
         return self.send_message(f"⚠️ 오류 발생\n{error_message}", "#ff0000")
 
-    def send_balance_update(self, balance_data):
+    def send_balance_update(self, positions, summary=None):
         """
         잔고 업데이트 정보 전송
         Args:
-            balance_data (list): 잔고 정보 리스트
+            positions (list): 보유 종목 (PositionBook.snapshot() 항목 + name)
+            summary (dict): 계좌 합계 (PositionBook.summary(), 없으면 positions 로 합산)
         """
-        if not balance_data:
+        if not positions:
             return self.send_message("💰 보유 종목 없음")
 
         message = "💰 잔고 현황\n"
-        total_eval_amount = 0
-        total_profit_loss = 0
-
-        for item in balance_data:
-            profit_rate = float(item.get('손익률', '0').replace('%', ''))
-            eval_amount = int(item.get('평가금액', '0').replace(',', ''))
-            
+        for item in positions:
             message += (
-                f"• {item['종목명']}\n"
-                f"  수량: {item['보유수량']}주 | 평가금액: {eval_amount:,}원 | 손익률: {profit_rate}%\n"
+                f"• {item.get('name') or item['code']}\n"
+                f"  수량: {item['quantity']:,}주 | 평가금액: {item['eval_amount']:,}원 | "
+                f"평가손익: {item['unrealized_pnl']:,}원 ({item['rate']:.2f}%)\n"
             )
-            
-            total_eval_amount += eval_amount
-            total_profit_loss += eval_amount * (profit_rate / 100)
 
-        message += f"\n📊 총평가금액: {total_eval_amount:,}원"
-        message += f"\n📈 총평가손익: {total_profit_loss:,.0f}원"
-        
-        color = "#36a64f" if total_profit_loss >= 0 else "#ff4444"
+        if summary is None:
+            summary = {
+                "total_eval": sum(item["eval_amount"] for item in positions),
+                "unrealized_pnl": sum(item["unrealized_pnl"] for item in positions),
+            }
+        message += f"\n📊 총평가금액: {summary['total_eval']:,}원"
+        message += f"\n📈 총평가손익: {summary['unrealized_pnl']:,}원"
+        if "realized_pnl" in summary:
+            message += f"\n💵 실현손익: {summary['realized_pnl']:,}원 (수수료 {summary['fees']:,}원, 세금 {summary['taxes']:,}원)"
+
+        color = "#36a64f" if summary["unrealized_pnl"] >= 0 else "#ff4444"
         return self.send_message(message, color)
 
 def main():
@@ -170,23 +293,28 @@ def main():
     
     # 6. 잔고 업데이트 전송 예제
     print("\n6. 잔고 업데이트 전송")
-    balance_data = [
+    positions = [
         {
-            "종목명": "삼성전자",
-            "종목코드": "005930",
-            "보유수량": "100",
-            "평가금액": "7,000,000",
-            "손익률": "5.5%"
+            "code": "005930",
+            "name": "삼성전자",
+            "quantity": 100,
+            "eval_amount": 7_000_000,
+            "unrealized_pnl": 364_929,
+            "rate": 5.5,
         },
         {
-            "종목명": "NAVER",
-            "종목코드": "035420",
-            "보유수량": "20",
-            "평가금액": "6,000,000",
-            "손익률": "-2.3%"
+            "code": "035420",
+            "name": "NAVER",
+            "quantity": 20,
+            "eval_amount": 6_000_000,
+            "unrealized_pnl": -141_249,
+            "rate": -2.3,
         }
     ]
-    notifier.send_balance_update(balance_data)
+    notifier.send_balance_update(positions)
+
+    # 대기 중인 메시지 전송 후 종료
+    notifier.close()
 
 if __name__ == "__main__":
     # 사용 방법 출력
@@ -0,0 +1,163 @@
+"""
+종목 마스터 캐시
+
+로그인 직후 GetCodeListByMarket / GetMasterCodeName / GetMasterConstruction / GetMasterLastPrice 로
+전체 종목 정보를 한 번 읽어 두고, 이후 종목명/전일가 조회는 COM 호출 없이 dict 에서 찾는다.
+읽은 정보는 파일(JSON)로 저장하여 같은 날 재시작할 때는 파일에서 바로 불러오고,
+날짜가 바뀐 첫 로그인(세션 시작)에서 무효화 후 다시 읽는다.
+"""
+import json
+import os
+from datetime import date
+
+MARKET_KOSPI = "0"
+MARKET_KOSDAQ = "10"
+MARKETS = (MARKET_KOSPI, MARKET_KOSDAQ)
+
+# 종목 정보 튜플 인덱스
+NAME, MARKET, CONSTRUCTION, LAST_PRICE = range(4)
+
+
+class StockMaster:
+    def __init__(self, kiwoom, path="stock_master.json", markets=MARKETS, logger=None):
+        """
+        Args:
+            kiwoom: OpenAPI 백엔드
+            path (str): 캐시 파일 경로 (None 이면 파일 저장 안 함)
+            markets (tuple): 읽을 시장 구분 (GetCodeListByMarket 인자)
+        """
+        self.kiwoom = kiwoom
+        self.path = path
+        self.markets = markets
+        self.logger = logger
+        self.session_date = None  # 캐시를 만든 날짜 (YYYY-MM-DD)
+        self.stocks = {}          # 종목코드 -> (종목명, 시장, 감리구분, 전일가)
+        self.com_calls = 0        # 캐시에 없어 COM 으로 조회한 횟수
+
+    # ------------------------------------------------------------------
+    # 적재 / 무효화
+    # ------------------------------------------------------------------
+    def open_session(self, today=None):
+        """
+        세션 시작(로그인 성공) 시 호출. 캐시가 오늘 것이 아니면 무효화하고 다시 읽는다.
+        Returns:
+            bool: OpenAPI 에서 새로 읽었으면 True, 파일/메모리 캐시를 사용했으면 False
+        """
+        today = (today or date.today()).isoformat()
+        if self.session_date == today and self.stocks:
+            return False
+        if self.load_file() and self.session_date == today:
+            return False
+        self.invalidate()
+        self.refresh(today)
+        return True
+
+    def invalidate(self):
+        """메모리/파일 캐시 삭제"""
+        self.stocks = {}
+        self.session_date = None
+        if self.path and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                self._log(f"[종목 마스터] 캐시 파일 삭제 실패: {e}")
+
+    def refresh(self, today=None):
+        """OpenAPI 에서 전체 종목 정보를 읽어 캐시/파일 갱신"""
+        stocks = {}
+        for market in self.markets:
+            codes = self.kiwoom.dynamicCall("GetCodeListByMarket(QString)", market)
+            for code in codes.split(';'):
+                if not code or code in stocks:
+                    continue
+                stocks[code] = (
+                    self.kiwoom.dynamicCall("GetMasterCodeName(QString)", code).strip(),
+                    market,
+                    self.kiwoom.dynamicCall("GetMasterConstruction(QString)", code).strip(),
+                    _to_price(self.kiwoom.dynamicCall("GetMasterLastPrice(QString)", code)),
+                )
+        self.stocks = stocks
+        self.session_date = (today or date.today().isoformat())
+        self._log(f"[종목 마스터] {len(stocks)}종목 적재")
+        self.save_file()
+
+    def load_file(self):
+        """캐시 파일 읽기"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.session_date = data["date"]
+            self.stocks = {code: tuple(values) for code, values in data["stocks"].items()}
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._log(f"[종목 마스터] 캐시 파일 읽기 실패: {e}")
+            return False
+
+    def save_file(self):
+        """캐시 파일 저장 (공백 없는 JSON)"""
+        if not self.path:
+            return False
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump({"date": self.session_date, "stocks": self.stocks}, file,
+                          ensure_ascii=False, separators=(",", ":"))
+            return True
+        except OSError as e:
+            self._log(f"[종목 마스터] 캐시 파일 저장 실패: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # 조회 (O(1))
+    # ------------------------------------------------------------------
+    def get(self, code):
+        """종목 정보 튜플 (캐시에 없으면 COM 으로 조회 후 캐시)"""
+        stock = self.stocks.get(code)
+        if stock is None and code:
+            self.com_calls += 1
+            name = self.kiwoom.dynamicCall("GetMasterCodeName(QString)", code).strip()
+            stock = (
+                name,
+                "",
+                self.kiwoom.dynamicCall("GetMasterConstruction(QString)", code).strip(),
+                _to_price(self.kiwoom.dynamicCall("GetMasterLastPrice(QString)", code)),
+            )
+            if name:  # 존재하지 않는 종목코드는 캐시하지 않음
+                self.stocks[code] = stock
+        return stock
+
+    def name(self, code):
+        stock = self.get(code)
+        return stock[NAME] if stock else ""
+
+    def market(self, code):
+        stock = self.get(code)
+        return stock[MARKET] if stock else ""
+
+    def construction(self, code):
+        """감리구분 (정상, 투자주의, 투자경고, 투자위험, 투자주의환기종목)"""
+        stock = self.get(code)
+        return stock[CONSTRUCTION] if stock else ""
+
+    def last_price(self, code):
+        """전일가"""
+        stock = self.get(code)
+        return stock[LAST_PRICE] if stock else 0
+
+    def __contains__(self, code):
+        return code in self.stocks
+
+    def __len__(self):
+        return len(self.stocks)
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.debug(message)
+
+
+def _to_price(value):
+    try:
+        return abs(int(str(value).strip() or 0))
+    except ValueError:
+        return 0
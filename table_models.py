@@ -0,0 +1,574 @@
+"""
+테이블 모델 (QTableView 용)
+
+QTableWidget 처럼 갱신할 때마다 모든 행/아이템을 다시 만들지 않고, 종목코드로 행을 찾아
+바뀐 셀만 dataChanged 로 알린다. 선택/체크 상태는 종목코드 기준으로 유지된다.
+"""
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+from position_book import profit_rate
+
+RED = QBrush(QColor('red'))
+BLUE = QBrush(QColor('blue'))
+TOTAL_BACKGROUND = QBrush(QColor(240, 240, 240))
+
+
+def _profit_brush(value):
+    if value > 0:
+        return RED
+    if value < 0:
+        return BLUE
+    return None
+
+
+class BalanceTableModel(QAbstractTableModel):
+    """
+    잔고 테이블 모델 (종목코드 -> 행)
+
+    set_snapshot: 잔고 조회 결과 반영 (추가/삭제된 행만 insert/remove, 값이 바뀐 셀만 dataChanged)
+    upsert/remove: 체결/잔고 보정으로 바뀐 종목 한 행만 반영
+    update_price: 실시간 체결가 반영 (flush_interval_ms 마다 모아서 한 번에 dataChanged)
+    마지막 행은 총계 행이다.
+    """
+    HEADERS = ['', '종목코드', '종목명', '보유수량', '매입가', '현재가', '평가금액', '손익률']
+    COL_CHECK, COL_CODE, COL_NAME, COL_QTY, COL_AVG, COL_PRICE, COL_EVAL, COL_RATE = range(8)
+    FIELDS = (None, "code", "name", "quantity", "avg_price", "price", "eval_amount", "rate")
+
+    def __init__(self, parent=None, flush_interval_ms=200):
+        super().__init__(parent)
+        self._codes = []       # 행 순서
+        self._rows = {}        # 종목코드 -> 잔고 항목 dict
+        self._row_index = {}   # 종목코드 -> 행 번호
+        self._checked = set()  # 체크된 종목코드
+        self._total = None     # 총계 (평가금액, 손익률)
+        self._has_total = False  # 총계 행 표시 여부
+        self._sum_eval = 0     # 행 평가금액 합계 (행이 바뀔 때 변경분만 반영)
+        self._sum_cost = 0     # 행 매입금액 합계
+        self._pending_prices = {}
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush_prices)
+
+    # ------------------------------------------------------------------
+    # QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._codes) + (1 if self._has_total else 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == self.COL_CHECK and index.row() < len(self._codes):
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if row == len(self._codes):
+            return self._total_data(col, role)
+
+        item = self._rows[self._codes[row]]
+        if role == Qt.DisplayRole:
+            if col == self.COL_CHECK:
+                return None
+            value = item[self.FIELDS[col]]
+            if col == self.COL_RATE:
+                return f"{value:.2f}%"
+            if col in (self.COL_QTY, self.COL_AVG, self.COL_PRICE, self.COL_EVAL):
+                return f"{value:,}"
+            return value
+        if role == Qt.CheckStateRole and col == self.COL_CHECK:
+            return Qt.Checked if item["code"] in self._checked else Qt.Unchecked
+        if role == Qt.ForegroundRole and col == self.COL_RATE:
+            return _profit_brush(item["rate"])
+        if role == Qt.TextAlignmentRole and col >= self.COL_QTY:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != self.COL_CHECK or index.row() >= len(self._codes):
+            return False
+        code = self._codes[index.row()]
+        if value == Qt.Checked:
+            self._checked.add(code)
+        else:
+            self._checked.discard(code)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def _total_data(self, col, role):
+        if self._total is None:
+            return None
+        eval_amount, rate = self._total
+        if role == Qt.DisplayRole:
+            if col == self.COL_CHECK:
+                return '총계'
+            if col == self.COL_EVAL:
+                return f"{eval_amount:,}"
+            if col == self.COL_RATE and rate is not None:
+                return f"{rate:.2f}%"
+        elif role == Qt.ForegroundRole and col == self.COL_RATE and rate is not None:
+            return _profit_brush(rate)
+        elif role == Qt.BackgroundRole:
+            return TOTAL_BACKGROUND
+        elif role == Qt.FontRole:
+            font = QFont()
+            font.setBold(True)
+            return font
+        elif role == Qt.TextAlignmentRole and col >= self.COL_QTY:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def set_snapshot(self, items):
+        """
+        잔고 조회 결과 반영
+        Args:
+            items (list): dict(code, name, quantity, avg_price, cost, price, eval_amount, rate) (Position.as_dict + name)
+        """
+        new_rows = {item["code"]: item for item in items}
+
+        # 삭제된 종목: 뒤에서부터 행 제거
+        removed = [code for code in self._codes if code not in new_rows]
+        for code in sorted(removed, key=self._row_index.get, reverse=True):
+            row = self._row_index[code]
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._codes[row]
+            self._account(self._rows.pop(code), -1)
+            self._checked.discard(code)
+            self.endRemoveRows()
+        if removed:
+            self._row_index = {code: row for row, code in enumerate(self._codes)}
+
+        # 기존 종목: 바뀐 셀만 알림 (연속된 범위로 묶음)
+        for code in self._codes:
+            old, new = self._rows[code], new_rows[code]
+            changed = [col for col, field in enumerate(self.FIELDS) if field and old[field] != new[field]]
+            self._account(old, -1)
+            self._account(new, 1)
+            self._rows[code] = new
+            self._pending_prices.pop(code, None)  # 조회 값이 실시간 가격보다 우선
+            if changed:
+                row = self._row_index[code]
+                self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+
+        # 새 종목: 총계 행 앞에 한 번에 추가
+        added = [code for code in new_rows if code not in self._rows]
+        if added:
+            first = len(self._codes)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for code in added:
+                self._row_index[code] = len(self._codes)
+                self._codes.append(code)
+                self._rows[code] = new_rows[code]
+                self._account(new_rows[code], 1)
+            self.endInsertRows()
+
+        self._set_total_row(bool(self._codes))
+        self._update_total()
+
+    def upsert(self, item):
+        """
+        한 종목 반영 (체결/잔고 보정): 없으면 총계 행 앞에 추가, 있으면 바뀐 셀만 알림
+        Args:
+            item (dict): set_snapshot 항목과 같은 형식
+        """
+        code = item["code"]
+        old = self._rows.get(code)
+        if old is None:
+            row = len(self._codes)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._row_index[code] = row
+            self._codes.append(code)
+            self._rows[code] = item
+            self._account(item, 1)
+            self.endInsertRows()
+            self._set_total_row(True)
+        else:
+            changed = [col for col, field in enumerate(self.FIELDS) if field and old[field] != item[field]]
+            self._account(old, -1)
+            self._account(item, 1)
+            self._rows[code] = item
+            self._pending_prices.pop(code, None)
+            if changed:
+                row = self._row_index[code]
+                self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+        self._update_total()
+
+    def remove(self, code):
+        """한 종목 행 제거 (전량 매도 등)"""
+        row = self._row_index.pop(code, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._codes[row]
+        self._account(self._rows.pop(code), -1)
+        self._checked.discard(code)
+        self._pending_prices.pop(code, None)
+        self.endRemoveRows()
+        for index in range(row, len(self._codes)):
+            self._row_index[self._codes[index]] = index
+        self._set_total_row(bool(self._codes))
+        self._update_total()
+
+    def _set_total_row(self, visible):
+        if visible == self._has_total:
+            return
+        row = len(self._codes)
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._has_total = True
+            self.endInsertRows()
+        else:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._has_total = False
+            self._total = None
+            self.endRemoveRows()
+
+    def update_price(self, code, price):
+        """실시간 체결가 (flush_interval_ms 단위로 모아서 반영)"""
+        if code not in self._row_index:
+            return
+        self._pending_prices[code] = price
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush_prices(self):
+        """모아둔 체결가 반영: 현재가/평가금액/손익률 셀만 갱신"""
+        pending, self._pending_prices = self._pending_prices, {}
+        rows = []
+        for code, price in pending.items():
+            item = self._rows.get(code)
+            if item is None or item["price"] == price:
+                continue
+            self._account(item, -1)
+            item = dict(item)
+            item["price"] = price
+            item["eval_amount"] = price * item["quantity"]
+            if item["cost"] > 0:
+                item["rate"] = profit_rate(item["quantity"], price, item["cost"])  # 손절/익절 판단과 같은 식
+            self._account(item, 1)
+            self._rows[code] = item
+            rows.append(self._row_index[code])
+        if not rows:
+            return
+        self.dataChanged.emit(self.index(min(rows), self.COL_PRICE), self.index(max(rows), self.COL_RATE))
+        self._update_total()
+
+    def clear(self):
+        self.beginResetModel()
+        self._codes, self._rows, self._row_index = [], {}, {}
+        self._checked.clear()
+        self._pending_prices.clear()
+        self._total = None
+        self._has_total = False
+        self._sum_eval = self._sum_cost = 0
+        self.endResetModel()
+
+    def _account(self, item, sign):
+        """행 합계에 항목 더하기(sign=1)/빼기(sign=-1)"""
+        self._sum_eval += sign * item["eval_amount"]
+        self._sum_cost += sign * item["cost"]
+
+    def _update_total(self):
+        if not self._codes:
+            return
+        total_cost = self._sum_cost
+        rate = (self._sum_eval - total_cost) / total_cost * 100 if total_cost > 0 else None
+        total = (self._sum_eval, rate)
+        if total != self._total:
+            self._total = total
+            row = len(self._codes)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.COL_RATE))
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def codes(self):
+        return list(self._codes)
+
+    def item(self, code):
+        return self._rows.get(code)
+
+    def checked_positions(self):
+        """체크된 (종목코드, 보유수량) 목록"""
+        return [(code, self._rows[code]["quantity"]) for code in self._codes if code in self._checked]
+
+
+class OrdersTableModel(QAbstractTableModel):
+    """
+    주문내역 테이블 모델 (미완료 주문, Order -> 행)
+
+    set_orders: 미완료 주문 전체 반영 (새로고침)
+    update_code: 주문 이벤트가 온 종목의 주문 행만 추가/갱신/제거
+    행 값은 describe(order) 콜백으로 만들고, 값이 바뀐 셀만 dataChanged 로 알린다.
+    """
+    HEADERS = ['주문번호', '종목코드', '종목명', '주문수량', '주문가격', '주문상태', '주문유형', '시간']
+    FIELDS = ("order_no", "code", "name", "quantity", "price", "status", "side", "time")
+
+    def __init__(self, describe, parent=None):
+        """
+        Args:
+            describe: describe(order) -> dict(FIELDS) 행 표시 값
+        """
+        super().__init__(parent)
+        self.describe = describe
+        self._orders = []      # 행 순서
+        self._rows = {}        # Order -> 행 값 dict
+        self._row_index = {}   # Order -> 행 번호
+        self._by_code = {}     # 종목코드 -> 표시 중인 Order set
+
+    # ------------------------------------------------------------------
+    # QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orders)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[self._orders[index.row()]][self.FIELDS[index.column()]]
+        if role == Qt.DisplayRole:
+            return f"{value:,}" if isinstance(value, int) else value
+        if role == Qt.TextAlignmentRole and isinstance(value, int):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def set_orders(self, orders):
+        """미완료 주문 전체 반영"""
+        self._sync(set(self._rows), orders)
+
+    def update_code(self, code, orders):
+        """
+        한 종목의 주문 행만 반영
+        Args:
+            orders (list): 해당 종목의 미완료 주문 (완료된 주문은 행 제거)
+        """
+        self._sync(self._by_code.get(code, set()), orders)
+
+    def _sync(self, shown, orders):
+        """shown(표시 중인 주문) 중 orders 에 없는 행은 제거, 나머지는 갱신/추가"""
+        keep = set(orders)
+        removed = sorted((order for order in shown if order not in keep), key=self._row_index.get, reverse=True)
+        for order in removed:
+            row = self._row_index.pop(order)
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._orders[row]
+            del self._rows[order]
+            self._forget(order)
+            self.endRemoveRows()
+        if removed:
+            # 가장 앞에서 제거한 행 이후만 행 번호 다시 매김
+            for index in range(row, len(self._orders)):
+                self._row_index[self._orders[index]] = index
+
+        added = []
+        for order in orders:
+            values = self.describe(order)
+            old = self._rows.get(order)
+            if old is None:
+                added.append((order, values))
+                continue
+            changed = [col for col, field in enumerate(self.FIELDS) if old[field] != values[field]]
+            self._rows[order] = values
+            if changed:
+                row = self._row_index[order]
+                self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+
+        if added:
+            first = len(self._orders)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for order, values in added:
+                self._row_index[order] = len(self._orders)
+                self._orders.append(order)
+                self._rows[order] = values
+                self._by_code.setdefault(order.code, set()).add(order)
+            self.endInsertRows()
+
+    def _forget(self, order):
+        orders = self._by_code.get(order.code)
+        if orders is not None:
+            orders.discard(order)
+            if not orders:
+                del self._by_code[order.code]
+
+    def clear(self):
+        self.beginResetModel()
+        self._orders, self._rows, self._row_index, self._by_code = [], {}, {}, {}
+        self.endResetModel()
+
+
+# 조건식 종목 상태별 배경색
+CONDITION_STATUS_BRUSHES = {
+    "매수중": QBrush(QColor(255, 200, 200)),    # 연한 빨강
+    "매수완료": QBrush(QColor(255, 150, 150)),  # 빨강
+    "매도중": QBrush(QColor(200, 200, 255)),    # 연한 파랑
+    "매도완료": QBrush(QColor(150, 150, 255)),  # 파랑
+    "실패": QBrush(QColor(200, 200, 200)),      # 회색
+}
+
+
+class ConditionStocksTableModel(QAbstractTableModel):
+    """
+    조건식 종목 테이블 모델 (종목코드 -> 행, O(1) 갱신)
+
+    행 수가 max_rows 를 넘으면 오래된 행부터 한 번에 정리하고, archive 콜백이 있으면 정리한 행을 넘긴다.
+    """
+    HEADERS = ['종목코드', '종목명', '현재가', '주문량', '상태', '시간', '조건식']
+    FIELDS = ("code", "name", "price", "quantity", "status", "time", "condition")
+    COL_STATUS = 4
+
+    def __init__(self, parent=None, max_rows=1000, archive=None):
+        """
+        Args:
+            max_rows (int): 최대 행 수
+            archive (callable): archive(rows) 정리되는 행(dict 리스트) 보관 (예: 매매 기록 DB)
+        """
+        super().__init__(parent)
+        self.max_rows = max_rows
+        self.archive = archive
+        self._rows = []        # 행 순서대로 dict
+        self._row_index = {}   # 종목코드 -> 행 번호
+        self._offset = 0       # 정리된 행 수 (_row_index 값 - _offset = 현재 행 번호)
+
+    # ------------------------------------------------------------------
+    # QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            value = row[self.FIELDS[col]]
+            if isinstance(value, int):
+                return f"{value:,}"
+            return value
+        if role == Qt.BackgroundRole and col == self.COL_STATUS:
+            return CONDITION_STATUS_BRUSHES.get(row["status"])
+        if role == Qt.TextAlignmentRole and isinstance(row[self.FIELDS[col]], int):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def row_of(self, code):
+        """종목코드의 현재 행 번호 (없으면 None)"""
+        position = self._row_index.get(code)
+        return None if position is None else position - self._offset
+
+    def upsert(self, code, **values):
+        """
+        종목 행 추가 또는 갱신 (바뀐 셀만 dataChanged)
+        Args:
+            values: name, price, quantity, status, time, condition (생략한 값은 유지)
+        """
+        row = self.row_of(code)
+        if row is None:
+            self.insert_many([dict(values, code=code)])
+            return
+
+        item = self._rows[row]
+        changed = [col for col, field in enumerate(self.FIELDS)
+                   if field in values and values[field] is not None and item[field] != values[field]]
+        for col in changed:
+            item[self.FIELDS[col]] = values[self.FIELDS[col]]
+        if changed:
+            self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+
+    def insert_many(self, rows):
+        """
+        여러 종목을 한 번에 추가 (조건검색 초기 결과 등). 이미 있는 종목은 갱신
+        Args:
+            rows (list): dict(code, name, price, quantity, status, time, condition)
+        """
+        new_rows = []
+        seen = set()
+        for values in rows:
+            code = values["code"]
+            if code in self._row_index:
+                self.upsert(**values)
+            elif code not in seen:
+                seen.add(code)
+                item = {field: values.get(field) for field in self.FIELDS}
+                for field in ("name", "status", "time", "condition"):
+                    item[field] = item[field] or ""
+                for field in ("price", "quantity"):
+                    item[field] = item[field] or 0
+                new_rows.append(item)
+        if not new_rows:
+            return
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        for item in new_rows:
+            self._row_index[item["code"]] = self._offset + len(self._rows)
+            self._rows.append(item)
+        self.endInsertRows()
+
+        if len(self._rows) > self.max_rows:
+            # 한 번에 여러 행을 정리하여 행 이동 비용을 분산
+            self.evict(len(self._rows) - self.max_rows + max(1, self.max_rows // 10))
+
+    def evict(self, count):
+        """오래된 행 count 개 정리 (archive 콜백으로 전달)"""
+        count = min(count, len(self._rows))
+        if count <= 0:
+            return
+        evicted = self._rows[:count]
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        del self._rows[:count]
+        for item in evicted:
+            del self._row_index[item["code"]]
+        self._offset += count
+        self.endRemoveRows()
+        if self.archive is not None:
+            self.archive(evicted)
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows, self._row_index, self._offset = [], {}, 0
+        self.endResetModel()
+
+    def item(self, code):
+        row = self.row_of(code)
+        return None if row is None else self._rows[row]
@@ -1,35 +1,502 @@
+"""
+trades 스키마 (PRAGMA user_version 으로 버전 관리)
+
+version 1: timestamp(TEXT), code, trade_type, quantity, price, total_amount
+version 2: 주문번호, 조건식, 계좌, 수수료/세금, 실현손익, 체결지연, 정수 시각(ts: epoch ms, day: YYYYMMDD) 추가
+           (code, ts) / (condition_name, ts) 인덱스, 손익 집계 테이블(pnl_daily, pnl_daily_condition)
+version 3: 조건식 편입 종목 보관 테이블(condition_hits) 추가 (화면 테이블에서 정리된 행)
+version 4: 주문 단계별 지연 테이블(order_latency) 추가 (latency 모듈 참고)
+
+실현손익(realized_pnl)은 매도 체결은 (체결가 - 매입단가) * 수량 - 수수료 - 세금, 매수 체결은 -수수료로 기록하여
+합계가 수수료/세금을 포함한 실현손익이 되도록 한다.
+"""
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
 
+from latency import STAGES
+
+SCHEMA_VERSION = 4
+
+CREATE_TRADES_TABLE = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    code TEXT,
+    trade_type TEXT,
+    quantity INTEGER,
+    price INTEGER,
+    total_amount INTEGER
+)
+"""
+
+# version 1 -> 2 에 추가된 컬럼
+TRADES_V2_COLUMNS = (
+    ("ts", "INTEGER NOT NULL DEFAULT 0"),             # 체결 시각 (epoch ms)
+    ("day", "INTEGER NOT NULL DEFAULT 0"),            # 체결 일자 (YYYYMMDD)
+    ("order_no", "TEXT NOT NULL DEFAULT ''"),
+    ("condition_name", "TEXT NOT NULL DEFAULT ''"),
+    ("account", "TEXT NOT NULL DEFAULT ''"),
+    ("fee", "INTEGER NOT NULL DEFAULT 0"),
+    ("tax", "INTEGER NOT NULL DEFAULT 0"),
+    ("realized_pnl", "INTEGER NOT NULL DEFAULT 0"),
+    ("fill_latency_ms", "INTEGER"),                   # 주문 전송 ~ 체결 (ms)
+)
+
+# 손익 집계 테이블 -> 집계 키 (체결 기록 시 트리거로 갱신)
+PNL_ROLLUPS = {
+    "pnl_daily": ("day", "code", "condition_name"),      # 일자·종목·조건식별
+    "pnl_daily_condition": ("day", "condition_name"),    # 일자·조건식별 (일자/조건식 합계 조회용)
+}
+
+PNL_COLUMNS = ("buy_qty", "buy_amount", "sell_qty", "sell_amount", "fee", "tax", "realized_pnl", "trade_count")
+
+# trades 행 -> 집계 컬럼 값
+PNL_VALUES = (
+    "CASE WHEN {row}.trade_type = '매수' THEN {row}.quantity ELSE 0 END",
+    "CASE WHEN {row}.trade_type = '매수' THEN {row}.total_amount ELSE 0 END",
+    "CASE WHEN {row}.trade_type = '매도' THEN {row}.quantity ELSE 0 END",
+    "CASE WHEN {row}.trade_type = '매도' THEN {row}.total_amount ELSE 0 END",
+    "{row}.fee",
+    "{row}.tax",
+    "{row}.realized_pnl",
+    "1",
+)
+
+
+def _rollup_ddl(table, keys):
+    """집계 테이블, 트리거 생성 SQL"""
+    key_defs = ", ".join(f"{key} {'INTEGER' if key == 'day' else 'TEXT'} NOT NULL" for key in keys)
+    value_defs = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in PNL_COLUMNS)
+    create_table = f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key_defs}, {value_defs},
+            PRIMARY KEY ({", ".join(keys)})
+        ) WITHOUT ROWID
+    """
+    columns = ", ".join(keys + PNL_COLUMNS)
+    values = ", ".join([f"NEW.{key}" for key in keys] + [value.format(row="NEW") for value in PNL_VALUES])
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in PNL_COLUMNS)
+    create_trigger = f"""
+        CREATE TRIGGER IF NOT EXISTS trades_{table} AFTER INSERT ON trades
+        BEGIN
+            INSERT INTO {table} ({columns}) VALUES ({values})
+            ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates};
+        END
+    """
+    sums = ", ".join([f"SUM({value.format(row='trades')})" for value in PNL_VALUES])
+    backfill = f"""
+        INSERT INTO {table} ({columns})
+        SELECT {", ".join(keys)}, {sums} FROM trades WHERE code IS NOT NULL
+        GROUP BY {", ".join(keys)}
+    """
+    return create_table, create_trigger, backfill
+
+
+CREATE_TRADES_INDEXES = (
+    # 종목/조건식별 기간 조회 (손익 컬럼까지 포함하여 테이블 접근 없이 집계)
+    "CREATE INDEX IF NOT EXISTS idx_trades_code_ts ON trades (code, ts, trade_type, quantity, total_amount, realized_pnl)",
+    "CREATE INDEX IF NOT EXISTS idx_trades_condition_ts ON trades (condition_name, ts, trade_type, quantity, total_amount, realized_pnl)",
+    "CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts)",
+)
+
+# version 3: 조건식 편입 종목 (조건식 종목 테이블에서 정리된 행 보관)
+CREATE_CONDITION_HITS_TABLE = """
+CREATE TABLE IF NOT EXISTS condition_hits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts INTEGER NOT NULL,                 -- 보관 시각 (epoch ms)
+    day INTEGER NOT NULL,                -- 일자 (YYYYMMDD)
+    code TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    condition_name TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    quantity INTEGER NOT NULL DEFAULT 0,
+    price INTEGER NOT NULL DEFAULT 0,
+    last_time TEXT NOT NULL DEFAULT ''   -- 화면에 표시된 마지막 갱신 시각 (HH:MM:SS)
+)
+"""
+
+CREATE_CONDITION_HITS_INDEX = "CREATE INDEX IF NOT EXISTS idx_condition_hits_day ON condition_hits (day, condition_name)"
+
+INSERT_CONDITION_HIT = """
+INSERT INTO condition_hits (ts, day, code, name, condition_name, status, quantity, price, last_time)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# version 4: 주문 단계별 지연 (첫 단계 기준 경과 시간, us)
+CREATE_ORDER_LATENCY_TABLE = f"""
+CREATE TABLE IF NOT EXISTS order_latency (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts INTEGER NOT NULL,                 -- 첫 체결 기록 시각 (epoch ms)
+    day INTEGER NOT NULL,                -- 일자 (YYYYMMDD)
+    order_no TEXT NOT NULL DEFAULT '',
+    code TEXT NOT NULL,
+    side TEXT NOT NULL,
+    condition_name TEXT NOT NULL DEFAULT '',
+    {", ".join(f"{stage}_us INTEGER" for stage in STAGES)}
+)
+"""
+
+CREATE_ORDER_LATENCY_INDEX = "CREATE INDEX IF NOT EXISTS idx_order_latency_day ON order_latency (day, condition_name)"
+
+INSERT_ORDER_LATENCY = f"""
+INSERT INTO order_latency (ts, day, order_no, code, side, condition_name, {", ".join(f"{stage}_us" for stage in STAGES)})
+VALUES ({", ".join("?" * (6 + len(STAGES)))})
+"""
+
+INSERT_TRADE = """
+INSERT INTO trades (timestamp, code, trade_type, quantity, price, total_amount,
+                    ts, day, order_no, condition_name, account, fee, tax, realized_pnl, fill_latency_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def migrate(conn):
+    """trades 스키마를 SCHEMA_VERSION 으로 갱신 (기존 trade_log.db 포함)"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    # 스키마 변경(DDL)까지 한 트랜잭션으로 처리 (다른 연결이 동시에 갱신하지 않도록 IMMEDIATE)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.execute(CREATE_TRADES_TABLE)
+        if version < 2:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+            for name, definition in TRADES_V2_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE trades ADD COLUMN {name} {definition}")
+            # 기존 기록의 문자열 시각(로컬 시간)을 정수 시각으로 변환
+            conn.execute("""
+                UPDATE trades SET
+                    ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000,
+                    day = CAST(strftime('%Y%m%d', timestamp) AS INTEGER)
+                WHERE ts = 0 AND timestamp IS NOT NULL
+            """)
+            for query in CREATE_TRADES_INDEXES:
+                conn.execute(query)
+            _backfill_realized_pnl(conn)
+            for table, keys in PNL_ROLLUPS.items():
+                create_table, create_trigger, backfill = _rollup_ddl(table, keys)
+                conn.execute(create_table)
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(backfill)  # 기존 기록 집계
+                conn.execute(create_trigger)
+        if version < 3:
+            conn.execute(CREATE_CONDITION_HITS_TABLE)
+            conn.execute(CREATE_CONDITION_HITS_INDEX)
+        if version < 4:
+            conn.execute(CREATE_ORDER_LATENCY_TABLE)
+            conn.execute(CREATE_ORDER_LATENCY_INDEX)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _backfill_realized_pnl(conn):
+    """기존 기록의 실현손익을 종목별 이동평균 매입단가로 계산 (수수료/세금 정보 없음)"""
+    positions = {}  # 종목코드 -> [보유수량, 평균단가]
+    updates = []
+    for row_id, code, trade_type, quantity, price in conn.execute(
+            "SELECT id, code, trade_type, quantity, price FROM trades ORDER BY id"):
+        if not code or not quantity or price is None:
+            continue
+        held = positions.setdefault(code, [0, 0])
+        if trade_type == "매수":
+            held[1] = (held[0] * held[1] + quantity * price) // (held[0] + quantity)
+            held[0] += quantity
+        elif trade_type == "매도" and held[0] > 0:
+            sold = min(quantity, held[0])
+            updates.append(((price - held[1]) * sold, row_id))
+            held[0] -= sold
+    conn.executemany("UPDATE trades SET realized_pnl = ? WHERE id = ?", updates)
+
+
+def make_trade_row(code, trade_type, quantity, price, order_no="", condition_name="", account="",
+                   fee=0, tax=0, realized_pnl=0, fill_latency_ms=None, when=None):
+    """INSERT_TRADE 파라미터 생성"""
+    when = when or datetime.now()
+    return (
+        when.strftime("%Y-%m-%d %H:%M:%S"), code, trade_type, quantity, price, quantity * price,
+        int(when.timestamp() * 1000), when.year * 10000 + when.month * 100 + when.day,
+        order_no, condition_name, account, fee, tax, realized_pnl, fill_latency_ms,
+    )
+
+
+def make_condition_hit_row(code, name="", condition="", status="", quantity=0, price=0, time="", when=None):
+    """INSERT_CONDITION_HIT 파라미터 생성"""
+    when = when or datetime.now()
+    return (
+        int(when.timestamp() * 1000), when.year * 10000 + when.month * 100 + when.day,
+        code, name or "", condition or "", status or "", quantity or 0, price or 0, time or "",
+    )
+
+
+def make_order_latency_row(order_no, code, side, condition_name, stamps, when=None):
+    """INSERT_ORDER_LATENCY 파라미터 생성 (stamps: 단계 -> 시각(초), 가장 이른 단계 기준 us)"""
+    when = when or datetime.now()
+    origin = min(stamps.values()) if stamps else 0.0
+    return (
+        int(when.timestamp() * 1000), when.year * 10000 + when.month * 100 + when.day,
+        order_no, code, side, condition_name or "",
+    ) + tuple(int(round((stamps[stage] - origin) * 1_000_000)) if stage in stamps else None for stage in STAGES)
+
+
 class TradeLogger_Sqlite3:
     def __init__(self, db_path='trade_log.db'):
         self.conn = sqlite3.connect(db_path)
         self.create_table()
     
     def create_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            code TEXT,
-            trade_type TEXT,
-            quantity INTEGER,
-            price INTEGER,
-            total_amount INTEGER
-        )
-        """
-        self.conn.execute(query)
-        self.conn.commit()
+        migrate(self.conn)
     
-    def log_trade(self, code, trade_type, quantity, price):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        total = quantity * price
+    def log_trade(self, code, trade_type, quantity, price, **details):
+        row = make_trade_row(code, trade_type, quantity, price, **details)
+        total = row[5]
 
-        query = """
-        INSERT INTO trades (timestamp, code, trade_type, quantity, price, total_amount)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """
-        self.conn.execute(query, (now, code, trade_type, quantity, price, total))
+        self.conn.execute(INSERT_TRADE, row)
         self.conn.commit()
 
-        print(f"[DB 저장] {trade_type} - {code} {quantity}주 @ {price} → {total}원")
\ No newline at end of file
+        print(f"[DB 저장] {trade_type} - {code} {quantity}주 @ {price} → {total}원")
+
+
+class TradeJournal:
+    """
+    매매 기록 비동기 저장
+
+    log_trade 는 큐에 넣고 바로 반환하고, 전용 스레드가 batch_size 건 또는 flush_interval 초마다
+    한 트랜잭션으로 모아서 저장한다. DB 는 WAL 모드로 열어 커밋마다 fsync 하지 않는다.
+    """
+    def __init__(self, db_path='trade_log.db', batch_size=500, flush_interval=0.2, queue_size=100000):
+        """
+        Args:
+            db_path (str): DB 파일 경로
+            batch_size (int): 한 트랜잭션에 저장할 최대 건수
+            flush_interval (float): 대기 중인 기록을 저장하는 최대 간격(초)
+            queue_size (int): 저장 대기 큐 최대 크기
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.written_count = 0  # 저장 완료 건수
+        self.dropped_count = 0  # 큐가 가득 차서 버린 건수
+        self.error_count = 0    # 저장 실패 트랜잭션 수
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TradeJournal", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def log_trade(self, code, trade_type, quantity, price, **details):
+        """
+        체결 기록 (호출 스레드에서 DB 를 사용하지 않음)
+        Args:
+            details: order_no, condition_name, account, fee, tax, realized_pnl, fill_latency_ms (make_trade_row 참고)
+        Returns:
+            bool: 큐 등록 여부
+        """
+        if self._closed:
+            return False
+        return self._put(INSERT_TRADE, make_trade_row(code, trade_type, quantity, price, **details))
+
+    def log_condition_hits(self, rows):
+        """
+        조건식 편입 종목 보관 (ConditionStocksTableModel 의 archive 콜백)
+        Args:
+            rows (list): dict(code, name, condition, status, quantity, price, time)
+        Returns:
+            int: 큐에 등록한 건수
+        """
+        if self._closed:
+            return 0
+        when = datetime.now()
+        return sum(self._put(INSERT_CONDITION_HIT, make_condition_hit_row(when=when, **row)) for row in rows)
+
+    def log_latency(self, order_no, code, side, condition_name, stamps):
+        """주문 단계별 시각 기록 (latency.STAGES). Returns: 큐 등록 여부"""
+        if self._closed:
+            return False
+        return self._put(INSERT_ORDER_LATENCY, make_order_latency_row(order_no, code, side, condition_name, stamps))
+
+    def _put(self, query, row):
+        try:
+            self._queue.put_nowait((query, row))
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+
+    def flush(self, timeout=5.0):
+        """현재까지 등록된 기록이 저장될 때까지 대기"""
+        if self._closed:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """남은 기록을 저장하고 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)  # 종료 표시
+        self._thread.join(timeout)
+
+    def pending(self):
+        """저장 대기 중인 건수"""
+        return self._queue.qsize()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL 에서는 체크포인트 때만 fsync
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        migrate(conn)
+        return conn
+
+    def _run(self):
+        """저장 스레드: sqlite3 연결은 이 스레드에서만 사용"""
+        conn = self._connect()
+        self._ready.set()
+
+        rows = []
+        waiters = []
+        stopping = False
+        deadline = None
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # flush_interval 경과
+
+            if item is None:
+                stopping = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not False:
+                rows.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if rows and (stopping or waiters or item is False or len(rows) >= self.batch_size):
+                self._write(conn, rows)
+                rows = []
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+        conn.close()
+
+    def _write(self, conn, rows):
+        # 같은 쿼리끼리 묶어서 executemany (순서 유지)
+        groups = []
+        for query, row in rows:
+            if groups and groups[-1][0] is query:
+                groups[-1][1].append(row)
+            else:
+                groups.append((query, [row]))
+        try:
+            with conn:  # 한 트랜잭션으로 저장
+                for query, params in groups:
+                    conn.executemany(query, params)
+            self.written_count += len(rows)
+        except sqlite3.Error as e:
+            self.error_count += 1
+            print(f"[DB 저장 실패] {len(rows)}건 - {e}")
+
+
+
+class TradeStats:
+    """
+    매매 기록 조회 (손익은 집계 테이블, 체결 목록은 (code, ts)/(condition_name, ts) 인덱스 사용)
+    일자 인자는 YYYYMMDD 정수, 시각 인자는 epoch ms 정수
+    """
+    _GROUPS = {"day": "day", "code": "code", "condition": "condition_name"}
+
+    def __init__(self, db_path='trade_log.db'):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        migrate(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def realized_pnl(self, group_by="day", start_day=None, end_day=None, code=None, condition_name=None):
+        """
+        실현손익 집계
+        Args:
+            group_by (str): "day", "code", "condition"
+            start_day (int), end_day (int): 조회 기간 (YYYYMMDD, 포함)
+            code (str): 종목 필터
+            condition_name (str): 조건식 필터
+        Returns:
+            list[dict]: 그룹별 realized_pnl, fee, tax, buy_amount, sell_amount, trade_count
+        """
+        column = self._GROUPS[group_by]
+        # 종목 조건이 없으면 일자·조건식 집계 테이블로 충분
+        table = "pnl_daily" if group_by == "code" or code is not None else "pnl_daily_condition"
+        where, params = self._day_filter(start_day, end_day)
+        if code is not None:
+            where.append("code = ?")
+            params.append(code)
+        if condition_name is not None:
+            where.append("condition_name = ?")
+            params.append(condition_name)
+        query = f"""
+            SELECT {column} AS key, SUM(realized_pnl) AS realized_pnl, SUM(fee) AS fee, SUM(tax) AS tax,
+                   SUM(buy_amount) AS buy_amount, SUM(sell_amount) AS sell_amount, SUM(trade_count) AS trade_count
+            FROM {table} {"WHERE " + " AND ".join(where) if where else ""}
+            GROUP BY {column} ORDER BY {column}
+        """
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def realized_pnl_by_day(self, start_day=None, end_day=None):
+        return self.realized_pnl("day", start_day, end_day)
+
+    def realized_pnl_by_code(self, start_day=None, end_day=None):
+        return self.realized_pnl("code", start_day, end_day)
+
+    def realized_pnl_by_condition(self, start_day=None, end_day=None):
+        return self.realized_pnl("condition", start_day, end_day)
+
+    def trades(self, code=None, condition_name=None, start_ts=None, end_ts=None, limit=1000):
+        """체결 목록 (최근 순)"""
+        where, params = [], []
+        if code is not None:
+            where.append("code = ?")
+            params.append(code)
+        if condition_name is not None:
+            where.append("condition_name = ?")
+            params.append(condition_name)
+        if start_ts is not None:
+            where.append("ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append("ts < ?")
+            params.append(end_ts)
+        query = f"""
+            SELECT * FROM trades {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY ts DESC LIMIT ?
+        """
+        return [dict(row) for row in self.conn.execute(query, params + [limit])]
+
+    @staticmethod
+    def _day_filter(start_day, end_day):
+        where, params = [], []
+        if start_day is not None:
+            where.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            where.append("day <= ?")
+            params.append(end_day)
+        return where, params
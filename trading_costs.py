@@ -0,0 +1,7 @@
+"""
+매매 비용 요율 (시뮬레이터 체결과 백테스트가 같은 값을 쓰도록 한 곳에 둔다)
+
+PyQt5 에 의존하지 않으므로 백테스트 워커 프로세스에서도 가볍게 import 할 수 있다.
+"""
+FEE_RATE = 0.00015      # 매매 수수료율 (체결금액 기준, 10원 미만 절사)
+SELL_TAX_RATE = 0.0018  # 매도 거래세율
@@ -0,0 +1,447 @@
+"""
+매매 엔진 (GUI 없이 동작)
+
+조건식 감시, 매수 파이프라인, 손절/익절, 주문/체결 추적, Slack 알림을 담당한다.
+QCoreApplication 이벤트 루프(또는 시뮬레이터)만으로 실행할 수 있고, 화면(MainWindow)은
+엔진의 시그널을 받아 표시하고 사용자 조작을 엔진 메서드로 전달하는 관찰자로만 동작한다.
+
+    python main.py --headless --backend simulator
+"""
+import logging
+from datetime import datetime
+
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+
+from kiwoom_api import KiwoomAPI, PRIORITY_ORDER, PRIORITY_UI
+from order_book import SIDE_BUY
+from condition_strategy import ConditionStrategy, load_strategies
+from condition_pipeline import ConditionPipeline
+from config import Config
+from log_manager import LogManager
+
+
+class TradingEngine(QObject):
+    log_event = pyqtSignal(str, int)  # 사용자 로그 메시지, 로그 레벨
+    login_changed = pyqtSignal(bool)  # 로그인/로그아웃
+    accounts_event = pyqtSignal(list, str)  # 계좌 목록, 선택된 계좌
+    monitoring_changed = pyqtSignal(str, bool)  # 조건식 이름, 감시 여부
+    condition_stock_event = pyqtSignal(str, str, int, int, str)  # 조건식 종목 상태 (종목코드, 상태, 수량, 가격, 조건식)
+    condition_initial_event = pyqtSignal(list, str)  # 조건검색 초기 결과 중 매수 대상 (종목코드 목록, 조건식)
+
+    logger = LogManager().get_logger("trading_engine")
+
+    def __init__(self, backend=None, db_path="trade_log.db", config=None):
+        """
+        Args:
+            backend: OpenAPI 백엔드 (None 이면 실제 키움 OCX, kiwoom_backend 참고)
+            db_path (str): 매매 기록 DB 경로
+            config (Config): 설정 (None 이면 config.json)
+        """
+        super().__init__()
+
+        self.CHECK_INTERVAL_MS = 60000   # 60초마다 잔고 조회 (손절/익절은 실시간 체결가로 판단, 조회는 잔고 보정용)
+        self.LOSS_CUTOFF = -6.0          # 손절 기준 수익률(%)
+        self.GAIN_CUTOFF = 6.0
+        self.BUY_DELAY = 0.1             # 조건식 편입 대기열 처리 간격(초)
+        self.MAX_SIGNAL_AGE = 3.0        # 편입 후 이 시간(초) 안에 주문하지 못한 종목은 매수하지 않음
+
+        self.account_num = ''
+        self.active_strategies = {}  # 감시 중인 조건식 인덱스 -> ConditionStrategy
+        self.is_logged_in = False  # 로그인 상태 플래그
+        self.loss_timer = None
+
+        self.config = config or Config()
+        # 예산 설정 (대소문자 모두 지원)
+        self.buget_per_stock = self.config.get('BUDGET_PER_STOCK')
+        if self.buget_per_stock is None:
+            self.buget_per_stock = self.config.get('budget_per_stock')
+        try:
+            if self.buget_per_stock is not None:
+                self.buget_per_stock = int(self.buget_per_stock)
+        except Exception:
+            self.buget_per_stock = None
+            self.log("[설정오류] 주문 예산(budget_per_stock)이 올바르지 않습니다.", logging.WARNING)
+        # 조건식별 예산/보유 종목 수/손절·익절 설정 (condition_strategy 참고)
+        try:
+            self.strategies = load_strategies(self.config)
+        except (KeyError, TypeError, ValueError) as e:
+            self.strategies = {}
+            self.log(f"[설정오류] 조건식 설정(conditions)이 올바르지 않습니다: {e}", logging.WARNING)
+        self.slack_webhook_url = self.config.get('SLACK_WEBHOOK_URL')
+        self.LOSS_CUTOFF = self.config.get('LOSS_CUTOFF')
+        self.GAIN_CUTOFF = self.config.get('GAIN_CUTOFF')
+        self.saved_account = self.config.get('ACCOUNT_NUM', '')  # config에서 계좌번호 가져오기
+
+        app = QCoreApplication.instance()
+
+        # Slack 알림 설정
+        if self.slack_webhook_url:
+            from slack_notifier import SlackNotifier
+            self.slack = SlackNotifier(self.slack_webhook_url)  # 백그라운드 스레드에서 전송
+            if app is not None:
+                app.aboutToQuit.connect(self.slack.close)  # 종료 시 대기 중인 알림 전송
+        else:
+            self.slack = None
+            self.logger.warning("Slack webhook URL이 설정되지 않았습니다. Slack 알림이 비활성화됩니다.")
+
+        self.kiwoom = KiwoomAPI(backend=backend, db_path=db_path)
+        if app is not None:
+            app.aboutToQuit.connect(self.kiwoom.close)  # 종료 시 매매 기록 저장
+
+        # 조건식 편입 → 매수 파이프라인 (대기열 하나를 BUY_DELAY 간격으로 모아서 처리)
+        self.pipeline = ConditionPipeline(
+            self.kiwoom,
+            get_account=lambda: self.account_num,
+            get_budget=self.get_buy_budget,
+            on_result=self.on_pipeline_result,
+            tick_interval=self.BUY_DELAY,
+            max_signal_age=self.MAX_SIGNAL_AGE,
+            logger=self.logger,
+        )
+
+        self.kiwoom.login_event.connect(self.on_login_success)
+        self.kiwoom.exit_event.connect(self.on_exit_signal)  # 실시간 손절/익절 이벤트 연결
+        self.kiwoom.trade_event.connect(self.on_trade_event)  # 체결 이벤트 연결
+        self.kiwoom.condition_event.connect(self.on_condition_event)
+        self.kiwoom.condition_initial_event.connect(self.on_condition_initial)
+        self.kiwoom.set_exit_thresholds(self.LOSS_CUTOFF, self.GAIN_CUTOFF)
+
+    def log(self, message, level=logging.INFO):
+        """로그 출력 (화면이 연결되어 있으면 log_event 로 전달)"""
+        self.logger.log(level, message)
+        self.log_event.emit(message, level)
+
+    # ------------------------------------------------------------------
+    # 로그인 / 계좌
+    # ------------------------------------------------------------------
+    def login(self):
+        self.kiwoom.comm_connect()
+
+    def logout(self):
+        """로그아웃: 상태 초기화 (OpenAPI는 실제 로그아웃 미지원)"""
+        self.is_logged_in = False
+        self.account_num = ''
+        self.pipeline.cancel()
+        self.log("로그아웃 되었습니다.")
+        self.login_changed.emit(False)
+
+    def on_login_success(self, success):
+        """로그인 성공 후 계좌 정보 가져오기"""
+        if not success:
+            return
+
+        self.is_logged_in = True
+        accounts = self.kiwoom.get_account_list()
+        self.log(f"계좌번호: {accounts}")
+
+        # config에 저장된 계좌번호가 있고 유효한 계좌번호인 경우 선택
+        if self.saved_account and self.saved_account in accounts:
+            self.account_num = self.saved_account
+            self.log(f"저장된 계좌번호 '{self.saved_account}' 선택됨")
+        # 저장된 계좌가 없거나 유효하지 않은 경우 첫 번째 계좌 선택
+        elif accounts:
+            self.account_num = accounts[0]
+
+        self.login_changed.emit(True)
+        self.accounts_event.emit(accounts, self.account_num)
+        if self.account_num:
+            QTimer.singleShot(1000, lambda: self.kiwoom.request_balance(self.account_num))
+
+        self.start_periodic_balance_check()
+
+    def select_account(self, account):
+        """주문 계좌 변경 (config 에 저장하고 잔고 조회)"""
+        if not account or account == self.account_num:
+            return
+        self.account_num = account
+        self.config.set('ACCOUNT_NUM', account)  # config에 저장
+        self.logger.debug(f"계좌번호 '{account}' 저장됨")
+        self.logger.debug(f"잔고 조회 요청: {account}")
+        self.kiwoom.request_balance(self.account_num, priority=PRIORITY_UI)
+
+    def refresh_balance(self):
+        """잔고 조회 요청. Returns: 요청 여부"""
+        if not self.account_num:
+            self.log("계좌가 선택되지 않았습니다.")
+            return False
+        self.kiwoom.request_balance(self.account_num, priority=PRIORITY_UI)
+        return True
+
+    # ------------------------------------------------------------------
+    # 손절/익절 기준
+    # ------------------------------------------------------------------
+    def set_loss_cutoff(self, value):
+        """손절 기준 변경"""
+        self.LOSS_CUTOFF = -abs(value)
+        self.kiwoom.set_exit_thresholds(self.LOSS_CUTOFF, self.GAIN_CUTOFF)
+        self.log(f"손절 기준 변경: {self.LOSS_CUTOFF}%")
+
+    def set_gain_cutoff(self, value):
+        """익절 기준 변경"""
+        self.GAIN_CUTOFF = value
+        self.kiwoom.set_exit_thresholds(self.LOSS_CUTOFF, self.GAIN_CUTOFF)
+        self.log(f"익절 기준 변경: {self.GAIN_CUTOFF}%")
+
+    # ------------------------------------------------------------------
+    # 조건식 감시
+    # ------------------------------------------------------------------
+    def load_condition_list(self):
+        self.kiwoom.get_condition_list()
+
+    def is_monitoring(self, condition_name):
+        return self.kiwoom.condition_index.get(condition_name) in self.active_strategies
+
+    def start_condition_monitoring(self, condition_name):
+        """
+        조건식 감시 시작 (다른 조건식 감시는 유지)
+        Args:
+            condition_name (str): 조건식 이름
+        """
+        if not condition_name:
+            self.log("조건식을 선택해주세요.")
+            return
+
+        cond_index = self.kiwoom.condition_index.get(condition_name)
+        if cond_index is None:
+            self.log(f"조건식 '{condition_name}'을 찾을 수 없습니다.")
+            return
+
+        # 이미 모니터링 중인 경우 중복 시작 방지
+        if cond_index in self.active_strategies:
+            self.log(f"이미 조건식 '{condition_name}'을 모니터링 중입니다.")
+            return
+
+        strategy = self.strategies.get(condition_name)
+        if strategy is None:
+            # 설정에 없는 조건식은 전역 예산/손절·익절 기준 사용
+            strategy = ConditionStrategy(condition_name)
+            self.strategies[condition_name] = strategy
+        strategy.index = cond_index
+
+        self.log(f"조건식 감시 시작: {condition_name}")
+        self.kiwoom.start_condition_monitoring(condition_name)
+        if condition_name not in self.kiwoom.active_conditions:
+            self.log(f"조건식 '{condition_name}' 감시 시작 실패", logging.WARNING)
+            return
+        self.active_strategies[cond_index] = strategy
+        self.monitoring_changed.emit(condition_name, True)
+
+    def stop_condition_monitoring(self, condition_name):
+        """
+        조건식 감시 중지
+        Args:
+            condition_name (str): 조건식 이름
+        """
+        cond_index = self.kiwoom.condition_index.get(condition_name)
+        strategy = self.active_strategies.pop(cond_index, None)
+        if strategy is None:
+            return
+
+        self.kiwoom.stop_condition_monitoring(condition_name)
+        self.pipeline.cancel(strategy)
+        self.log(f"조건식 '{condition_name}' 모니터링 중지")
+        self.monitoring_changed.emit(condition_name, False)
+
+    def stop_all_condition_monitoring(self):
+        """감시 중인 모든 조건식 중지"""
+        for strategy in list(self.active_strategies.values()):
+            self.stop_condition_monitoring(strategy.name)
+
+    def save_condition(self, condition):
+        """조건식을 config에 저장 (조건식별 설정을 사용하는 경우 목록에 추가)"""
+        self.config.set('condition', condition)
+        items = self.config.get('conditions')
+        if items is not None and all(item.get("name") != condition for item in items):
+            strategy = self.strategies.get(condition) or ConditionStrategy(condition)
+            self.strategies[condition] = strategy
+            self.config.set('conditions', items + [strategy.to_config()])
+        self.log(f"조건식 '{condition}'이(가) 저장되었습니다.")
+
+    def auto_start(self):
+        """자동 로그인 → 조건식 로드 → 설정된 조건식 감시 시작"""
+        QTimer.singleShot(1000, self.auto_login)  # 1초 후 자동 로그인 시도
+
+    def auto_login(self):
+        """자동 로그인 및 조건식 로드"""
+        self.login()
+        # 로그인 후 5초 뒤에 조건식 로드
+        QTimer.singleShot(5000, self.auto_condition_monitoring)
+
+    def auto_condition_monitoring(self):
+        """자동 조건식 감시 시작"""
+        self.load_condition_list()
+
+        # 2초 후에 저장된 조건식으로 감시 시작 시도
+        QTimer.singleShot(2000, self.try_start_saved_condition)
+
+    def try_start_saved_condition(self):
+        """설정된 조건식들로 감시 시작 시도"""
+        if not self.strategies:
+            self.log("저장된 조건식이 없습니다.")
+            return
+
+        for condition_name in self.strategies:
+            if condition_name in self.kiwoom.condition_index:
+                self.log(f"저장된 조건식 '{condition_name}' 감시 시작")
+                self.start_condition_monitoring(condition_name)
+            else:
+                self.log(f"저장된 조건식 '{condition_name}'을 찾을 수 없습니다.", logging.WARNING)
+
+    #조건식 편입/이탈 이벤트 처리
+    def on_condition_event(self, code, type_, cond_name, cond_index):
+        """조건식 편입/이탈 이벤트 처리 (편입 종목은 매수 파이프라인 대기열에 등록)"""
+        event_type = "편입" if type_ == "I" else "이탈"
+        self.log(f"[{cond_name}] {event_type} - 종목코드: {code}", logging.DEBUG)
+
+        strategy = self.active_strategies.get(cond_index)
+        if strategy is None:
+            self.logger.debug(f"[{cond_name}] 감시 중이 아닌 조건식 이벤트 무시: {code}")
+            return
+
+        if type_ == "I":
+            self.pipeline.push(code, strategy)
+
+    def on_condition_initial(self, codes, cond_name, cond_index):
+        """
+        조건검색 초기 결과 처리 (감시 시작 시 이미 조건을 만족하는 종목 전체)
+        보유/주문 중인 종목을 한 번에 제외하고 나머지를 매수 파이프라인에 넣는다.
+        """
+        strategy = self.active_strategies.get(cond_index)
+        if strategy is None:
+            self.logger.debug(f"[{cond_name}] 감시 중이 아닌 조건식 초기 결과 무시: {len(codes)}종목")
+            return
+
+        traded = self.kiwoom.orders.has_traded
+        candidates = [
+            code for code in codes
+            if code not in self.pipeline and not self.kiwoom.is_position_active(code) and not traded(code, SIDE_BUY)
+        ]
+        self.log(f"[{cond_name}] 초기 검색 결과 {len(codes)}종목 (보유/주문 중 제외 {len(codes) - len(candidates)}종목)")
+        if not candidates:
+            return
+
+        self.condition_initial_event.emit(candidates, cond_name)
+        self.pipeline.push_many(candidates, strategy)
+
+    def get_buy_budget(self, strategy):
+        """종목당 주문 예산 (조건식 설정이 없으면 전역 예산, 유효하지 않으면 None)"""
+        budget = strategy.budget_per_stock
+        if budget is None:
+            budget = getattr(self, 'buget_per_stock', None)
+        if budget is None or not isinstance(budget, (int, float)) or budget <= 0:
+            return None
+        return budget
+
+    def on_pipeline_result(self, signal, order, reason):
+        """매수 파이프라인 처리 결과 (주문 또는 제외 사유)"""
+        code = signal.code
+        if order is None:
+            self.log(f"[매수 스킵] [{signal.strategy.name}] {code} - {reason}", logging.DEBUG)
+            return
+
+        self.condition_stock_event.emit(code, "매수중", order.quantity, 0, signal.strategy.name)
+        price = self.kiwoom.get_current_price(code)
+        self.log(f"[시장가 매수] {code} - 현재가: {price:,}원, 수량: {order.quantity}, 총액: {order.quantity * price:,}원")
+
+    # ------------------------------------------------------------------
+    # 체결 / 매도
+    # ------------------------------------------------------------------
+    def on_trade_event(self, event_type, code, quantity, price):
+        """매매 체결 이벤트 처리"""
+        try:
+            if event_type == "매수체결":
+                status = "매수완료"
+                self.log(f"[매수체결] {code} - {quantity}주 @ {price:,}원")
+            elif event_type == "매도체결":
+                status = "매도완료"
+                self.log(f"[매도체결] {code} - {quantity}주 @ {price:,}원")
+            else:
+                return
+
+            self.condition_stock_event.emit(code, status, quantity, price, "")
+
+            # Slack 알림 전송
+            if self.slack:
+                try:
+                    stock_name = self.kiwoom.get_stock_name(code)
+                    trade_type = "매수" if event_type == "매수체결" else "매도"
+
+                    # 계좌번호 마스킹 처리 (뒤 4자리만 표시)
+                    masked_account = f"...{self.account_num[-4:]}" if self.account_num else "계좌없음"
+
+                    message = (
+                        f"{trade_type} 체결 알림 ({masked_account})\n"
+                        f"• 종목: {stock_name} ({code})\n"
+                        f"• 체결가: {price:,}원\n"
+                        f"• 수량: {quantity:,}주\n"
+                        f"• 총액: {price * quantity:,}원"
+                    )
+
+                    color = "#36a64f" if trade_type == "매수" else "#ff4444"
+                    self.slack.send_message(message, color)
+
+                except Exception as e:
+                    self.log(f"Slack 알림 전송 실패: {str(e)}", logging.WARNING)
+
+        except Exception as e:
+            self.log(f"체결 처리 중 오류 발생: {str(e)}", logging.ERROR)
+
+    def on_exit_signal(self, code, qty, rate, reason):
+        """실시간 체결가 기준 손절/익절 조건 도달 시 시장가 매도"""
+        self.log(f"[{reason} 매도] {code} 수익률: {rate:.2f}%, 수량: {qty} → 시장가 매도")
+        self.kiwoom.send_sell_order(self.account_num, code, qty)
+
+    def sell(self, code, qty):
+        """수동 매도 (시장가)"""
+        self.kiwoom.send_sell_order(self.account_num, code, qty)
+        self.log(f"[수동 매도] {code} {qty}주 매도 주문 전송")
+
+    def check_and_sell_losscut(self):
+        """
+        잔고 조회로 보유 종목(PositionBook)을 보정하고, 실시간 체결가가 아직 없는 종목만 잔고 현재가 기준 수익률로 손절/익절 판단
+        """
+        def handle_balance(future):
+            if future.exception() is not None:
+                self.log(f"[잔고 조회 실패] {future.exception()}", logging.ERROR)
+                return
+
+            for code, position in list(self.kiwoom.positions.positions.items()):
+                # 실시간 체결가를 받고 있는 종목은 on_exit_signal 에서 처리
+                if code in self.kiwoom.last_prices or not position.price:
+                    continue
+
+                order = self.kiwoom.order_map.get(code)
+                if order is None or order.get("sell_sent"):
+                    continue
+
+                qty = position.quantity
+                rate = position.rate
+                loss_cutoff, gain_cutoff = self.kiwoom.get_exit_thresholds(code)
+                if loss_cutoff is not None and rate <= loss_cutoff:
+                    order["sell_sent"] = True
+                    self.log(f"[손절 매도] {code} 손익률: {rate:.2f}%, 수량: {qty}")
+                    self.kiwoom.send_sell_order(self.account_num, code, qty)
+
+                elif gain_cutoff is not None and rate >= gain_cutoff:
+                    order["sell_sent"] = True
+                    self.log(f"[익절 매도] {code} 수익률: {rate:.2f}% → 시장가 매도")
+                    self.kiwoom.send_sell_order(self.account_num, code, qty)
+
+        self.kiwoom.request_balance(self.account_num, priority=PRIORITY_ORDER).add_done_callback(handle_balance)
+
+    def start_periodic_balance_check(self):
+        if self.loss_timer is None:
+            self.loss_timer = QTimer(self)
+            self.loss_timer.timeout.connect(self.check_and_sell_losscut)
+        self.loss_timer.start(self.CHECK_INTERVAL_MS)
+        self.logger.debug("[자동 모니터링] 손실 종목 감시 시작")
+
+    def stats(self):
+        """엔진 지표 (매수 파이프라인, 주문 전송기, 주문 지연)"""
+        return {
+            "pipeline": self.pipeline.stats(),
+            "dispatcher": self.kiwoom.dispatcher.stats(),
+            "latency": self.kiwoom.latency.summary(),
+            "positions": self.kiwoom.positions.summary(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+        }
@@ -67,13 +67,13 @@ class Ui_MainWindow(object):
 "    }\n"
 "    \n"
 "    /* 테이블 스타일 */\n"
-"    QTableWidget {\n"
+"    QTableWidget, QTableView {\n"
 "        background-color: white;\n"
 "        border: 1px solid #e0e0e0;\n"
 "        border-radius: 5px;\n"
 "        gridline-color: #f0f0f0;\n"
 "    }\n"
-"    QTableWidget::item {\n"
+"    QTableWidget::item, QTableView::item {\n"
 "        padding: 5px;\n"
 "    }\n"
 "    QHeaderView::section {\n"
@@ -110,7 +110,7 @@ class Ui_MainWindow(object):
 "    }\n"
 "    \n"
 "    /* 로그 영역 스타일 */\n"
-"    QTextEdit#textEdit_log {\n"
+"    QPlainTextEdit#plainTextEdit_log {\n"
 "        background-color: #2c3e50;\n"
 "        color: #ecf0f1;\n"
 "        border-radius: 5px;\n"
@@ -191,22 +191,17 @@ class Ui_MainWindow(object):
         self.pushButton_refresh_balance.setObjectName("pushButton_refresh_balance")
         self.pushButton_refresh_balance.setText("잔고 새로고침")
         self.verticalLayout_account.addWidget(self.pushButton_refresh_balance)
-        self.tableWidget_balance = QtWidgets.QTableWidget(self.page_account)
-        self.tableWidget_balance.setObjectName("tableWidget_balance")
-        self.tableWidget_balance.setColumnCount(0)
-        self.tableWidget_balance.setRowCount(0)
-        self.verticalLayout_account.addWidget(self.tableWidget_balance)
+        self.tableView_balance = QtWidgets.QTableView(self.page_account)
+        self.tableView_balance.setObjectName("tableView_balance")
+        self.verticalLayout_account.addWidget(self.tableView_balance)
         self.pushButton_manual_sell = QtWidgets.QPushButton(self.page_account)
         self.pushButton_manual_sell.setMinimumHeight(35)
         self.pushButton_manual_sell.setObjectName("pushButton_manual_sell")
         self.pushButton_manual_sell.setText("수동 매도")
         self.verticalLayout_account.addWidget(self.pushButton_manual_sell)
-        self.tableWidget_orders = QtWidgets.QTableWidget(self.page_account)
-        self.tableWidget_orders.setObjectName("tableWidget_orders")
-        self.tableWidget_orders.setColumnCount(8)
-        self.tableWidget_orders.setHorizontalHeaderLabels([
-            '주문번호', '종목코드', '종목명', '주문수량', '주문가격', '주문상태', '주문유형', '시간'])
-        self.verticalLayout_account.addWidget(self.tableWidget_orders)
+        self.tableView_orders = QtWidgets.QTableView(self.page_account)
+        self.tableView_orders.setObjectName("tableView_orders")
+        self.verticalLayout_account.addWidget(self.tableView_orders)
         self.stackedWidget_main.addWidget(self.page_account)
         self.page_condition = QtWidgets.QWidget()
         self.page_condition.setObjectName("page_condition")
@@ -260,20 +255,30 @@ class Ui_MainWindow(object):
         self.horizontalLayout_cut.addWidget(self.spinBox_gain_cut)
         self.verticalLayout_condition_controls.addWidget(self.frame_cut_settings)
         self.verticalLayout_condition.addWidget(self.frame_condition_controls)
-        self.tableWidget_condition_stocks = QtWidgets.QTableWidget(self.page_condition)
-        self.tableWidget_condition_stocks.setObjectName("tableWidget_condition_stocks")
-        self.tableWidget_condition_stocks.setColumnCount(0)
-        self.tableWidget_condition_stocks.setRowCount(0)
-        self.verticalLayout_condition.addWidget(self.tableWidget_condition_stocks)
+        self.tableView_condition_stocks = QtWidgets.QTableView(self.page_condition)
+        self.tableView_condition_stocks.setObjectName("tableView_condition_stocks")
+        self.verticalLayout_condition.addWidget(self.tableView_condition_stocks)
         self.stackedWidget_main.addWidget(self.page_condition)
         self.page_log = QtWidgets.QWidget()
         self.page_log.setObjectName("page_log")
         self.verticalLayout_log = QtWidgets.QVBoxLayout(self.page_log)
         self.verticalLayout_log.setObjectName("verticalLayout_log")
-        self.textEdit_log = QtWidgets.QTextEdit(self.page_log)
-        self.textEdit_log.setReadOnly(True)
-        self.textEdit_log.setObjectName("textEdit_log")
-        self.verticalLayout_log.addWidget(self.textEdit_log)
+        self.horizontalLayout_log_controls = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_log_controls.setObjectName("horizontalLayout_log_controls")
+        self.label_log_level = QtWidgets.QLabel(self.page_log)
+        self.label_log_level.setObjectName("label_log_level")
+        self.horizontalLayout_log_controls.addWidget(self.label_log_level)
+        self.comboBox_log_level = QtWidgets.QComboBox(self.page_log)
+        self.comboBox_log_level.setObjectName("comboBox_log_level")
+        self.horizontalLayout_log_controls.addWidget(self.comboBox_log_level)
+        spacerItem2 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_log_controls.addItem(spacerItem2)
+        self.verticalLayout_log.addLayout(self.horizontalLayout_log_controls)
+        self.plainTextEdit_log = QtWidgets.QPlainTextEdit(self.page_log)
+        self.plainTextEdit_log.setReadOnly(True)
+        self.plainTextEdit_log.setMaximumBlockCount(5000)
+        self.plainTextEdit_log.setObjectName("plainTextEdit_log")
+        self.verticalLayout_log.addWidget(self.plainTextEdit_log)
         self.stackedWidget_main.addWidget(self.page_log)
         self.horizontalLayout_main.addWidget(self.stackedWidget_main)
         MainWindow.setCentralWidget(self.centralwidget)
@@ -314,6 +319,7 @@ class Ui_MainWindow(object):
 "              "))
         self.label_loss_cut.setText(_translate("MainWindow", "손절 기준(%)"))
         self.label_gain_cut.setText(_translate("MainWindow", "익절 기준(%)"))
+        self.label_log_level.setText(_translate("MainWindow", "로그 레벨"))
 
 
 if __name__ == "__main__":